@@ -0,0 +1,142 @@
+"""
+Preprocessing benchmarks on synthetic exports.
+
+Measures the throughput and peak traced memory of ``preprocess`` for every
+export format, and compares them against the stored baseline:
+
+    python benchmarks/bench_preprocess.py                     # compare with baseline.json
+    python benchmarks/bench_preprocess.py --save              # record a new baseline
+    python benchmarks/bench_preprocess.py --messages 1000000 --users 200 --no-compare
+
+Exits with status 1 when a format is slower, or peaks higher, than the
+baseline by more than the tolerance, or has no baseline yet. Baselines are machine-specific, so
+record one on the machine that runs the comparison.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from whatsapp_reality import preprocess, __version__
+from whatsapp_reality.synthetic import FORMATS, generate_chat
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+def run(messages, users, repeat, formats=FORMATS):
+    """
+    Benchmark ``preprocess`` on a synthetic export of every format.
+
+    Args:
+        messages: Number of messages per export
+        users: Number of participants per export
+        repeat: Number of timed runs; the fastest one is reported
+        formats: Formats to benchmark
+
+    Returns:
+        dict: Results by format, with messages_per_second, mb_per_second
+            and peak_mb keys
+    """
+    results = {}
+    for chat_format in formats:
+        data = generate_chat(messages, users, chat_format)
+        megabytes = len(data.encode('utf-8')) / 1e6
+
+        seconds = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            preprocess(data)
+            seconds = min(seconds, time.perf_counter() - start)
+
+        # Memory is measured in a separate run, since tracing slows it down
+        tracemalloc.start()
+        preprocess(data)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results[chat_format] = {
+            'messages_per_second': round(messages / seconds),
+            'mb_per_second': round(megabytes / seconds, 3),
+            'peak_mb': round(peak / 1e6, 1),
+        }
+        print(f"{chat_format:>19}: {results[chat_format]['messages_per_second']:>9,} messages/s"
+              f"  {results[chat_format]['mb_per_second']:>7.2f} MB/s"
+              f"  peak {results[chat_format]['peak_mb']:>8.1f} MB")
+    return results
+
+def compare(results, baseline, tolerance):
+    """
+    Compare benchmark results against a baseline.
+
+    Args:
+        results: Results returned by ``run``
+        baseline: Results of the baseline run
+        tolerance: Allowed relative slowdown or memory growth
+
+    Returns:
+        list: Descriptions of the regressions found, and of the formats
+            missing from the baseline
+    """
+    regressions = []
+    for chat_format, current in results.items():
+        previous = baseline.get(chat_format)
+        if previous is None:
+            regressions.append(f"{chat_format}: no baseline, record one with --save")
+            continue
+        if current['messages_per_second'] < previous['messages_per_second'] * (1 - tolerance):
+            regressions.append(f"{chat_format}: {current['messages_per_second']:,} messages/s, "
+                               f"baseline {previous['messages_per_second']:,}")
+        if current['peak_mb'] > previous['peak_mb'] * (1 + tolerance):
+            regressions.append(f"{chat_format}: peak {current['peak_mb']} MB, baseline {previous['peak_mb']} MB")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=100000, help='messages per export')
+    parser.add_argument('--users', type=int, default=20, help='participants per export')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per format')
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS))
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed relative slowdown or memory growth')
+    parser.add_argument('--baseline', default=BASELINE, help='baseline file')
+    parser.add_argument('--save', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--no-compare', action='store_true', help='do not compare with the baseline')
+    args = parser.parse_args(argv)
+
+    results = run(args.messages, args.users, args.repeat, args.formats)
+
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump({
+                'messages': args.messages,
+                'users': args.users,
+                'version': __version__,
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': results,
+            }, file, indent=2)
+            file.write('\n')
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if args.no_compare or not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline, encoding='utf-8') as file:
+        baseline = json.load(file)
+    if (baseline['messages'], baseline['users']) != (args.messages, args.users):
+        print(f"Baseline was recorded with {baseline['messages']} messages and {baseline['users']} users, "
+              f"not comparing.")
+        return 0
+
+    regressions = compare(results, baseline['results'], args.tolerance)
+    for regression in regressions:
+        print(f"FAILED {regression}")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -39,6 +39,9 @@ setup(
     ],
     python_requires=">=3.7",
     install_requires=requirements,
+    extras_require={
+        "cache": ["pyarrow>=7.0.0"],
+    },
     include_package_data=True,
     package_data={
         "whatsapp_reality": ["data/*.txt"],
@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-from whatsapp_reality import preprocess, analyzer
+from whatsapp_reality import preprocess, analyzer, ChatAnalysis
 import matplotlib.pyplot as plt
 import plotly.graph_objects as go
 import os
@@ -17,12 +17,14 @@ uploaded_file = st.file_uploader("Choose a WhatsApp chat export file (.txt)", ty
 
 if uploaded_file is not None:
     try:
-        # Read chat data
-        chat_data = uploaded_file.getvalue().decode("utf-8")
+        # Read chat data; preprocess detects the encoding of the raw bytes
+        chat_data = uploaded_file.getvalue()
         
         # Preprocess data
         with st.spinner('Preprocessing chat data...'):
             df = preprocess(chat_data)
+        # Shared by all the analyses below, so messages are scored and tokenized once
+        chat = ChatAnalysis(df)
         st.success("Preprocessing complete!")
 
         st.header("Analysis Results")
@@ -32,7 +34,7 @@ if uploaded_file is not None:
         # 1. Basic Statistics
         with st.expander("1. Basic Statistics", expanded=False):
             st.subheader("Overall Chat Statistics")
-            messages, words, media, links = analyzer.fetch_stats('Overall', df)
+            messages, words, media, links = analyzer.fetch_stats('Overall', chat)
             col1, col2, col3, col4 = st.columns(4)
             col1.metric("Total Messages", messages)
             col2.metric("Total Words", words)
@@ -43,7 +45,7 @@ if uploaded_file is not None:
             user_stats_list = []
             for user in df['user'].unique():
                 if user != 'group_notification':
-                    m, w, md, l = analyzer.fetch_stats(user, df)
+                    m, w, md, l = analyzer.fetch_stats(user, chat)
                     user_stats_list.append({'User': user, 'Messages': m, 'Words': w, 'Media': md, 'Links': l})
             user_stats_df = pd.DataFrame(user_stats_list)
             st.dataframe(user_stats_df)
@@ -51,7 +53,7 @@ if uploaded_file is not None:
 
         # 2. User Activity Analysis
         with st.expander("2. User Activity Analysis (Most Busy Users)", expanded=False):
-            fig_busy_users, df_percent = analyzer.most_busy_users(df)
+            fig_busy_users, df_percent = analyzer.most_busy_users(chat)
             st.subheader("Most Active Users (% of total messages)")
             st.dataframe(df_percent)
             st.plotly_chart(fig_busy_users, use_container_width=True)
@@ -60,14 +62,14 @@ if uploaded_file is not None:
         # with st.expander("3. Word Cloud (Plotly)", expanded=False):
         #     st.subheader("Most Frequent Words (Interactive)")
         #     with st.spinner("Generating Plotly word cloud..."):
-        #         plotly_wordcloud_fig = analyzer.create_plotly_wordcloud('Overall', df, True)
+        #         plotly_wordcloud_fig = analyzer.create_plotly_wordcloud('Overall', chat, True)
         #     st.plotly_chart(plotly_wordcloud_fig, use_container_width=True)
 
         # 4. Matplotlib Word Cloud Generation
         with st.expander("4. Word Cloud (Static)", expanded=False):
             st.subheader("Most Frequent Words (Image)")
             with st.spinner("Generating Matplotlib word cloud..."):
-                wordcloud_obj = analyzer.create_wordcloud('Overall', df)
+                wordcloud_obj = analyzer.create_wordcloud('Overall', chat)
                 fig, ax = plt.subplots(figsize=(12, 6))
                 ax.imshow(wordcloud_obj)
                 ax.axis('off')
@@ -77,7 +79,7 @@ if uploaded_file is not None:
         with st.expander("5. Most Common Words (Bar Chart)", expanded=False):
             st.subheader("Top 20 Most Frequent Words")
             with st.spinner("Analyzing common words..."):
-                common_words_fig = analyzer.most_common_words('Overall', df)
+                common_words_fig = analyzer.most_common_words('Overall', chat)
             st.plotly_chart(common_words_fig, use_container_width=True)
 
         # 6. Emoji Analysis (Original Pie Chart)
@@ -85,7 +87,7 @@ if uploaded_file is not None:
             st.subheader("Most Used Emojis")
             with st.spinner("Analyzing emojis..."):
                 try:
-                    emoji_fig = analyzer.emoji_analysis('Overall', df)
+                    emoji_fig = analyzer.emoji_analysis('Overall', chat)
                     st.pyplot(emoji_fig)
                 except Exception as e:
                     st.warning(f"Could not generate emoji pie chart: {e}")
@@ -95,7 +97,7 @@ if uploaded_file is not None:
              st.subheader("Most Used Emojis (Plotly)")
              with st.spinner("Analyzing emojis (helper)..."):
                  try:
-                     emoji_helper_fig = analyzer.emoji_helper('Overall', df)
+                     emoji_helper_fig = analyzer.emoji_helper('Overall', chat)
                      st.plotly_chart(emoji_helper_fig, use_container_width=True)
                  except Exception as e:
                      st.warning(f"Could not generate emoji helper chart: {e}")
@@ -105,19 +107,19 @@ if uploaded_file is not None:
         with st.expander("8. Timeline Analysis", expanded=False):
             st.subheader("Monthly Message Timeline")
             with st.spinner("Generating monthly timeline..."):
-                monthly_timeline_fig = analyzer.monthly_timeline('Overall', df)
+                monthly_timeline_fig = analyzer.monthly_timeline('Overall', chat)
             st.plotly_chart(monthly_timeline_fig, use_container_width=True)
 
             st.subheader("Daily Message Timeline")
             with st.spinner("Generating daily timeline..."):
-                daily_timeline_fig = analyzer.daily_timeline('Overall', df)
+                daily_timeline_fig = analyzer.daily_timeline('Overall', chat)
             st.plotly_chart(daily_timeline_fig, use_container_width=True)
 
         # 9. Activity Heatmap (Original - Returns DataFrame)
         with st.expander("9. Activity Heatmap (Table)", expanded=False):
             st.subheader("Activity Patterns (Day vs. Period)")
             with st.spinner("Generating activity heatmap data..."):
-                activity_heatmap_df = analyzer.activity_heatmap('Overall', df)
+                activity_heatmap_df = analyzer.activity_heatmap('Overall', chat)
             st.dataframe(activity_heatmap_df)
             # Optional: Plotting the heatmap requires seaborn
             try:
@@ -136,21 +138,21 @@ if uploaded_file is not None:
         # with st.expander("10. Weekly Activity Map (Plotly Heatmap)", expanded=False):
         #     st.subheader("Weekly Activity Pattern")
         #     with st.spinner("Generating weekly activity map..."):
-        #         week_activity_fig = analyzer.week_activity_map('Overall', df)
+        #         week_activity_fig = analyzer.week_activity_map('Overall', chat)
         #     st.plotly_chart(week_activity_fig, use_container_width=True)
 
         # 11. Month Activity Map (Bar Chart)
         with st.expander("11. Monthly Activity Map (Bar Chart)", expanded=False):
             st.subheader("Monthly Activity Pattern")
             with st.spinner("Generating monthly activity map..."):
-                month_activity_fig = analyzer.month_activity_map('Overall', df)
+                month_activity_fig = analyzer.month_activity_map('Overall', chat)
             st.plotly_chart(month_activity_fig, use_container_width=True)
 
         # 12. Busiest Hours Analysis (Returns Series)
         with st.expander("12. Busiest Hours Analysis", expanded=False):
             st.subheader("Message Count per Hour")
             with st.spinner("Analyzing busiest hours..."):
-                busiest_hours_series = analyzer.busiest_hours_analysis(df)
+                busiest_hours_series = analyzer.busiest_hours_analysis(chat)
                 busiest_hours_df = busiest_hours_series.reset_index()
                 busiest_hours_df.columns = ['Hour', 'Message Count']
             st.dataframe(busiest_hours_df)
@@ -167,7 +169,7 @@ if uploaded_file is not None:
         with st.expander("13. Sentiment Percentage Calculation", expanded=False):
             st.subheader("User Sentiment Percentages")
             with st.spinner("Calculating sentiment percentages..."):
-                sentiments, most_positive, most_negative = analyzer.calculate_sentiment_percentage('Overall', df)
+                sentiments, most_positive, most_negative = analyzer.calculate_sentiment_percentage('Overall', chat)
                 sentiment_list = []
                 for user, scores in sentiments.items():
                      sentiment_list.append({'User': user, 'Positive %': scores[0], 'Negative %': scores[1]})
@@ -191,7 +193,7 @@ if uploaded_file is not None:
         with st.expander("14. Sentiment Distribution and Trend", expanded=False):
             st.subheader("Overall Sentiment Analysis")
             with st.spinner("Analyzing sentiment distribution and trend..."):
-                dist_fig, trend_fig = analyzer.analyze_and_plot_sentiment('Overall', df)
+                dist_fig, trend_fig = analyzer.analyze_and_plot_sentiment('Overall', chat)
             st.plotly_chart(dist_fig, use_container_width=True)
             st.plotly_chart(trend_fig, use_container_width=True)
 
@@ -199,14 +201,14 @@ if uploaded_file is not None:
         with st.expander("15. Monthly Sentiment Trend", expanded=False):
             st.subheader("Sentiment Trend Over Months")
             with st.spinner("Calculating monthly sentiment trend..."):
-                monthly_sentiment_fig = analyzer.calculate_monthly_sentiment_trend(df)
+                monthly_sentiment_fig = analyzer.calculate_monthly_sentiment_trend(chat)
             st.plotly_chart(monthly_sentiment_fig, use_container_width=True)
 
         # 16. Message Count Aggregated Graph
         with st.expander("16. Message Count Distribution (Pie Chart)", expanded=False):
             st.subheader("Total Messages per User")
             with st.spinner("Aggregating message counts..."):
-                msg_count_fig, most_messages_winner = analyzer.message_count_aggregated_graph(df)
+                msg_count_fig, most_messages_winner = analyzer.message_count_aggregated_graph(chat)
             st.metric("User with Most Messages", most_messages_winner)
             st.plotly_chart(msg_count_fig, use_container_width=True)
 
@@ -214,7 +216,7 @@ if uploaded_file is not None:
         with st.expander("17. Conversation Starters (Pie Chart)", expanded=False):
             st.subheader("Who Starts Conversations Most Often?")
             with st.spinner("Analyzing conversation starters..."):
-                convo_starter_fig, most_frequent_starter = analyzer.conversation_starter_graph(df)
+                convo_starter_fig, most_frequent_starter = analyzer.conversation_starter_graph(chat)
             st.metric("Most Frequent Conversation Starter", most_frequent_starter)
             st.plotly_chart(convo_starter_fig, use_container_width=True)
 
@@ -222,7 +224,7 @@ if uploaded_file is not None:
         with st.expander("18. Weekly Average Conversation Size", expanded=False):
             st.subheader("Average Conversation Size Over Time")
             with st.spinner("Calculating conversation sizes..."):
-                convo_size_fig = analyzer.conversation_size_aggregated_graph(df)
+                convo_size_fig = analyzer.conversation_size_aggregated_graph(chat)
             st.plotly_chart(convo_size_fig, use_container_width=True)
 
         # 19. Calculate Average Late Reply Time
@@ -230,7 +232,7 @@ if uploaded_file is not None:
             st.subheader("Late Reply Analysis (Replies > 24 hours)")
             with st.spinner("Calculating late reply times..."):
                  try:
-                    late_reply_fig, avg_late_reply_df, overall_avg_late_reply = analyzer.calculate_average_late_reply_time(df, threshold_hours=24)
+                    late_reply_fig, avg_late_reply_df, overall_avg_late_reply = analyzer.calculate_average_late_reply_time(chat, threshold_hours=24)
                     st.metric("Overall Average Late Reply Time (hours)", f"{overall_avg_late_reply:.2f}")
                     st.dataframe(avg_late_reply_df)
                     st.pyplot(late_reply_fig)
@@ -243,7 +245,7 @@ if uploaded_file is not None:
             st.subheader("Longest Wait for a Reply")
             with st.spinner("Finding longest reply..."):
                 try:
-                    user_longest, time_longest, msg_longest, reply_original = analyzer.analyze_reply_patterns(df)
+                    user_longest, time_longest, msg_longest, reply_original = analyzer.analyze_reply_patterns(chat)
                     st.text(f"User with longest reply time: {user_longest}")
                     st.text(f"Reply took {time_longest:.2f} minutes")
                     with st.expander("Original Message"):
@@ -257,7 +259,7 @@ if uploaded_file is not None:
         with st.expander("21. Message Types Analysis", expanded=False):
             st.subheader("Distribution of Message Types")
             with st.spinner("Analyzing message types..."):
-                 message_types = analyzer.analyze_message_types('Overall', df)
+                 message_types = analyzer.analyze_message_types('Overall', chat)
                  message_types_df = pd.DataFrame(message_types.items(), columns=['Type', 'Count'])
             st.dataframe(message_types_df)
             # Optional: Create and show the chart
@@ -281,7 +283,7 @@ if uploaded_file is not None:
         with st.expander("22. Conversation Pattern Analysis", expanded=False):
             st.subheader("General Conversation Metrics")
             with st.spinner("Analyzing conversation patterns..."):
-                conversation_patterns = analyzer.analyze_conversation_patterns(df)
+                conversation_patterns = analyzer.analyze_conversation_patterns(chat)
             col1, col2, col3 = st.columns(3)
             col1.metric("Total Conversations", conversation_patterns['total_conversations'])
             col2.metric("Avg Length (Messages)", f"{conversation_patterns['avg_conversation_length']:.2f}")
@@ -317,7 +319,7 @@ if uploaded_file is not None:
             st.subheader("User Interaction Network")
             with st.spinner("Analyzing user interactions..."):
                 try:
-                    G, interactions = analyzer.analyze_user_interactions(df)
+                    G, interactions = analyzer.analyze_user_interactions(chat)
                     st.text(f"Number of users in interaction graph: {len(G.nodes())}")
                     st.text(f"Number of interactions (edges): {len(G.edges())}")
                     # Optional: Create and show graph
@@ -330,7 +332,7 @@ if uploaded_file is not None:
         with st.expander("24. Time Pattern Analysis", expanded=False):
             st.subheader("Detailed Activity Patterns")
             with st.spinner("Analyzing time patterns..."):
-                time_patterns = analyzer.analyze_time_patterns(df)
+                time_patterns = analyzer.analyze_time_patterns(chat)
 
             st.text("Hourly activity summary:")
             st.dataframe(time_patterns['hourly_activity'])
@@ -366,7 +368,7 @@ if uploaded_file is not None:
         with st.expander("25. Message Length Analysis", expanded=False):
             st.subheader("Message Length Statistics")
             with st.spinner("Analyzing message lengths..."):
-                 message_length = analyzer.analyze_message_length(df)
+                 message_length = analyzer.analyze_message_length(chat)
 
             col1, col2, col3 = st.columns(3)
             col1.metric("Average Length (Words)", f"{message_length['avg_length']:.2f}")
@@ -398,7 +400,7 @@ if uploaded_file is not None:
              st.subheader("Reply Response Times")
              with st.spinner("Analyzing response times..."):
                  try:
-                     response_times = analyzer.analyze_response_times(df)
+                     response_times = analyzer.analyze_response_times(chat)
                      col1, col2 = st.columns(2)
                      col1.metric("Average Response Time (Minutes)", f"{response_times.get('avg_response_time', 'N/A'):.2f}" if isinstance(response_times.get('avg_response_time'), (int, float)) else 'N/A')
                      col2.metric("Median Response Time (Minutes)", f"{response_times.get('median_response_time', 'N/A'):.2f}" if isinstance(response_times.get('median_response_time'), (int, float)) else 'N/A')
@@ -427,7 +429,7 @@ if uploaded_file is not None:
             num_topics = st.slider("Number of Topics", 2, 10, 3)
             num_words = st.slider("Number of Words per Topic", 3, 15, 5)
             with st.spinner(f"Running Topic Modeling (k={num_topics})..."):
-                topics = analyzer.analyze_topic_modeling(df, num_topics=num_topics, num_words=num_words)
+                topics = analyzer.analyze_topic_modeling(chat, num_topics=num_topics, num_words=num_words)
 
             if topics['success']:
                 st.text("Topics extracted:")
@@ -456,7 +458,7 @@ if uploaded_file is not None:
             st.subheader("Detailed Emoji Statistics")
             with st.spinner("Analyzing emoji usage..."):
                 try:
-                    emoji_usage = analyzer.analyze_emoji_usage(df)
+                    emoji_usage = analyzer.analyze_emoji_usage(chat)
                     col1, col2, col3 = st.columns(3)
                     col1.metric("Total Emojis Used", emoji_usage['total_emojis'])
                     col2.metric("Unique Emojis Used", emoji_usage['emoji_diversity'])
@@ -496,7 +498,7 @@ if uploaded_file is not None:
             st.subheader("Detailed Sentiment Analysis")
             with st.spinner("Analyzing sentiment trends..."):
                  try:
-                     sentiment_trends = analyzer.analyze_sentiment_trends(df)
+                     sentiment_trends = analyzer.analyze_sentiment_trends(chat)
                      
                      st.text("Sentiment distribution counts:")
                      sentiment_counts_df = pd.DataFrame(sentiment_trends['sentiment_counts'].items(), columns=['Sentiment', 'Count'])
@@ -533,7 +535,7 @@ if uploaded_file is not None:
             st.subheader("Detailed Word Usage Statistics")
             with st.spinner("Analyzing word usage..."):
                  try:
-                     word_usage = analyzer.analyze_word_usage(df)
+                     word_usage = analyzer.analyze_word_usage(chat)
                      col1, col2, col3 = st.columns(3)
                      col1.metric("Total Words (Filtered)", word_usage['total_words'])
                      col2.metric("Unique Words (Filtered)", word_usage['word_diversity'])
@@ -567,7 +569,7 @@ if uploaded_file is not None:
              st.subheader("Detailed Conversation Flow Metrics")
              with st.spinner("Analyzing conversation flow..."):
                  try:
-                     conversation_flow = analyzer.analyze_conversation_flow(df)
+                     conversation_flow = analyzer.analyze_conversation_flow(chat)
                      st.metric("Total Conversations Identified", conversation_flow['total_conversations'])
 
                      st.text("Conversation Statistics (Sample):")
@@ -605,7 +607,7 @@ if uploaded_file is not None:
             st.subheader("Analysis of Mood Changes within Conversations")
             with st.spinner("Analyzing mood shifts..."):
                 try:
-                    mood_shifts = analyzer.analyze_conversation_mood_shifts(df)
+                    mood_shifts = analyzer.analyze_conversation_mood_shifts(chat)
                     
                     if mood_shifts['mood_lifters']:
                         st.text("Top Mood Lifters (Users increasing positivity):")
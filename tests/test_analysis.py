@@ -0,0 +1,185 @@
+import io
+import os
+import contextlib
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+from whatsapp_reality import preprocess, analyzer, ChatAnalysis, SentimentCache, score_sentiment
+from whatsapp_reality import sentiment
+from whatsapp_reality.sentiment import label_sentiment
+from whatsapp_reality.synthetic import generate_chat
+
+
+class TestChatAnalysis(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = preprocess(generate_chat(messages=600, users=4, seed=5))
+        cls.user = cls.df['user'].value_counts().index[0]
+
+    def test_memoized(self):
+        chat = ChatAnalysis(self.df)
+        self.assertIs(chat.sentiment, chat.sentiment)
+        self.assertIs(chat.timeline, chat.timeline)
+        self.assertIs(chat.select(self.user), chat.select(self.user))
+        self.assertIs(ChatAnalysis.of(chat), chat)
+        self.assertIs(ChatAnalysis.of(chat, workers=1), chat)
+
+    def test_workers_apply_to_one_call(self):
+        chat = ChatAnalysis(self.df)
+        view = ChatAnalysis.of(chat, workers=2)
+        self.assertEqual((chat.workers, view.workers), (1, 2))
+        self.assertIs(view.sentiment, chat.sentiment)
+        self.assertEqual(len(chat.sentiment), len(self.df))
+        self.assertTrue(chat.timeline['date'].is_monotonic_increasing)
+        self.assertFalse((chat.member_timeline['user'] == 'group_notification').any())
+
+    def test_same_results_as_dataframe(self):
+        chat = ChatAnalysis(self.df)
+        for user in ('Overall', self.user):
+            self.assertEqual(analyzer.fetch_stats(user, chat), analyzer.fetch_stats(user, self.df))
+            self.assertEqual(analyzer.analyze_message_types(user, chat),
+                             analyzer.analyze_message_types(user, self.df))
+            self.assertEqual(analyzer.calculate_sentiment_percentage(user, chat),
+                             analyzer.calculate_sentiment_percentage(user, self.df))
+        self.assertEqual(analyzer.analyze_conversation_patterns(chat),
+                         analyzer.analyze_conversation_patterns(self.df))
+        self.assertEqual(analyzer.analyze_conversation_mood_shifts(chat)['mood_lifters'],
+                         analyzer.analyze_conversation_mood_shifts(self.df)['mood_lifters'])
+
+    def test_does_not_modify_dataframe(self):
+        df = self.df.copy()
+        columns = list(df.columns)
+        chat = ChatAnalysis(df)
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyzer.analyze_sentiment_trends(chat)
+            analyzer.analyze_emoji_usage(chat)
+            analyzer.analyze_conversation_compatibility(chat)
+            analyzer.calculate_monthly_sentiment_trend(chat)
+            analyzer.conversation_starter_graph(chat)
+            analyzer.analyze_reply_patterns(chat)
+            analyzer.analyze_message_length(chat)
+            analyzer.analyze_message_length(df.drop(columns='Message Length'))
+        self.assertEqual(list(df.columns), columns)
+
+    def test_previously_failing_analyses(self):
+        patterns = analyzer.analyze_user_activity_patterns(self.df)['user_patterns']
+        self.assertIn(self.user, patterns)
+        self.assertIsNotNone(patterns[self.user]['most_responds_to'])
+        personality = analyzer.analyze_personality(self.df)
+        self.assertIn(self.user, personality)
+        self.assertTrue(all(0 <= trait <= 100 for trait in personality[self.user].values()))
+
+
+class TestScoreSentiment(unittest.TestCase):
+    def test_scores(self):
+        messages = ['I love this!', 'ok', 'This is terrible', 'ok', float('nan'), 'I love this!']
+        scores = score_sentiment(messages)
+        sid = SentimentIntensityAnalyzer()
+        for column in ('pos', 'neg', 'neu', 'compound'):
+            self.assertEqual(scores[column].dtype, np.float32)
+            self.assertEqual(len(scores[column]), len(messages))
+            for i in (0, 1, 2):
+                self.assertAlmostEqual(scores[column][i], sid.polarity_scores(messages[i])[column], places=6)
+        self.assertEqual(scores['compound'][0], scores['compound'][5])
+        self.assertEqual((scores['neu'][4], scores['compound'][4]), (1.0, 0.0))
+        self.assertEqual(len(score_sentiment([])['compound']), 0)
+
+    def test_workers(self):
+        messages = generate_chat(messages=300, users=3, seed=2).splitlines()
+        serial = score_sentiment(messages)
+        parallel = score_sentiment(messages, workers=2, chunk_size=40)
+        for column in ('pos', 'neg', 'neu', 'compound'):
+            np.testing.assert_array_equal(parallel[column], serial[column])
+        df = preprocess('\n'.join(messages))
+        self.assertEqual(analyzer.analyze_sentiment_trends(df, workers=2)['sentiment_counts'],
+                         analyzer.analyze_sentiment_trends(df)['sentiment_counts'])
+        with self.assertRaises(ValueError):
+            score_sentiment(messages, chunk_size=0)
+
+    def test_labels(self):
+        compound = np.array([0.05, 0.0501, -0.05, -0.0501, 0.0], dtype=np.float32)
+        self.assertEqual(label_sentiment(compound).tolist(),
+                         ['Neutral', 'Positive', 'Neutral', 'Negative', 'Neutral'])
+
+
+class TestAnalyzeSentimentBatch(unittest.TestCase):
+    def test_matches_single_messages(self):
+        messages = ['I love it', 'This is bad', 'chair', 'I love it', 'Table', float('nan')]
+        labels, polarity = analyzer.analyze_sentiment_batch(messages, workers=1)
+        self.assertEqual(polarity.dtype, np.float32)
+        self.assertEqual(list(labels), ['Positive', 'Negative', 'Neutral', 'Positive', 'Neutral', 'Neutral'])
+        self.assertEqual([analyzer.analyze_sentiment(message) for message in messages[:5]], list(labels[:5]))
+        self.assertEqual(polarity[0], polarity[3])
+
+    def test_workers(self):
+        messages = generate_chat(messages=200, users=3, seed=4).splitlines()
+        labels, polarity = analyzer.analyze_sentiment_batch(messages, workers=1)
+        parallel_labels, parallel_polarity = analyzer.analyze_sentiment_batch(messages, workers=2, chunk_size=30)
+        np.testing.assert_array_equal(parallel_polarity, polarity)
+        self.assertEqual(list(parallel_labels), list(labels))
+
+
+class TestSentimentCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'sentiment.sqlite')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_only_new_texts_are_scored(self):
+        first = ['I love this!', 'ok', float('nan'), 'ok']
+        expected = score_sentiment(first + ['This is terrible'])
+        score_sentiment(first, cache=self.path)
+
+        scored = []
+        original = sentiment._score_texts
+        with mock.patch.object(sentiment, '_score_texts', lambda texts: scored.extend(texts) or original(texts)):
+            scores = score_sentiment(first + ['This is terrible'], cache=self.path)
+        self.assertEqual(scored, ['This is terrible'])
+        for column in ('pos', 'neg', 'neu', 'compound'):
+            np.testing.assert_array_equal(scores[column], expected[column])
+
+    def test_scorer_is_part_of_the_key(self):
+        with SentimentCache(self.path) as cache:
+            cache.put_many(['ok'], np.array([[0.5]]), ('other', '1'))
+            scores, found = cache.get_many(['ok', 'nope'], ('other', '1'), 1)
+            self.assertEqual(found.tolist(), [True, False])
+            self.assertEqual(scores[0, 0], 0.5)
+            self.assertFalse(cache.get_many(['ok'], ('other', '2'), 1)[1][0])
+
+    def test_evicts_least_recently_used(self):
+        with SentimentCache(self.path, max_entries=2) as cache:
+            cache.put_many(['a'], np.zeros((1, 1)), ('other', '1'))
+            cache._connection.execute('UPDATE scores SET last_used = 0')
+            cache.put_many(['b', 'c'], np.ones((2, 1)), ('other', '1'))
+            self.assertEqual(len(cache), 2)
+            self.assertEqual(cache.get_many(['a', 'b', 'c'], ('other', '1'), 1)[1].tolist(), [False, True, True])
+
+    def test_evicts_below_the_limit(self):
+        with SentimentCache(self.path, max_entries=10) as cache:
+            for i in range(10):
+                cache.put_many([str(i)], np.zeros((1, 1)), ('other', '1'))
+                cache._connection.execute('UPDATE scores SET last_used = ? WHERE last_used > ?', (i, 10))
+            self.assertEqual(len(cache), 10)
+            cache.put_many(['10'], np.zeros((1, 1)), ('other', '1'))
+            self.assertEqual(len(cache), 9)
+            self.assertEqual(cache.get_many(['0', '1', '2', '10'], ('other', '1'), 1)[1].tolist(),
+                             [False, False, True, True])
+
+    def test_lexicon_is_part_of_the_key(self):
+        score_sentiment(['chair'], cache=self.path)
+        edited = SentimentIntensityAnalyzer()
+        edited.lexicon_file += '\nchair\t2.0\t0.5\t[2, 2]'
+        edited.lexicon = edited.make_lex_dict()
+        with mock.patch.object(sentiment, '_analyzer', edited), mock.patch.object(sentiment, '_scorer', None):
+            scores = score_sentiment(['chair'], cache=self.path)
+        self.assertGreater(scores['compound'][0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
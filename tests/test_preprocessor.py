@@ -0,0 +1,507 @@
+import codecs
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+import unittest
+import zipfile
+from unittest import mock
+
+import pandas as pd
+
+from whatsapp_reality import (preprocess, preprocess_stream, preprocess_file, preprocess_zip,
+                              preprocess_many, append, detect_format, register_format,
+                              registered_formats, user_indicators, ChatFormat, PreprocessProfile)
+from whatsapp_reality import cache, preprocessor
+from whatsapp_reality.preprocessor import ANDROID_24HR, IOS_12HR
+
+ANDROID_CHAT = """1/12/23, 10:00 - Messages and calls are end-to-end encrypted.
+1/12/23, 10:00 - Alice: Hello
+1/12/23, 10:01 - Bob: Hi there
+how are you?
+1/12/23, 10:05 - Alice: Fine 😂
+1/12/23, 13:30 - Bob: <Media omitted>
+1/13/23, 09:00 - Alice: Morning
+1/13/23, 09:02 - Alice: Anyone?
+1/13/23, 09:10 - Bob: Yes
+"""
+
+IOS_CHAT = """[03/10/24, 5:09:19 PM] Group: Messages and calls are end-to-end encrypted.
+[03/10/24, 5:29:23 PM] Alice: Hello
+[03/10/24, 5:30:01 PM] Bob: Hi
+there
+[03/10/24, 9:10:00 PM] Alice: Later
+"""
+
+def concat_chunks(chunks):
+    df = pd.concat(chunks)
+    df['user'] = df['user'].astype('category')
+    return df
+
+
+CORE_COLUMNS = ['date', 'user', 'message', 'Message Length', 'Conv code',
+                'Conv change', 'Is reply', 'Sender change', 'Reply Time']
+
+
+class TestPreprocess(unittest.TestCase):
+    def test_android_users_and_messages(self):
+        df = preprocess(ANDROID_CHAT)
+        self.assertEqual(len(df), 8)
+        self.assertEqual(df['user'].iloc[0], 'group_notification')
+        self.assertEqual(df['message'].iloc[2], 'Hi there\nhow are you?\n')
+        self.assertEqual(df['Conv code'].dtype, 'int32')
+        self.assertEqual(df['Conv code'].tolist(), [0, 0, 0, 0, 1, 2, 2, 2])
+        self.assertEqual(df['Is reply'].tolist(), [False, True, True, True, False, False, False, True])
+
+    def test_reply_times(self):
+        df = preprocess(ANDROID_CHAT)
+        self.assertEqual(df['Reply Time'].dtype, 'float32')
+        self.assertEqual(df['Reply Time'].tolist(), [0, 0, 1, 4, 0, 0, 0, 8])
+
+    def test_colons_inside_messages(self):
+        df = preprocess("1/12/23, 10:00 - Alice: note: bring snacks\n"
+                        "1/12/23, 10:01 - : not a user\n")
+        self.assertEqual(df['user'].tolist(), ['Alice', 'group_notification'])
+        self.assertEqual(df['message'].tolist(), [' note bring snacks\n', ': not a user\n'])
+        self.assertEqual(df['Message Length'].tolist(), [3, 4])
+
+    def test_unicode_spaces(self):
+        df = preprocess("1/12/23, 10:00 - Alice:\xa0hi\n"
+                        "1/12/23, 10:01 - Bob: a b\xa0c d\n"
+                        "1/12/23, 10:02 - Bob: note: bring snacks\n")
+        self.assertEqual(df['user'].tolist(), ['Alice', 'Bob', 'Bob'])
+        self.assertEqual(df['message'].tolist(), ['hi\n', 'a b\xa0c d\n', ' note bring snacks\n'])
+        self.assertEqual(df['Message Length'].tolist(), [1, 4, 3])
+
+    def test_user_encoding(self):
+        df = preprocess(ANDROID_CHAT)
+        self.assertIsInstance(df['user'].dtype, pd.CategoricalDtype)
+        self.assertNotIn('Alice', df.columns)
+
+        wide = preprocess(ANDROID_CHAT, user_columns=True)
+        self.assertEqual(wide['Alice'].tolist(), [0, 1, 0, 1, 0, 1, 1, 0])
+        self.assertEqual(wide['Bob_mlength'].tolist(), [0, 0, 5, 0, 2, 0, 0, 1])
+
+    def test_compact_dtypes(self):
+        df = preprocess(ANDROID_CHAT)
+        self.assertEqual(df['Message Length'].dtype, 'int32')
+        self.assertEqual(df['year'].dtype, 'int16')
+        for column in ('month_num', 'day', 'hour', 'minute'):
+            self.assertEqual(df[column].dtype, 'int8')
+        for column in ('month', 'day_name', 'period'):
+            self.assertTrue(df[column].cat.ordered)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['only_date']))
+        self.assertEqual(df['day_name'].iloc[0], 'Thursday')
+        self.assertEqual(df['period'].iloc[4], '13-14')
+
+    def test_period_labels(self):
+        data = "1/12/23, 00:05 - Alice: a\n1/12/23, 09:30 - Bob: b\n1/12/23, 23:59 - Alice: c\n"
+        for compact in (True, False):
+            df = preprocess(data, compact=compact)
+            self.assertEqual(df['period'].tolist(), ['00-1', '9-10', '23-00'])
+
+    def test_legacy_dtypes(self):
+        compact = preprocess(ANDROID_CHAT)
+        legacy = preprocess(ANDROID_CHAT, compact=False)
+        self.assertEqual(list(legacy.columns), list(compact.columns))
+        self.assertNotIsInstance(legacy['month'].dtype, pd.CategoricalDtype)
+        self.assertEqual(legacy['only_date'].tolist(), compact['only_date'].dt.date.tolist())
+        for column in ('year', 'hour', 'day_name', 'period', 'Message Length'):
+            self.assertEqual(legacy[column].tolist(), compact[column].tolist())
+
+    def test_user_indicators(self):
+        wide = preprocess(ANDROID_CHAT, user_columns=True)
+        df = preprocess(ANDROID_CHAT)
+        indicators = user_indicators(df)
+        lengths = user_indicators(df, message_length=True)
+        for user in df['user'].cat.categories:
+            self.assertIsInstance(indicators[user].dtype, pd.SparseDtype)
+            self.assertEqual(indicators[user].tolist(), wide[user].tolist())
+            self.assertEqual(lengths[user].tolist(), wide[f"{user}_mlength"].tolist())
+
+    def test_ios_format(self):
+        df = preprocess(IOS_CHAT)
+        self.assertEqual(len(df), 4)
+        self.assertEqual(df['message'].iloc[2], 'Hi\nthere\n')
+
+    def test_workers_match_serial(self):
+        data = ANDROID_CHAT * 3
+        expected = preprocess(data)
+        for workers in (2, 5):
+            pd.testing.assert_frame_equal(preprocess(data, workers=workers), expected)
+
+    def test_import_does_not_load_analyses(self):
+        code = ("import sys, whatsapp_reality.preprocessor; "
+                "print(sorted({name.split('.')[0] for name in sys.modules} & "
+                "{'sklearn', 'nltk', 'textblob', 'plotly', 'matplotlib'}))")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run([sys.executable, '-c', code], cwd=root, check=True,
+                                stdout=subprocess.PIPE, universal_newlines=True).stdout
+        self.assertEqual(output.strip(), '[]')
+
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            preprocess("just some text\nwithout timestamps\n")
+
+
+class TestPreprocessBytes(unittest.TestCase):
+    def test_bytes_match_text(self):
+        expected = preprocess(ANDROID_CHAT)
+        data = ANDROID_CHAT.encode('utf-8')
+        for buffer in (data, bytearray(data), memoryview(data), memoryview(b'xx' + data)[2:],
+                       codecs.BOM_UTF8 + data, data.replace(b'\n', b'\r\n')):
+            pd.testing.assert_frame_equal(preprocess(buffer), expected)
+
+    def test_detects_utf16_and_utf32(self):
+        expected = preprocess(IOS_CHAT)
+        for encoding in ('utf-16', 'utf-16-le', 'utf-16-be', 'utf-32'):
+            data = IOS_CHAT.replace('\n', '\r\n').encode(encoding)
+            self.assertEqual(detect_format(data).name, 'ios_12hr')
+            pd.testing.assert_frame_equal(preprocess(data), expected)
+
+    def test_malformed_bytes_are_replaced(self):
+        data = ANDROID_CHAT.encode('utf-8').replace(b'Hello', b'Hel\xff\xfelo')
+        df = preprocess(data)
+        self.assertEqual(len(df), 8)
+        self.assertEqual(df['message'].iloc[1], 'Hel��lo\n')
+
+
+class TestCalendarAccessor(unittest.TestCase):
+    def test_lazy_fields_match_columns(self):
+        expected = preprocess(ANDROID_CHAT)
+        df = preprocess(ANDROID_CHAT, calendar_columns=False)
+        self.assertNotIn('hour', df.columns)
+        for field in ('only_date', 'year', 'month', 'day_name', 'hour', 'period'):
+            pd.testing.assert_series_equal(df.wa.field(field), expected[field])
+        self.assertIs(df.wa.hour, df.wa.hour)
+
+    def test_recomputed_after_in_place_edits(self):
+        df = preprocess(ANDROID_CHAT, calendar_columns=False)
+        hour = df.wa.hour
+        df.loc[df.index[1], 'date'] = pd.Timestamp('2023-01-12 05:00')
+        self.assertEqual(df.wa.hour.iloc[1], 5)
+        df.iloc[2, df.columns.get_loc('date')] = pd.Timestamp('2023-01-12 06:00')
+        self.assertEqual(df.wa.hour.iloc[2], 6)
+        df.drop(df.index[:3], inplace=True)
+        self.assertEqual(df.wa.hour.tolist(), hour.iloc[3:].tolist())
+        self.assertTrue(df.wa.hour.index.equals(df.index))
+
+    def test_reads_existing_columns(self):
+        df = preprocess(ANDROID_CHAT, compact=False)
+        self.assertIs(df.wa.field('month').values, df['month'].values)
+
+    def test_unknown_field(self):
+        with self.assertRaises(KeyError):
+            preprocess(ANDROID_CHAT).wa.field('message')
+
+
+class TestDetectFormat(unittest.TestCase):
+    def test_detects_from_prefix(self):
+        self.assertEqual(detect_format(ANDROID_CHAT).name, ANDROID_24HR.name)
+        self.assertEqual(detect_format(IOS_CHAT.splitlines(keepends=True)).name, IOS_12HR.name)
+
+    def test_only_inspects_leading_lines(self):
+        data = "header line\n" * 5 + ANDROID_CHAT
+        with self.assertRaises(ValueError):
+            detect_format(data, max_lines=5)
+        self.assertEqual(detect_format(data, max_lines=6).name, ANDROID_24HR.name)
+
+    def test_split_returns_timestamps_and_bodies(self):
+        df = IOS_12HR.split(IOS_CHAT)
+        self.assertEqual(df['message_date'].iloc[0], '03/10/24, 5:09:19 PM')
+        self.assertEqual(df['user_message'].iloc[2], ' Bob: Hi\nthere\n')
+
+    def test_cached_format_is_reused(self):
+        chat_format = detect_format(ANDROID_CHAT)
+        pd.testing.assert_frame_equal(preprocess(ANDROID_CHAT, chat_format=chat_format),
+                                      preprocess(ANDROID_CHAT))
+
+    def test_narrow_no_break_space(self):
+        data = "[3/10/24, 5:09:19\u202fPM] Alice: Hello\n[3/10/24, 9:10:00\u202fPM] Bob: Hi\n"
+        for export in (data, data.encode('utf-8')):
+            self.assertEqual(detect_format(export).name, IOS_12HR.name)
+            df = preprocess(export)
+            self.assertEqual(df['hour'].tolist(), [17, 21])
+            self.assertEqual(df['user'].str.strip().tolist(), ['Alice', 'Bob'])
+
+    def test_dotted_dates(self):
+        df = preprocess("24.12.23, 21:05 - Alice: Frohe Weihnachten\n25.12.23, 08:30 - Bob: Danke\n")
+        self.assertEqual(detect_format("24.12.23, 21:05 - Alice: Hi\n").datetime_format, '%d.%m.%y, %H:%M')
+        self.assertEqual(df['date'].dt.strftime('%Y-%m-%d %H:%M').tolist(), ['2023-12-24 21:05', '2023-12-25 08:30'])
+
+    def test_register_format(self):
+        dashed = ChatFormat('android_24hr_dashed', r'(?P<timestamp>\d{1,2}-\d{1,2}-\d{2,4},\s\d{1,2}:\d{2})\s*-\s*',
+                            '%H:%M', date_separator='-')
+        data = "12-1-23, 10:00 - Alice: Hello\n13-1-23, 11:00 - Bob: Hi\n"
+        with self.assertRaises(ValueError):
+            detect_format(data)
+
+        self.assertIs(register_format(dashed), dashed)
+        self.addCleanup(preprocessor._FORMATS.remove, dashed)
+        self.assertIn(dashed, registered_formats())
+        self.assertEqual(detect_format(data).name, 'android_24hr_dashed')
+        self.assertEqual(preprocess(data)['day'].tolist(), [12, 13])
+        with self.assertRaises(ValueError):
+            register_format(ChatFormat('android_24hr_dashed', dashed.regex.pattern, '%H:%M'))
+
+
+class TestDateParsing(unittest.TestCase):
+    def test_date_order_from_sample(self):
+        self.assertEqual(detect_format(ANDROID_CHAT).datetime_format, '%m/%d/%y, %H:%M')
+        day_first = "13/01/2023, 10:00 - Alice: Hi\n"
+        self.assertEqual(detect_format(day_first).datetime_format, '%d/%m/%Y, %H:%M')
+
+    def test_undecided_order_settled_from_whole_export(self):
+        data = "01/02/2023, 10:00 - Alice: Hi\n" * 3 + "25/02/2023, 11:00 - Bob: Hey\n"
+        chat_format = detect_format(data, max_lines=3)
+        self.assertIsNone(chat_format.day_first)
+        df = preprocess(data, chat_format=chat_format)
+        self.assertEqual(df['date'].dt.month.tolist(), [2, 2, 2, 2])
+
+    def test_fallback_for_unexpected_timestamps(self):
+        data = "1/12/23, 10:00 - Alice: Hi\n1/12/2023, 10:05 - Bob: Hey\n"
+        df = preprocess(data)
+        self.assertEqual(df['date'].tolist(), [pd.Timestamp('2023-01-12 10:00'),
+                                               pd.Timestamp('2023-01-12 10:05')])
+
+
+    def test_day_first_fallback(self):
+        data = "13/01/23, 10:00 - Alice: Hi\n05/01/2023, 10:05 - Bob: Hey\n"
+        df = preprocess(data)
+        self.assertEqual(df['date'].tolist(), [pd.Timestamp('2023-01-13 10:00'),
+                                               pd.Timestamp('2023-01-05 10:05')])
+        chat_format = detect_format(data)
+        self.assertEqual(preprocessor._parse_timestamp('05/01/2023, 10:05', chat_format),
+                         pd.Timestamp('2023-01-05 10:05'))
+
+
+class TestPreprocessProfile(unittest.TestCase):
+    STAGES = ['detect_format', 'split', 'parse_dates', 'split_users', 'conversations',
+              'replies', 'reply_times', 'user_columns', 'calendar_columns']
+
+    def test_records_every_stage(self):
+        profile = PreprocessProfile()
+        df = preprocess(ANDROID_CHAT, profile=profile)
+        self.assertEqual([record['stage'] for record in profile.stages], self.STAGES)
+        split = profile.stages[1]
+        self.assertIsNone(split['rows_in'])
+        self.assertEqual(split['rows_out'], len(df))
+        for record in profile.stages:
+            self.assertGreaterEqual(record['seconds'], 0)
+            self.assertGreaterEqual(record['peak_bytes'], 0)
+        self.assertAlmostEqual(profile.total_seconds, sum(r['seconds'] for r in profile.stages))
+
+    def test_leaves_callers_tracing_alone(self):
+        tracemalloc.start()
+        try:
+            peak = bytearray(20 * 1024 * 1024)
+            del peak
+            preprocess(ANDROID_CHAT, profile=PreprocessProfile())
+            self.assertTrue(tracemalloc.is_tracing())
+            self.assertGreaterEqual(tracemalloc.get_traced_memory()[1], 20 * 1024 * 1024)
+        finally:
+            tracemalloc.stop()
+
+    def test_custom_hook_without_memory_tracing(self):
+        received = []
+
+        class Hook(PreprocessProfile):
+            def on_stage(self, record):
+                received.append(record)
+
+        hook = Hook(trace_memory=False)
+        preprocess(ANDROID_CHAT, profile=hook)
+        self.assertEqual(hook.stages, [])
+        self.assertEqual([record['stage'] for record in received], self.STAGES)
+        self.assertTrue(all(record['peak_bytes'] is None for record in received))
+
+
+class TestPreprocessStream(unittest.TestCase):
+    def test_chunks_match_preprocess(self):
+        expected = preprocess(ANDROID_CHAT)[CORE_COLUMNS]
+        for chunk_size in (1, 3, 100):
+            chunks = list(preprocess_stream(io.StringIO(ANDROID_CHAT), chunk_size=chunk_size))
+            self.assertEqual(len(chunks), -(-len(expected) // chunk_size))
+            pd.testing.assert_frame_equal(concat_chunks(chunks)[CORE_COLUMNS], expected)
+
+    def test_accepts_string_and_lines(self):
+        expected = preprocess(IOS_CHAT)[CORE_COLUMNS]
+        for source in (IOS_CHAT, IOS_CHAT.splitlines(keepends=True)):
+            result = concat_chunks(preprocess_stream(source, chunk_size=2))
+            pd.testing.assert_frame_equal(result[CORE_COLUMNS], expected)
+
+    def test_date_order_settled_after_first_chunks(self):
+        data = ("01/02/2023, 10:00 - Alice: Hi\n02/02/2023, 10:30 - Bob: Hey\n" * 3
+                + "25/02/2023, 11:00 - Alice: Later\n")
+        chat_format = detect_format(data, max_lines=3)
+        self.assertIsNone(chat_format.day_first)
+        expected = preprocess(data)[CORE_COLUMNS]
+        chunks = list(preprocess_stream(data, chunk_size=2, chat_format=chat_format))
+        self.assertEqual(len(chunks), 4)
+        result = concat_chunks(chunks)[CORE_COLUMNS]
+        pd.testing.assert_frame_equal(result, expected)
+        self.assertEqual(result['date'].dt.month.tolist(), [2] * 7)
+
+
+class TestAppend(unittest.TestCase):
+    def test_matches_full_preprocess(self):
+        lines = ANDROID_CHAT.splitlines(keepends=True)
+        expected = preprocess(ANDROID_CHAT)
+        for cut in (2, 5, 7):
+            existing = preprocess(''.join(lines[:cut]))
+            for export in (ANDROID_CHAT, ANDROID_CHAT.encode('utf-8')):
+                pd.testing.assert_frame_equal(append(existing, export), expected)
+
+    def test_repeated_last_message(self):
+        data = "1/12/23, 10:00 - Alice: ok\n" * 3 + "1/12/23, 10:01 - Bob: fine\n"
+        existing = preprocess("1/12/23, 10:00 - Alice: ok\n" * 2)
+        pd.testing.assert_frame_equal(append(existing, data), preprocess(data))
+
+    def test_no_new_messages(self):
+        existing = preprocess(ANDROID_CHAT)
+        self.assertIs(append(existing, ANDROID_CHAT), existing)
+
+    def test_user_columns(self):
+        expected = preprocess(ANDROID_CHAT, user_columns=True)
+        existing = preprocess(''.join(ANDROID_CHAT.splitlines(keepends=True)[:2]), user_columns=True)
+        self.assertNotIn('Bob', existing.columns)
+        result = append(existing, ANDROID_CHAT)
+        for column in ('Alice', 'Bob', 'Bob_mlength'):
+            self.assertEqual(result[column].tolist(), expected[column].tolist())
+
+    def test_missing_watermark(self):
+        existing = preprocess("1/12/23, 10:00 - Carol: Hi\n")
+        with self.assertRaises(ValueError):
+            append(existing, ANDROID_CHAT)
+
+
+class TestPreprocessFile(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.txt')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def write(self, data, encoding='utf-8'):
+        with open(self.path, 'w', encoding=encoding, newline='') as file:
+            file.write(data)
+
+    def test_matches_preprocess(self):
+        self.write(ANDROID_CHAT)
+        expected = preprocess(ANDROID_CHAT)
+        for mmap in (True, False):
+            pd.testing.assert_frame_equal(preprocess_file(self.path, mmap=mmap), expected)
+
+    def test_crlf_and_narrow_no_break_space(self):
+        data = IOS_CHAT.replace('\n', '\r\n').replace(' PM]', '\u202fPM]')
+        self.write(data)
+        with open(self.path, encoding='utf-8') as file:
+            expected = preprocess(file.read())
+        pd.testing.assert_frame_equal(preprocess_file(self.path), expected)
+        self.assertEqual(expected['message'].iloc[2], 'Hi\nthere\n')
+
+    def test_other_encodings(self):
+        self.write(ANDROID_CHAT, encoding='utf-16')
+        pd.testing.assert_frame_equal(preprocess_file(self.path, encoding='utf-16'),
+                                      preprocess(ANDROID_CHAT))
+
+
+class TestPreprocessZip(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.zip')
+        os.close(handle)
+        with zipfile.ZipFile(self.path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('_chat.txt', IOS_CHAT)
+            archive.writestr('00000003-PHOTO-2024-10-03-17-30-01.jpg', b'\xff' * 64)
+            archive.writestr('__MACOSX/._chat.txt', b'')
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_reads_chat_and_indexes_media(self):
+        df, media = preprocess_zip(self.path)
+        pd.testing.assert_frame_equal(df, preprocess(IOS_CHAT))
+        self.assertEqual(media['name'].tolist(), ['00000003-PHOTO-2024-10-03-17-30-01.jpg'])
+        self.assertEqual(media['extension'].tolist(), ['jpg'])
+        self.assertEqual(media['size'].tolist(), [64])
+
+    def test_missing_chat_text(self):
+        with zipfile.ZipFile(self.path, 'w') as archive:
+            archive.writestr('photo.jpg', b'')
+        with self.assertRaises(ValueError):
+            preprocess_zip(self.path)
+
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+class TestPreprocessCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_hit_returns_same_frame(self):
+        expected = preprocess(ANDROID_CHAT)
+        first = preprocess(ANDROID_CHAT, cache_dir=self.directory.name)
+        second = preprocess(ANDROID_CHAT, cache_dir=self.directory.name)
+        pd.testing.assert_frame_equal(first, expected)
+        pd.testing.assert_frame_equal(second, expected)
+        self.assertEqual(len(os.listdir(self.directory.name)), 1)
+
+    def test_options_are_part_of_the_key(self):
+        preprocess(ANDROID_CHAT, cache_dir=self.directory.name)
+        wide = preprocess(ANDROID_CHAT, user_columns=True, cache_dir=self.directory.name)
+        self.assertIn('Alice', wide.columns)
+        self.assertEqual(len(os.listdir(self.directory.name)), 2)
+
+    def test_schema_version_is_part_of_the_key(self):
+        key = cache.cache_key(ANDROID_CHAT, compact=True)
+        with mock.patch.object(cache, 'SCHEMA_VERSION', cache.SCHEMA_VERSION + 1):
+            self.assertNotEqual(cache.cache_key(ANDROID_CHAT, compact=True), key)
+
+    def test_evicts_least_recently_used(self):
+        preprocess(ANDROID_CHAT, cache_dir=self.directory.name)
+        entry, = os.listdir(self.directory.name)
+        os.utime(os.path.join(self.directory.name, entry), (0, 0))
+        cache.evict(self.directory.name, max_bytes=0)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+class TestPreprocessMany(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.paths = {}
+        for name, data in (('android', ANDROID_CHAT), ('ios', IOS_CHAT), ('broken', 'no messages\n')):
+            self.paths[name] = os.path.join(self.directory.name, f"{name}.txt")
+            with open(self.paths[name], 'w', encoding='utf-8') as file:
+                file.write(data)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_concatenates_chats_and_collects_errors(self):
+        for workers in (1, 2):
+            df, errors, stats = preprocess_many(self.paths, workers=workers)
+            self.assertIsInstance(df['chat_id'].dtype, pd.CategoricalDtype)
+            self.assertEqual(df['chat_id'].value_counts()[['android', 'ios']].tolist(), [8, 4])
+            self.assertEqual(list(errors), ['broken'])
+            self.assertTrue(errors['broken'].startswith('ValueError'))
+            self.assertEqual((stats['chats'], stats['failed'], stats['messages']), (2, 1, 12))
+
+    def test_paths_are_default_chat_ids(self):
+        df, errors, _ = preprocess_many([self.paths['ios']], workers=1)
+        self.assertEqual(df['chat_id'].unique().tolist(), [self.paths['ios']])
+        self.assertEqual(errors, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from whatsapp_reality import preprocess, detect_format
+from whatsapp_reality.synthetic import FORMATS, generate_chat, generate_chat_lines
+
+
+class TestGenerateChat(unittest.TestCase):
+    def test_every_format_parses(self):
+        for chat_format in FORMATS:
+            data = generate_chat(messages=500, users=12, chat_format=chat_format, seed=1)
+            self.assertEqual(detect_format(data).name, chat_format)
+            df = preprocess(data)
+            self.assertEqual(len(df), 500)
+            self.assertIn('group_notification', df['user'].cat.categories)
+            self.assertLessEqual(df['user'].nunique(), 13)
+
+    def test_content_mix(self):
+        df = preprocess(generate_chat(messages=2000, users=4))
+        messages = df['message']
+        self.assertTrue(messages.str.contains('<Media omitted>').any())
+        self.assertTrue(messages.str.contains('https://').any())
+        self.assertTrue(messages.str.contains('\n.', regex=True).any())
+        self.assertTrue(messages.str.contains('😂|👍|🔥', regex=True).any())
+
+    def test_deterministic(self):
+        self.assertEqual(generate_chat(messages=300, seed=7), generate_chat(messages=300, seed=7))
+        self.assertNotEqual(generate_chat(messages=300, seed=7), generate_chat(messages=300, seed=8))
+        self.assertEqual(''.join(generate_chat_lines(messages=300, seed=7)), generate_chat(messages=300, seed=7))
+
+    def test_day_first(self):
+        day_first = preprocess(generate_chat(messages=3000, users=3, day_first=True))
+        month_first = preprocess(generate_chat(messages=3000, users=3))
+        self.assertEqual(day_first['date'].tolist(), month_first['date'].tolist())
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            generate_chat(chat_format='symbian')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,5 +4,27 @@ WhatsApp Reality - A Python library for analyzing WhatsApp chat exports
 
 __version__ = "0.1.0"
 
-from .analyzer import *
-from .preprocessor import preprocess 
\ No newline at end of file
+import importlib
+
+from .preprocessor import preprocess, preprocess_stream, preprocess_file, preprocess_zip, preprocess_many, append, detect_format, register_format, registered_formats, ChatFormat, user_indicators
+from .accessor import ChatAccessor
+from .cache import SentimentCache
+from .profiling import PreprocessProfile
+
+# The analyses depend on sklearn, nltk and plotting libraries, which take
+# seconds to import. They are imported on first use, so that importing the
+# preprocessor, e.g. in a preprocessing worker process, stays fast.
+_LAZY_MODULES = ('analyzer', 'analysis', 'sentiment')
+_LAZY_NAMES = {'ChatAnalysis': 'analysis', 'score_sentiment': 'sentiment'}
+
+def __getattr__(name: str):
+    """Helper function to import the analysis modules, and the names exported from them, on first use."""
+    if name in _LAZY_MODULES:
+        return importlib.import_module(f'.{name}', __name__)
+    if name in _LAZY_NAMES:
+        return getattr(importlib.import_module(f'.{_LAZY_NAMES[name]}', __name__), name)
+    if not name.startswith('_'):
+        analyzer = importlib.import_module('.analyzer', __name__)
+        if name in analyzer.__all__:
+            return getattr(analyzer, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
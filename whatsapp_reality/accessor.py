@@ -0,0 +1,139 @@
+"""
+Lazily computed calendar fields of preprocessed WhatsApp chat DataFrames.
+
+Importing the package registers a ``wa`` accessor on pandas DataFrames, so
+that ``df.wa.hour`` returns the hour of every message whether or not the
+frame was preprocessed with its time-based columns.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Tuple
+
+from .preprocessor import CALENDAR_FIELDS, _calendar_field
+
+@pd.api.extensions.register_dataframe_accessor('wa')
+class ChatAccessor:
+    """
+    Calendar fields of a preprocessed chat, computed on first access.
+
+    A field is read from the column of the same name when the frame has one.
+    Otherwise it is computed from the ``date`` column (or a datetime index)
+    with the dtypes of ``preprocess(..., compact=True)``, and memoized on
+    the frame. The memoized fields are recomputed once the index or the
+    ``date`` column changes, e.g. after ``df.drop(..., inplace=True)`` or
+    ``df.loc[...] = ...``. Without copy-on-write (pandas < 3 without
+    ``pd.options.mode.copy_on_write``), writes into ``date`` may happen in
+    place and go unnoticed; call ``clear`` after them.
+
+    Example:
+        >>> df = preprocess(chat_data, calendar_columns=False)
+        >>> df.wa.hour.value_counts()
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._df = df
+        # pandas creates a new accessor on every attribute access, so the
+        # memoized fields are kept on the frame itself, with the index and
+        # dates they were computed from. Holding on to the dates makes
+        # copy-on-write copy them before any write, so a write is seen as a
+        # change of their memory.
+        source = (df.index, df['date'] if 'date' in df.columns else None)
+        memo = df.__dict__.get('_wa_fields')
+        if memo is None or not _same_source(memo[0], source):
+            memo = df.__dict__['_wa_fields'] = (source, {})
+        self._fields: Dict[str, pd.Series] = memo[1]
+
+    def clear(self) -> None:
+        """Forget the memoized fields, so that they are computed again on next access."""
+        self._fields.clear()
+
+    def field(self, name: str) -> pd.Series:
+        """
+        Get a calendar field by name.
+
+        Args:
+            name: One of ``CALENDAR_FIELDS``
+
+        Returns:
+            pd.Series: The field, aligned with the rows of the frame
+
+        Raises:
+            KeyError: If ``name`` is not a calendar field
+        """
+        if name not in CALENDAR_FIELDS:
+            raise KeyError(f"Unknown calendar field: {name!r}")
+        if name in self._df.columns:
+            return self._df[name]
+        if name not in self._fields:
+            values = _calendar_field(self._dates(), name)
+            if isinstance(values, pd.Series):
+                values = values.values
+            self._fields[name] = pd.Series(values, index=self._df.index, name=name)
+        return self._fields[name]
+
+    @property
+    def only_date(self) -> pd.Series:
+        """Day of each message, as a datetime at midnight."""
+        return self.field('only_date')
+
+    @property
+    def year(self) -> pd.Series:
+        """Year of each message."""
+        return self.field('year')
+
+    @property
+    def month_num(self) -> pd.Series:
+        """Month of each message, from 1 to 12."""
+        return self.field('month_num')
+
+    @property
+    def month(self) -> pd.Series:
+        """Month name of each message."""
+        return self.field('month')
+
+    @property
+    def day(self) -> pd.Series:
+        """Day of the month of each message."""
+        return self.field('day')
+
+    @property
+    def day_name(self) -> pd.Series:
+        """Weekday name of each message."""
+        return self.field('day_name')
+
+    @property
+    def hour(self) -> pd.Series:
+        """Hour of each message."""
+        return self.field('hour')
+
+    @property
+    def minute(self) -> pd.Series:
+        """Minute of each message."""
+        return self.field('minute')
+
+    @property
+    def period(self) -> pd.Series:
+        """Hour-long period of each message, such as ``'13-14'``."""
+        return self.field('period')
+
+    def _dates(self) -> pd.Series:
+        """Helper function to get the message dates as a datetime Series."""
+        if 'date' in self._df.columns:
+            dates = self._df['date']
+        else:
+            dates = self._df.index.to_series()
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates)
+        return dates
+
+def _same_source(old: Tuple[pd.Index, Optional[pd.Series]], new: Tuple[pd.Index, Optional[pd.Series]]) -> bool:
+    """Helper function to check that memoized fields were computed from the current index and dates."""
+    (old_index, old_dates), (new_index, new_dates) = old, new
+    if old_index is not new_index:
+        return False
+    if old_dates is None or new_dates is None:
+        return old_dates is new_dates
+    return len(old_dates) == len(new_dates) and np.shares_memory(old_dates.values, new_dates.values)
+
+__all__ = ['ChatAccessor']
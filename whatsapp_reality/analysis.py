@@ -0,0 +1,251 @@
+"""
+Shared intermediates of WhatsApp chat analyses.
+
+Wrap a preprocessed DataFrame in a ``ChatAnalysis`` and pass it to the
+``analyzer`` functions in place of the DataFrame. The intermediates those
+functions have in common, such as the date-sorted message sequence, the
+conversation segmentation, sentiment scores and per-message tokens, emojis
+and links, are then computed once, on first use, and shared by every call.
+"""
+
+import copy
+import functools
+import os
+import re
+from typing import Any, Callable, Dict, Optional, Union
+
+import emoji
+import numpy as np
+import pandas as pd
+from urlextract import URLExtract
+
+from .cache import SentimentCache
+from .sentiment import score_sentiment
+
+extract = URLExtract()
+
+# Gap between two messages, in minutes, after which a new conversation starts
+CONVERSATION_GAP = 60
+
+# Messages standing in for media that was left out of the export
+_MEDIA = '<Media omitted>|image omitted|video omitted'
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+
+def _memoized(method: Callable[['ChatAnalysis'], Any]) -> property:
+    """Helper function to turn a method into a property computed once per ``ChatAnalysis``."""
+    name = method.__name__
+
+    @functools.wraps(method)
+    def getter(self):
+        if name not in self._memo:
+            self._memo[name] = method(self)
+        return self._memo[name]
+
+    return property(getter)
+
+class ChatAnalysis:
+    """
+    A preprocessed chat with the intermediates of its analyses, each computed once on first use.
+
+    Every ``analyzer`` function accepts a ``ChatAnalysis`` wherever it takes
+    the preprocessed DataFrame, so a dashboard that runs many analyses over
+    one chat scores, tokenizes and segments its messages only once. The
+    intermediates are memoized for the lifetime of the object and are not
+    updated if ``df`` is modified afterwards; wrap the modified frame in a new
+    ``ChatAnalysis`` instead.
+
+    Series and frames aligned with the messages (``words``, ``emojis``,
+    ``sentiment``, ...) share the index of ``df``. ``timeline`` and
+    ``member_timeline`` are sorted by date instead, and ``order`` and
+    ``member_order`` map their rows back to the rows of ``df``.
+
+    Args:
+        df: DataFrame returned by ``preprocess``
+        workers: Number of processes to score sentiment with, see ``score_sentiment``
+        sentiment_cache: A ``SentimentCache``, or the path of its database, to
+            look sentiment scores up in before scoring, see ``score_sentiment``
+
+    Example:
+        >>> chat = ChatAnalysis(preprocess(chat_data))
+        >>> messages, words, media, links = analyzer.fetch_stats('Overall', chat)
+        >>> trends = analyzer.analyze_sentiment_trends(chat)
+        >>> shifts = analyzer.analyze_conversation_mood_shifts(chat)  # reuses the sentiment scores
+    """
+
+    def __init__(self, df: pd.DataFrame, workers: Optional[int] = 1,
+                 sentiment_cache: Optional[Union[SentimentCache, str, os.PathLike]] = None):
+        self.df = df
+        self.workers = workers
+        self.sentiment_cache = sentiment_cache
+        self._memo: Dict[Any, Any] = {}
+
+    @classmethod
+    def of(cls, data: Union[pd.DataFrame, 'ChatAnalysis'], workers: Optional[int] = None) -> 'ChatAnalysis':
+        """
+        Get the analysis of a chat, reusing ``data`` if it already is one.
+
+        Args:
+            data: A preprocessed DataFrame or a ``ChatAnalysis``
+            workers: Number of processes to score sentiment with, if given.
+                For an existing analysis it only applies to the returned
+                object, which shares the intermediates of ``data`` but leaves
+                its setting unchanged.
+
+        Returns:
+            ChatAnalysis: ``data`` itself, or a new analysis of it
+        """
+        if not isinstance(data, cls):
+            return cls(data, 1 if workers is None else workers)
+        if workers is None or workers == data.workers:
+            return data
+        # A shallow copy shares the memo, so intermediates computed with it are kept
+        view = copy.copy(data)
+        view.workers = workers
+        return view
+
+    def rows(self, selected_user: str = 'Overall') -> Optional[np.ndarray]:
+        """
+        Get the positions of a user's messages in ``df``.
+
+        Args:
+            selected_user: The user, or 'Overall' for all users
+
+        Returns:
+            np.ndarray: The positions, or None for 'Overall'
+        """
+        if selected_user == 'Overall':
+            return None
+        return self.user_rows.get(selected_user, np.array([], dtype=np.intp))
+
+    def select(self, selected_user: str = 'Overall',
+               values: Optional[Union[pd.DataFrame, pd.Series]] = None) -> Union[pd.DataFrame, pd.Series]:
+        """
+        Restrict ``df``, or values aligned with it, to a user's messages.
+
+        The restricted frames are memoized too, so that the calendar fields of
+        the ``df.wa`` accessor are computed once per user. Treat them as read-only.
+
+        Args:
+            selected_user: The user, or 'Overall' for all users
+            values: Series or DataFrame aligned with ``df``, such as ``words``.
+                Defaults to ``df`` itself.
+
+        Returns:
+            The rows of the user's messages
+        """
+        rows = self.rows(selected_user)
+        if values is not None:
+            return values if rows is None else values.iloc[rows]
+        if rows is None:
+            return self.df
+        key = ('select', selected_user)
+        if key not in self._memo:
+            self._memo[key] = self.df.iloc[rows]
+        return self._memo[key]
+
+    @_memoized
+    def user_rows(self) -> Dict[str, np.ndarray]:
+        """Positions of each user's messages in ``df``."""
+        return {user: rows for user, rows in self.df.groupby('user', observed=True).indices.items()}
+
+    @_memoized
+    def order(self) -> np.ndarray:
+        """Positions in ``df`` of the messages sorted by date, ties kept in their original order."""
+        dates = self.df['date'] if 'date' in self.df.columns else self.df.index.to_series()
+        return np.argsort(pd.to_datetime(dates).values, kind='stable')
+
+    @_memoized
+    def member_order(self) -> np.ndarray:
+        """Positions in ``df`` of the messages sent by users, sorted by date."""
+        users = self.df['user'].values.take(self.order)
+        return self.order[users != 'group_notification']
+
+    @_memoized
+    def timeline(self) -> pd.DataFrame:
+        """
+        All messages sorted by date, with the columns that relate each message to the one before.
+
+        Besides ``date``, ``user`` and ``message``, it has ``time_diff`` (minutes
+        since the previous message), ``new_conversation`` (whether the gap
+        exceeds ``CONVERSATION_GAP``), ``conversation_id``, ``prev_user`` and
+        ``is_response`` (whether the previous message is from someone else).
+        """
+        return _sequence(self._messages().take(self.order))
+
+    @_memoized
+    def member_timeline(self) -> pd.DataFrame:
+        """Same as ``timeline``, leaving out group notifications before relating the messages."""
+        return _sequence(self._messages().take(self.member_order))
+
+    @_memoized
+    def is_media(self) -> pd.Series:
+        """Whether each message is a placeholder for omitted media."""
+        return self.df['message'].str.contains(_MEDIA, na=False)
+
+    @_memoized
+    def words(self) -> pd.Series:
+        """Lowercased words of each message, split on whitespace."""
+        return self._per_message(lambda message: message.lower().split())
+
+    @_memoized
+    def clean_words(self) -> pd.Series:
+        """Lowercased words of each message, with punctuation removed."""
+        return self._per_message(lambda message: _PUNCTUATION.sub('', message.lower()).split())
+
+    @_memoized
+    def emojis(self) -> pd.Series:
+        """Emoji characters of each message, in order."""
+        return self._per_message(lambda message: [c for c in message if emoji.is_emoji(c)])
+
+    @_memoized
+    def urls(self) -> pd.Series:
+        """Links found in each message."""
+        return self._per_message(extract.find_urls)
+
+    @_memoized
+    def sentiment(self) -> pd.DataFrame:
+        """
+        VADER scores of each message, in the float32 columns ``pos``, ``neg``, ``neu`` and ``compound``.
+
+        Each distinct text is scored once, across ``workers`` processes, unless
+        found in ``sentiment_cache``, see ``score_sentiment``.
+        """
+        scores = score_sentiment(self.df['message'], workers=self.workers, cache=self.sentiment_cache)
+        return pd.DataFrame(scores, index=self.df.index)
+
+    def _messages(self) -> pd.DataFrame:
+        """Helper function to get the date, user and message columns of ``df`` with a positional index."""
+        df = self.df
+        if 'date' not in df.columns:
+            df = df.reset_index()
+        return df[['date', 'user', 'message']].reset_index(drop=True)
+
+    def _per_message(self, func: Callable[[str], Any]) -> pd.Series:
+        """Helper function to apply a function once per distinct message text, aligned with ``df``."""
+        codes, uniques = pd.factorize(self.df['message'])
+        values = np.empty(len(uniques), dtype=object)
+        for i, message in enumerate(uniques):
+            values[i] = func(message)
+        return pd.Series(values.take(codes), index=self.df.index, name='message')
+
+# A preprocessed chat, as accepted by the ``analyzer`` functions
+ChatData = Union[pd.DataFrame, ChatAnalysis]
+
+def _sequence(messages: pd.DataFrame) -> pd.DataFrame:
+    """Helper function to relate each message of a date-sorted frame to the one before it."""
+    messages = messages.reset_index(drop=True)
+    if not pd.api.types.is_datetime64_any_dtype(messages['date']):
+        messages['date'] = pd.to_datetime(messages['date'])
+    time_diff = messages['date'].diff().dt.total_seconds() / 60
+    new_conversation = time_diff > CONVERSATION_GAP
+    prev_user = messages['user'].shift(1)
+    return messages.assign(
+        time_diff=time_diff,
+        new_conversation=new_conversation,
+        conversation_id=new_conversation.cumsum(),
+        prev_user=prev_user,
+        is_response=(messages['user'] != prev_user) & ~prev_user.isna(),
+    )
+
+__all__ = ['ChatAnalysis', 'ChatData', 'CONVERSATION_GAP']
@@ -7,25 +7,23 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from wordcloud import WordCloud, STOPWORDS
-from textblob import TextBlob
-from urlextract import URLExtract
-import emoji
 import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
 from collections import Counter
 import os
-from sklearn.preprocessing import OrdinalEncoder
-from typing import List, Tuple, Dict, Union, Optional
+from typing import Iterable, List, Tuple, Dict, Union, Optional
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime, timedelta
-import re
 from sklearn.feature_extraction.text import CountVectorizer
 from sklearn.decomposition import LatentDirichletAllocation
 import networkx as nx
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 import random # Added import
+import itertools
+
+from .analysis import ChatAnalysis, ChatData, extract
+from .sentiment import label_sentiment, score_polarity
 
 # Download required NLTK data
 try:
@@ -34,45 +32,38 @@ except LookupError:
     nltk.download('vader_lexicon')
     nltk.download('punkt')
 
-extract = URLExtract()
-
-def fetch_stats(selected_user: str, df: pd.DataFrame) -> tuple:
+def fetch_stats(selected_user: str, df: ChatData) -> tuple:
     """
     Fetch basic statistics from the chat data.
     
     Args:
         selected_user: The user to analyze or 'Overall' for all users
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         
     Returns:
         tuple: (num_messages, num_words, num_media_messages, num_links)
     """
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    chat = ChatAnalysis.of(df)
+    df = chat.select(selected_user)
 
     num_messages = df.shape[0]
-    words = []
-    for message in df['message']:
-        words.extend(message.split())
-
-    num_media_messages = df[df['message'].str.contains('<Media omitted>|video omitted|image omitted')].shape[0]
+    num_words = sum(len(words) for words in chat.select(selected_user, chat.words))
+    num_media_messages = int(chat.select(selected_user, chat.is_media).sum())
+    num_links = sum(len(links) for links in chat.select(selected_user, chat.urls))
 
-    links = []
-    for message in df['message']:
-        links.extend(extract.find_urls(message))
+    return num_messages, num_words, num_media_messages, num_links
 
-    return num_messages, len(words), num_media_messages, len(links)
-
-def most_busy_users(df: pd.DataFrame) -> Tuple[go.Figure, pd.DataFrame]:
+def most_busy_users(df: ChatData) -> Tuple[go.Figure, pd.DataFrame]:
     """
     Analyze user activity to find the most active users.
     
     Args:
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         
     Returns:
         tuple: (plotly figure, DataFrame with user percentages)
     """
+    df = ChatAnalysis.of(df).df
     x = df['user'].value_counts().head()
     df_percent = round((df['user'].value_counts() / df.shape[0]) * 100, 2).reset_index().rename(
         columns={'index': 'name', 'user': 'percent'})
@@ -84,13 +75,13 @@ def most_busy_users(df: pd.DataFrame) -> Tuple[go.Figure, pd.DataFrame]:
 
     return fig, df_percent
 
-def create_wordcloud(selected_user: str, df: pd.DataFrame, stop_words_file: Optional[str] = None) -> WordCloud:
+def create_wordcloud(selected_user: str, df: ChatData, stop_words_file: Optional[str] = None) -> WordCloud:
     """
     Create a word cloud from chat messages.
     
     Args:
         selected_user: The user to analyze or 'Overall' for all users
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         stop_words_file: Path to file containing stop words
         
     Returns:
@@ -102,27 +93,23 @@ def create_wordcloud(selected_user: str, df: pd.DataFrame, stop_words_file: Opti
     else:
         stop_words = set(STOPWORDS)
 
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
-
-    temp = df[df['user'] != 'group_notification']
-    temp = temp[temp['message'] != '<Media omitted>\n']
-
-    def remove_stop_words(message):
-        return " ".join(word for word in message.lower().split() if word not in stop_words)
+    chat = ChatAnalysis.of(df)
+    df = chat.select(selected_user)
+    keep = ((df['user'] != 'group_notification') & (df['message'] != '<Media omitted>\n')).values
 
     wc = WordCloud(width=500, height=500, min_font_size=10, background_color='white')
-    temp['message'] = temp['message'].apply(remove_stop_words)
-    df_wc = wc.generate(temp['message'].str.cat(sep=" "))
+    text = " ".join(" ".join(word for word in words if word not in stop_words)
+                    for words in chat.select(selected_user, chat.words)[keep])
+    df_wc = wc.generate(text)
     return df_wc
 
-def most_common_words(selected_user: str, df: pd.DataFrame, stop_words_file: Optional[str] = None) -> go.Figure:
+def most_common_words(selected_user: str, df: ChatData, stop_words_file: Optional[str] = None) -> go.Figure:
     """
     Analyze and visualize the most common words in chat messages.
     
     Args:
         selected_user: The user to analyze or 'Overall' for all users
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         stop_words_file: Path to file containing stop words
         
     Returns:
@@ -134,17 +121,12 @@ def most_common_words(selected_user: str, df: pd.DataFrame, stop_words_file: Opt
     else:
         stop_words = set(STOPWORDS)
 
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
-
-    temp = df[df['user'] != 'group_notification']
-    temp = temp[temp['message'] != '<Media omitted>\n']
+    chat = ChatAnalysis.of(df)
+    df = chat.select(selected_user)
+    keep = ((df['user'] != 'group_notification') & (df['message'] != '<Media omitted>\n')).values
 
-    words = []
-    for message in temp['message']:
-        for word in message.lower().split():
-            if word not in stop_words:
-                words.append(word)
+    words = [word for message_words in chat.select(selected_user, chat.words)[keep]
+             for word in message_words if word not in stop_words]
 
     most_common_df = pd.DataFrame(Counter(words).most_common(25), columns=['Word', 'Frequency'])
     fig = px.bar(most_common_df, x='Word', y='Frequency')
@@ -154,44 +136,39 @@ def most_common_words(selected_user: str, df: pd.DataFrame, stop_words_file: Opt
     
     return fig
 
-def emoji_analysis(selected_user: str, df: pd.DataFrame) -> go.Figure:
+def emoji_analysis(selected_user: str, df: ChatData) -> go.Figure:
     """
     Analyze and visualize emoji usage in chat messages.
     
     Args:
         selected_user: The user to analyze or 'Overall' for all users
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         
     Returns:
         plotly Figure object
     """
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
-
-    emojis = []
-    for message in df['message']:
-        emojis.extend([c for c in message if emoji.is_emoji(c)])
+    chat = ChatAnalysis.of(df)
+    emojis = list(itertools.chain.from_iterable(chat.select(selected_user, chat.emojis)))
 
     emoji_df = pd.DataFrame(Counter(emojis).most_common(len(Counter(emojis))))
     
     fig = px.pie(emoji_df.head(8), values=1, names=0, title="Emoji Distribution")
     return fig
 
-def monthly_timeline(selected_user: str, df: pd.DataFrame) -> go.Figure:
+def monthly_timeline(selected_user: str, df: ChatData) -> go.Figure:
     """
     Create a monthly timeline visualization of chat activity.
     
     Args:
         selected_user: The user to analyze or 'Overall' for all users
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         
     Returns:
         plotly Figure object
     """
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    df = ChatAnalysis.of(df).select(selected_user)
 
-    timeline = df.groupby(['year', 'month_num', 'month']).count()['message'].reset_index()
+    timeline = df.groupby([df.wa.year, df.wa.month_num, df.wa.month], observed=True)['message'].count().reset_index()
     time = [f"{timeline['month'][i]}-{timeline['year'][i]}" for i in range(timeline.shape[0])]
     timeline['time'] = time
 
@@ -201,21 +178,20 @@ def monthly_timeline(selected_user: str, df: pd.DataFrame) -> go.Figure:
     
     return fig
 
-def daily_timeline(selected_user: str, df: pd.DataFrame) -> go.Figure:
+def daily_timeline(selected_user: str, df: ChatData) -> go.Figure:
     """
     Create a daily timeline visualization of chat activity.
     
     Args:
         selected_user: The user to analyze or 'Overall' for all users
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         
     Returns:
         plotly Figure object
     """
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    df = ChatAnalysis.of(df).select(selected_user)
 
-    daily_timeline = df.groupby('only_date').count()['message'].reset_index()
+    daily_timeline = df.groupby(df.wa.only_date)['message'].count().reset_index()
     
     fig = go.Figure()
     fig.add_trace(go.Scatter(x=daily_timeline['only_date'], y=daily_timeline['message'], 
@@ -224,22 +200,21 @@ def daily_timeline(selected_user: str, df: pd.DataFrame) -> go.Figure:
     
     return fig
 
-def activity_heatmap(selected_user: str, df: pd.DataFrame) -> pd.DataFrame:
+def activity_heatmap(selected_user: str, df: ChatData) -> pd.DataFrame:
     """
     Create an activity heatmap showing message patterns by day and hour.
     
     Args:
         selected_user: The user to analyze or 'Overall' for all users
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         
     Returns:
         DataFrame containing the heatmap data
     """
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    df = ChatAnalysis.of(df).select(selected_user)
 
-    return df.pivot_table(index='day_name', columns='period', 
-                         values='message', aggfunc='count').fillna(0)
+    return df.pivot_table(index=df.wa.day_name, columns=df.wa.period,
+                         values='message', aggfunc='count', observed=True).fillna(0)
 
 def analyze_sentiment(message: str) -> str:
     """
@@ -251,48 +226,65 @@ def analyze_sentiment(message: str) -> str:
     Returns:
         str: 'Positive', 'Negative', or 'Neutral'
     """
-    blob = TextBlob(message)
-    sentiment_score = blob.sentiment.polarity
-    if sentiment_score > 0:
-        return "Positive"
-    elif sentiment_score < 0:
-        return "Negative"
-    else:
-        return "Neutral"
+    labels, _ = analyze_sentiment_batch([message], workers=1)
+    return labels[0]
+
+def analyze_sentiment_batch(messages: Iterable[str], workers: Optional[int] = None,
+                            chunk_size: int = 20000) -> Tuple[pd.Categorical, np.ndarray]:
+    """
+    Analyze the sentiment of many messages at once, by their TextBlob polarity.
+    
+    Each distinct text is scored once, so repeated messages cost nothing extra.
+    Values that are not strings, such as NaN, are labelled 'Neutral'.
+    
+    Args:
+        messages: The text messages to analyze, e.g. the 'message' column of a preprocessed DataFrame
+        workers: Number of processes to score with (None for the number of CPUs).
+            Batches of no more than ``chunk_size`` distinct texts are scored in
+            the current process.
+        chunk_size: Number of distinct texts sent to a process at a time
+        
+    Returns:
+        tuple: (Categorical of 'Positive', 'Negative' or 'Neutral' labels,
+                float32 array of polarities from -1 to 1), in the order of ``messages``
+    
+    Example:
+        >>> labels, polarity = analyze_sentiment_batch(df['message'])
+        >>> labels.value_counts()
+    """
+    polarity = score_polarity(messages, workers, chunk_size)
+    # Codes 0, 1 and 2 for negative, zero and positive polarity
+    codes = np.sign(polarity).astype(np.int8) + 1
+    labels = pd.Categorical.from_codes(codes, categories=['Negative', 'Neutral', 'Positive'])
+    return labels, polarity
 
-def calculate_sentiment_percentage(selected_users: Union[str, List[str]], df: pd.DataFrame) -> Tuple[Dict, str, str]:
+def calculate_sentiment_percentage(selected_users: Union[str, List[str]], df: ChatData) -> Tuple[Dict, str, str]:
     """
     Calculate sentiment percentages for users.
     
     Args:
         selected_users: User(s) to analyze ('Overall' or list of usernames)
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         
     Returns:
         tuple: (sentiment_percentages_dict, most_positive_user, most_negative_user)
     """
-    if selected_users == 'Overall':
-        selected_df = df
-    else:
+    chat = ChatAnalysis.of(df)
+    df = chat.df
+    scores = chat.sentiment['compound']
+    if selected_users != 'Overall':
         if isinstance(selected_users, str):
             selected_users = [selected_users]
-        selected_df = df[df['user'].isin(selected_users)]
+        selected = df['user'].isin(selected_users).values
+        df, scores = df[selected], scores[selected]
 
-    sid = SentimentIntensityAnalyzer()
     user_sentiment_percentages = {}
 
-    for user, messages in selected_df.groupby('user')['message']:
-        positive_count = 0
-        negative_count = 0
-
-        for message in messages:
-            sentiment_score = sid.polarity_scores(message)['compound']
-            if sentiment_score > 0:
-                positive_count += 1
-            elif sentiment_score < 0:
-                negative_count += 1
+    for user, user_scores in scores.groupby(df['user'].values, observed=True):
+        positive_count = (user_scores > 0).sum()
+        negative_count = (user_scores < 0).sum()
 
-        total_messages = len(messages)
+        total_messages = len(user_scores)
         positivity_percentage = (positive_count / total_messages) * 100
         negativity_percentage = (negative_count / total_messages) * 100
 
@@ -303,27 +295,19 @@ def calculate_sentiment_percentage(selected_users: Union[str, List[str]], df: pd
 
     return user_sentiment_percentages, most_positive_user, most_negative_user
 
-def analyze_reply_patterns(df: pd.DataFrame) -> Tuple[str, float, str, str]:
+def analyze_reply_patterns(df: ChatData) -> Tuple[str, float, str, str]:
     """
     Analyze reply patterns in the chat.
     
     Args:
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         
     Returns:
         tuple: (user with longest reply time, max reply time in minutes, message, reply)
     """
-    user_encoder = OrdinalEncoder()
-    df['User Code'] = user_encoder.fit_transform(df['user'].values.reshape(-1, 1))
-
-    message_senders = df['User Code'].values
-    sender_changed = (np.roll(message_senders, 1) - message_senders).reshape(1, -1)[0] != 0
-    sender_changed[0] = False
-    is_reply = sender_changed & ~df['user'].eq('group_notification')
-
-    df['Is Reply'] = is_reply
+    df = ChatAnalysis.of(df).df
 
-    max_reply_times = df.groupby('user')['Reply Time'].max()
+    max_reply_times = df.groupby('user', observed=True)['Reply Time'].max()
     max_reply_user = max_reply_times.idxmax()
     max_reply_time = max_reply_times.max()
 
@@ -333,19 +317,19 @@ def analyze_reply_patterns(df: pd.DataFrame) -> Tuple[str, float, str, str]:
 
     return max_reply_user, max_reply_time, max_reply_message, reply
 
-def analyze_message_types(selected_user: str, df: pd.DataFrame) -> Dict[str, int]:
+def analyze_message_types(selected_user: str, df: ChatData) -> Dict[str, int]:
     """
     Analyze different types of messages in the chat.
     
     Args:
         selected_user: The user to analyze or 'Overall' for all users
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         
     Returns:
         Dict[str, int]: Dictionary with counts of different message types
     """
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    chat = ChatAnalysis.of(df)
+    df = chat.select(selected_user)
     
     message_types = {
         'Text': 0,
@@ -360,8 +344,8 @@ def analyze_message_types(selected_user: str, df: pd.DataFrame) -> Dict[str, int
     }
     
     # Count different message types
-    message_types['Media'] = df[df['message'].str.contains('<Media omitted>|image omitted|video omitted', na=False)].shape[0]
-    message_types['Links'] = df[df['message'].apply(lambda x: bool(extract.find_urls(x)))].shape[0]
+    message_types['Media'] = int(chat.select(selected_user, chat.is_media).sum())
+    message_types['Links'] = sum(bool(links) for links in chat.select(selected_user, chat.urls))
     message_types['Deleted'] = df[df['message'].str.contains('This message was deleted', na=False)].shape[0]
     message_types['Stickers'] = df[df['message'].str.contains('sticker omitted', na=False)].shape[0]
     message_types['Documents'] = df[df['message'].str.contains('document omitted', na=False)].shape[0]
@@ -403,69 +387,41 @@ def create_message_types_chart(message_types: Dict[str, int]) -> go.Figure:
     
     return fig
 
-def analyze_conversation_patterns(df: pd.DataFrame) -> Dict[str, Union[float, int]]:
+def analyze_conversation_patterns(df: ChatData) -> Dict[str, Union[float, int]]:
     """
     Analyze conversation patterns in the chat.
     
     Args:
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         
     Returns:
         Dict: Dictionary with conversation pattern metrics
     """
-    # Create a copy and handle potential date/index ambiguity *before* sorting
-    df_copy = df.copy() # Create copy first
-    if 'date' in df_copy.index.names:
-        if 'date' in df_copy.columns:
-            # Ambiguous: Reset only the 'date' level from the index, discarding it
-            df_copy = df_copy.reset_index(level='date', drop=True)
-            # Reset any remaining index levels to columns if they exist
-            if not isinstance(df_copy.index, pd.RangeIndex): 
-                 df_copy = df_copy.reset_index()
-        else:
-             # Only in index: Reset all levels, making 'date' a column
-             df_copy = df_copy.reset_index()
-
-    # Ensure the dataframe is sorted by date
-    # Convert to datetime *just in case* before sorting
-    if not pd.api.types.is_datetime64_any_dtype(df_copy['date']):
-        df_copy['date'] = pd.to_datetime(df_copy['date'])
-    df_copy = df_copy.sort_values('date') # Apply sort_values to df_copy
-    
-    # Calculate time differences between consecutive messages
-    df_copy['time_diff'] = df_copy['date'].diff().dt.total_seconds() / 60  # in minutes
-    
-    # Identify conversation starts (messages after a long gap)
-    conversation_threshold = 60  # 60 minutes gap defines a new conversation
-    # Use .fillna(True) for the first row's comparison to handle NaT diff
-    df_copy['new_conversation'] = (df_copy['time_diff'] > conversation_threshold).fillna(True)
+    # Messages sorted by date, split into conversations at gaps of over an hour
+    timeline = ChatAnalysis.of(df).timeline
     
     # Count total conversations
-    total_conversations = df_copy['new_conversation'].sum()
+    total_conversations = timeline['new_conversation'].sum()
     
     # Calculate average conversation length (in messages)
-    df_copy['conversation_id'] = df_copy['new_conversation'].cumsum()
-    conversation_lengths = df_copy.groupby('conversation_id').size()
+    conversation_lengths = timeline.groupby('conversation_id').size()
     # Avoid division by zero if no conversations found
     avg_conversation_length = conversation_lengths.mean() if not conversation_lengths.empty else 0
     
-    # Calculate average conversation duration (in minutes)
-    conversation_durations = []
-    for conv_id, group in df_copy.groupby('conversation_id'): # Use df_copy
-        if len(group) > 1:
-            duration = (group['date'].max() - group['date'].min()).total_seconds() / 60
-            conversation_durations.append(duration)
+    # Calculate average conversation duration (in minutes), over conversations of more than one message
+    conversation_dates = timeline.groupby('conversation_id')['date']
+    conversation_durations = ((conversation_dates.max() - conversation_dates.min()).dt.total_seconds() / 60)[conversation_lengths > 1]
     
-    avg_conversation_duration = np.mean(conversation_durations) if conversation_durations else 0
+    avg_conversation_duration = np.mean(conversation_durations.values) if len(conversation_durations) else 0
     
     # Calculate average messages per user per conversation
-    messages_per_user = df_copy.groupby(['conversation_id', 'user']).size() # Use df_copy
+    messages_per_user = timeline.groupby(['conversation_id', 'user'], observed=True).size()
     avg_messages_per_user = messages_per_user.mean() if not messages_per_user.empty else 0
     
     # Calculate conversation initiators
     # Ensure we only count actual users, not group notifications
-    starters_df = df_copy[(df_copy['new_conversation']) & (df_copy['user'] != 'group_notification')] # Use df_copy
-    conversation_starters = starters_df.groupby('user').size()
+    starters_df = timeline[(timeline['new_conversation']) & (timeline['user'] != 'group_notification')]
+    conversation_starters = starters_df.groupby('user', observed=True).size()
     
     # Prepare results
     results = {
@@ -527,21 +483,18 @@ def create_conversation_patterns_chart(conversation_patterns: Dict[str, Union[fl
     
     return figures
 
-def analyze_user_interactions(df: pd.DataFrame) -> Tuple[nx.Graph, Dict[str, Dict[str, int]]]:
+def analyze_user_interactions(df: ChatData) -> Tuple[nx.Graph, Dict[str, Dict[str, int]]]:
     """
     Analyze interactions between users in the chat.
     
     Args:
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         
     Returns:
         Tuple[nx.Graph, Dict]: Network graph and interaction counts dictionary
     """
-    # Ensure the dataframe is sorted by date
-    df = df.sort_index()
-    
-    # Filter out group notifications
-    df = df[df['user'] != 'group_notification']
+    # Messages sorted by date, without group notifications
+    df = ChatAnalysis.of(df).member_timeline
     
     # Create a graph
     G = nx.Graph()
@@ -651,53 +604,52 @@ def create_user_interaction_graph(G: nx.Graph) -> go.Figure:
     
     return fig
 
-def analyze_time_patterns(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+def analyze_time_patterns(df: ChatData) -> Dict[str, pd.DataFrame]:
     """
     Analyze messaging patterns across different time periods.
     
     Args:
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         
     Returns:
         Dict[str, pd.DataFrame]: Dictionary with time-based analysis dataframes
     """
-    # Ensure the dataframe has the necessary time columns
-    if 'hour' not in df.columns or 'day_name' not in df.columns:
-        df['hour'] = df['date'].dt.hour
-        df['day_name'] = df['date'].dt.day_name()
+    df = ChatAnalysis.of(df).df
+    hour = df.wa.hour
+    day_name = df.wa.day_name
     
     # Hourly activity
-    hourly_activity = df.groupby('hour').size().reset_index(name='message_count')
+    hourly_activity = df.groupby(hour).size().reset_index(name='message_count')
     
     # Daily activity
-    daily_activity = df.groupby('day_name').size().reset_index(name='message_count')
+    daily_activity = df.groupby(day_name, observed=True).size().reset_index(name='message_count')
     # Ensure days are in correct order
     day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
     daily_activity['day_order'] = daily_activity['day_name'].apply(lambda x: day_order.index(x))
     daily_activity = daily_activity.sort_values('day_order').drop('day_order', axis=1)
     
     # Monthly activity
-    df['month'] = df['date'].dt.month_name()
-    df['month_num'] = df['date'].dt.month
-    monthly_activity = df.groupby(['month', 'month_num']).size().reset_index(name='message_count')
+    monthly_activity = df.groupby([df.wa.month, df.wa.month_num], observed=True).size().reset_index(name='message_count')
     monthly_activity = monthly_activity.sort_values('month_num')
     
     # User activity by hour
     user_hourly = df.pivot_table(
-        index='hour', 
+        index=hour, 
         columns='user', 
         values='message', 
         aggfunc='count', 
-        fill_value=0
+        fill_value=0,
+        observed=True
     ).reset_index()
     
     # User activity by day
     user_daily = df.pivot_table(
-        index='day_name', 
+        index=day_name, 
         columns='user', 
         values='message', 
         aggfunc='count', 
-        fill_value=0
+        fill_value=0,
+        observed=True
     ).reset_index()
     
     # Create day order column for sorting
@@ -712,19 +664,21 @@ def analyze_time_patterns(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
         'user_daily': user_daily
     }
 
-def analyze_message_length(df: pd.DataFrame) -> Dict[str, Union[pd.DataFrame, float]]:
+def analyze_message_length(df: ChatData) -> Dict[str, Union[pd.DataFrame, float]]:
     """
     Analyze message length patterns in the chat.
     
     Args:
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         
     Returns:
         Dict: Dictionary with message length analysis data
     """
-    # Calculate message length (word count)
+    df = ChatAnalysis.of(df).df
+
+    # Calculate message length (word count), on a new frame rather than the caller's
     if 'Message Length' not in df.columns:
-        df['Message Length'] = df['message'].apply(lambda x: len(x.split()))
+        df = df.assign(**{'Message Length': df['message'].apply(lambda x: len(x.split()))})
     
     # Overall statistics
     avg_length = df['Message Length'].mean()
@@ -732,8 +686,8 @@ def analyze_message_length(df: pd.DataFrame) -> Dict[str, Union[pd.DataFrame, fl
     min_length = df['Message Length'].min()
     
     # Message length by user
-    user_avg_length = df.groupby('user')['Message Length'].mean().reset_index()
-    user_max_length = df.groupby('user')['Message Length'].max().reset_index()
+    user_avg_length = df.groupby('user', observed=True)['Message Length'].mean().reset_index()
+    user_max_length = df.groupby('user', observed=True)['Message Length'].max().reset_index()
     
     # Find the longest message and its author
     longest_msg_idx = df['Message Length'].idxmax()
@@ -749,8 +703,8 @@ def analyze_message_length(df: pd.DataFrame) -> Dict[str, Union[pd.DataFrame, fl
     length_distribution.columns = ['message_length', 'count']
     
     # Message length over time
-    df['date_only'] = df['date'].dt.date
-    length_over_time = df.groupby('date_only')['Message Length'].mean().reset_index()
+    date_only = df['date'].dt.date.rename('date_only')
+    length_over_time = df['Message Length'].groupby(date_only).mean().reset_index()
     
     return {
         'avg_length': avg_length,
@@ -763,40 +717,19 @@ def analyze_message_length(df: pd.DataFrame) -> Dict[str, Union[pd.DataFrame, fl
         'length_over_time': length_over_time
     }
 
-def analyze_response_times(df: pd.DataFrame) -> Dict[str, Union[pd.DataFrame, float]]:
+def analyze_response_times(df: ChatData) -> Dict[str, Union[pd.DataFrame, float]]:
     """
     Analyze response time patterns between users.
     
     Args:
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         
     Returns:
         Dict: Dictionary with response time analysis data
     """
-    # Create a copy of the dataframe to avoid modifying the original
-    df_copy = df.copy()
-    
-    # Reset index if date is in the index, but handle the case where 'date' column already exists
-    if 'date' in df_copy.index.names:
-        if 'date' in df_copy.columns:
-            # If 'date' is both in index and columns, just use the DataFrame as is
-            pass
-        else:
-            # Reset index but don't include the index as a column
-            df_copy = df_copy.reset_index(drop=True)
-    
-    # Ensure the dataframe is sorted by date
-    df_copy = df_copy.sort_index()
-    
-    # Filter out group notifications
-    df_copy = df_copy[df_copy['user'] != 'group_notification']
-    
-    # Calculate time differences between consecutive messages
-    df_copy['time_diff'] = df_copy['date'].diff().dt.total_seconds() / 60  # in minutes
-    
-    # Identify responses (messages from a different user than the previous message)
-    df_copy['prev_user'] = df_copy['user'].shift(1)
-    df_copy['is_response'] = (df_copy['user'] != df_copy['prev_user']) & (~df_copy['prev_user'].isna())
+    # Messages sorted by date without group notifications, with the time since
+    # the previous message (in minutes) and whether they answer someone else
+    df_copy = ChatAnalysis.of(df).member_timeline
     
     # Filter to only include responses
     responses = df_copy[df_copy['is_response']].copy()
@@ -807,21 +740,21 @@ def analyze_response_times(df: pd.DataFrame) -> Dict[str, Union[pd.DataFrame, fl
     max_response_time = responses['time_diff'].max()
     
     # Calculate response times by user
-    user_response_times = responses.groupby('user')['time_diff'].agg(['mean', 'median', 'max']).reset_index()
+    user_response_times = responses.groupby('user', observed=True)['time_diff'].agg(['mean', 'median', 'max']).reset_index()
     
     # Calculate response times between specific user pairs
+    pair_times = responses.groupby(['user', 'prev_user'], observed=True)['time_diff'].agg(['mean', 'size'])
     user_pairs = []
     for responder in df_copy['user'].unique():
         for original in df_copy['user'].unique():
-            if responder != original:
-                pair_responses = responses[(responses['user'] == responder) & (responses['prev_user'] == original)]
-                if not pair_responses.empty:
-                    user_pairs.append({
-                        'responder': responder,
-                        'original': original,
-                        'avg_time': pair_responses['time_diff'].mean(),
-                        'count': len(pair_responses)
-                    })
+            if responder != original and (responder, original) in pair_times.index:
+                avg_time, count = pair_times.loc[(responder, original)]
+                user_pairs.append({
+                    'responder': responder,
+                    'original': original,
+                    'avg_time': avg_time,
+                    'count': int(count)
+                })
     
     user_pair_df = pd.DataFrame(user_pairs)
     
@@ -855,18 +788,20 @@ def analyze_response_times(df: pd.DataFrame) -> Dict[str, Union[pd.DataFrame, fl
         'time_by_day': time_by_day
     }
 
-def analyze_topic_modeling(df: pd.DataFrame, num_topics: int = 5, num_words: int = 10) -> Dict[str, Union[List, pd.DataFrame]]:
+def analyze_topic_modeling(df: ChatData, num_topics: int = 5, num_words: int = 10) -> Dict[str, Union[List, pd.DataFrame]]:
     """
     Perform topic modeling on chat messages using Latent Dirichlet Allocation.
     
     Args:
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         num_topics: Number of topics to extract
         num_words: Number of words per topic to return
         
     Returns:
         Dict: Dictionary with topic modeling results
     """
+    df = ChatAnalysis.of(df).df
+
     # Filter out non-text messages and group notifications
     text_df = df[(~df['message'].str.contains('<Media omitted>|image omitted|video omitted|sticker omitted', na=False)) & 
                  (df['user'] != 'group_notification')].copy()
@@ -920,7 +855,7 @@ def analyze_topic_modeling(df: pd.DataFrame, num_topics: int = 5, num_words: int
         topic_counts.columns = ['topic_id', 'message_count']
         
         # Get topic distribution by user
-        user_topics = text_df.groupby(['user', 'dominant_topic']).size().reset_index(name='count')
+        user_topics = text_df.groupby(['user', 'dominant_topic'], observed=True).size().reset_index(name='count')
         
         # Calculate topic evolution over time
         text_df['month_year'] = text_df['date'].dt.strftime('%Y-%m')
@@ -946,21 +881,21 @@ def analyze_topic_modeling(df: pd.DataFrame, num_topics: int = 5, num_words: int
             'error': str(e)
         }
 
-def analyze_emoji_usage(df: pd.DataFrame) -> Dict[str, Union[pd.DataFrame, Dict]]:
+def analyze_emoji_usage(df: ChatData) -> Dict[str, Union[pd.DataFrame, Dict]]:
     """
     Analyze emoji usage patterns in the chat.
     
     Args:
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         
     Returns:
         Dict: Dictionary with emoji usage analysis data
     """
+    chat = ChatAnalysis.of(df)
+    df = chat.df
+
     # Extract all emojis from messages
-    emoji_list = []
-    for message in df['message']:
-        emojis = [c for c in message if emoji.is_emoji(c)]
-        emoji_list.extend(emojis)
+    emoji_list = list(itertools.chain.from_iterable(chat.emojis))
     
     # Count emoji frequencies
     emoji_counts = Counter(emoji_list)
@@ -971,21 +906,15 @@ def analyze_emoji_usage(df: pd.DataFrame) -> Dict[str, Union[pd.DataFrame, Dict]
     # Calculate emoji usage by user
     user_emoji = {}
     for user in df['user'].unique():
-        user_messages = df[df['user'] == user]['message']
-        user_emojis = []
-        for message in user_messages:
-            user_emojis.extend([c for c in message if emoji.is_emoji(c)])
+        user_emojis = list(itertools.chain.from_iterable(chat.select(user, chat.emojis)))
         
         if user_emojis:
             user_emoji[user] = Counter(user_emojis).most_common(10)
     
     # Calculate emoji usage over time
-    df['date_only'] = df['date'].dt.date
     emoji_by_date = {}
-    for date, group in df.groupby('date_only'):
-        date_emojis = []
-        for message in group['message']:
-            date_emojis.extend([c for c in message if emoji.is_emoji(c)])
+    for date, group in chat.emojis.groupby(df['date'].dt.date.values):
+        date_emojis = list(itertools.chain.from_iterable(group))
         
         if date_emojis:
             emoji_by_date[date] = Counter(date_emojis).most_common(5)
@@ -1017,30 +946,37 @@ def analyze_emoji_usage(df: pd.DataFrame) -> Dict[str, Union[pd.DataFrame, Dict]
         'total_emojis': len(emoji_list)
     }
 
-def analyze_sentiment_trends(df: pd.DataFrame) -> Dict[str, Union[pd.DataFrame, Dict]]:
+def analyze_sentiment_trends(df: ChatData, workers: Optional[int] = None) -> Dict[str, Union[pd.DataFrame, Dict]]:
     """
     Analyze sentiment trends over time and by user.
     
     Args:
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
+        workers: Number of processes to score the messages with, see ``score_sentiment``.
+            Defaults to 1, or to the setting of the ``ChatAnalysis``.
         
     Returns:
         Dict: Dictionary with sentiment analysis data
     """
-    # Initialize sentiment analyzer
-    sid = SentimentIntensityAnalyzer()
-    
-    # Calculate sentiment for each message
-    df['sentiment_score'] = df['message'].apply(lambda x: sid.polarity_scores(x)['compound'])
-    df['sentiment'] = df['sentiment_score'].apply(lambda x: 'Positive' if x > 0.05 else ('Negative' if x < -0.05 else 'Neutral'))
+    chat = ChatAnalysis.of(df, workers)
+
+    # Sentiment of each message, on a copy of the columns used below
+    sentiment_score = chat.sentiment['compound']
+    df = pd.DataFrame({
+        'user': chat.df['user'],
+        'message': chat.df['message'],
+        'date': chat.df['date'],
+        'sentiment_score': sentiment_score,
+        'sentiment': label_sentiment(sentiment_score),
+    }, index=chat.df.index)
     
     # Calculate overall sentiment statistics
     sentiment_counts = df['sentiment'].value_counts().to_dict()
     avg_sentiment = df['sentiment_score'].mean()
     
     # Calculate sentiment by user
-    user_sentiment = df.groupby('user')['sentiment_score'].mean().reset_index()
-    user_sentiment_counts = df.groupby(['user', 'sentiment']).size().unstack(fill_value=0).reset_index()
+    user_sentiment = df.groupby('user', observed=True)['sentiment_score'].mean().reset_index()
+    user_sentiment_counts = df.groupby(['user', 'sentiment'], observed=True).size().unstack(fill_value=0).reset_index()
     
     # Calculate sentiment over time
     df['date_only'] = df['date'].dt.date
@@ -1088,46 +1024,30 @@ def analyze_sentiment_trends(df: pd.DataFrame) -> Dict[str, Union[pd.DataFrame,
         'most_negative': most_negative
     }
 
-def analyze_word_usage(df: pd.DataFrame, stop_words: Optional[set] = None) -> Dict[str, Union[pd.DataFrame, Dict]]:
+def analyze_word_usage(df: ChatData, stop_words: Optional[set] = None) -> Dict[str, Union[pd.DataFrame, Dict]]:
     """
     Analyze word usage patterns in the chat.
     
     Args:
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         stop_words: Set of stop words to exclude from analysis
         
     Returns:
         Dict: Dictionary with word usage analysis data
     """
-    # Create a copy of the dataframe to avoid modifying the original
-    df_copy = df.copy()
-    
-    # Reset index if date is in the index, but handle the case where 'date' column already exists
-    if 'date' in df_copy.index.names:
-        if 'date' in df_copy.columns:
-            # If 'date' is both in index and columns, just use the DataFrame as is
-            pass
-        else:
-            # Reset index but don't include the index as a column
-            df_copy = df_copy.reset_index(drop=True)
+    chat = ChatAnalysis.of(df)
+    df_copy = chat.df
     
     if stop_words is None:
         stop_words = set(STOPWORDS)
     
+    # Cleaned words of each message, skipping media messages and
+    # filtering stop words and short words
+    filtered_words = chat.clean_words[~chat.is_media].map(
+        lambda words: [word for word in words if word not in stop_words and len(word) > 2])
+    
     # Extract all words from messages
-    all_words = []
-    for message in df_copy['message']:
-        # Skip media messages
-        if '<Media omitted>' in message or 'image omitted' in message or 'video omitted' in message:
-            continue
-        
-        # Clean and tokenize
-        clean_message = re.sub(r'[^\w\s]', '', message.lower())
-        words = clean_message.split()
-        
-        # Filter stop words and short words
-        filtered_words = [word for word in words if word not in stop_words and len(word) > 2]
-        all_words.extend(filtered_words)
+    all_words = list(itertools.chain.from_iterable(filtered_words))
     
     # Count word frequencies
     word_counts = Counter(all_words)
@@ -1137,18 +1057,11 @@ def analyze_word_usage(df: pd.DataFrame, stop_words: Optional[set] = None) -> Di
     
     # Calculate word usage by user
     user_words = {}
+    user_filtered_words = filtered_words.groupby(df_copy['user'][~chat.is_media], observed=True)
     for user in df_copy['user'].unique():
-        user_messages = df_copy[df_copy['user'] == user]['message']
-        user_word_list = []
-        
-        for message in user_messages:
-            if '<Media omitted>' in message or 'image omitted' in message or 'video omitted' in message:
-                continue
-            
-            clean_message = re.sub(r'[^\w\s]', '', message.lower())
-            words = clean_message.split()
-            filtered_words = [word for word in words if word not in stop_words and len(word) > 2]
-            user_word_list.extend(filtered_words)
+        if user not in user_filtered_words.groups:
+            continue
+        user_word_list = list(itertools.chain.from_iterable(user_filtered_words.get_group(user)))
         
         if user_word_list:
             user_words[user] = Counter(user_word_list).most_common(20)
@@ -1173,38 +1086,19 @@ def analyze_word_usage(df: pd.DataFrame, stop_words: Optional[set] = None) -> Di
         'total_words': len(all_words)
     }
 
-def analyze_conversation_flow(df: pd.DataFrame) -> Dict[str, Union[pd.DataFrame, Dict]]:
+def analyze_conversation_flow(df: ChatData) -> Dict[str, Union[pd.DataFrame, Dict]]:
     """
     Analyze conversation flow patterns in the chat.
     
     Args:
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         
     Returns:
         Dict: Dictionary with conversation flow analysis data
     """
-    # Create a copy of the dataframe to avoid modifying the original
-    df_copy = df.copy()
-    
-    # Reset index if date is in the index, but handle the case where 'date' column already exists
-    if 'date' in df_copy.index.names:
-        if 'date' in df_copy.columns:
-            # If 'date' is both in index and columns, just use the DataFrame as is
-            pass
-        else:
-            # Reset index but don't include the index as a column
-            df_copy = df_copy.reset_index(drop=True)
-    
-    # Ensure the dataframe is sorted by date
-    df_copy = df_copy.sort_index()
-    
-    # Calculate time differences between consecutive messages
-    df_copy['time_diff'] = df_copy['date'].diff().dt.total_seconds() / 60  # in minutes
-    
-    # Identify conversation starts (messages after a long gap)
-    conversation_threshold = 60  # 60 minutes gap defines a new conversation
-    df_copy['new_conversation'] = df_copy['time_diff'] > conversation_threshold
-    df_copy['conversation_id'] = df_copy['new_conversation'].cumsum()
+    # Messages sorted by date, split into conversations at gaps of over an hour
+    timeline = ChatAnalysis.of(df).timeline
+    df_copy = timeline.assign(hour=timeline['date'].dt.hour, day_name=timeline['date'].dt.day_name())
     
     # Calculate conversation statistics
     conversation_stats = df_copy.groupby('conversation_id').agg(
@@ -1216,21 +1110,19 @@ def analyze_conversation_flow(df: pd.DataFrame) -> Dict[str, Union[pd.DataFrame,
     ).reset_index()
     
     # Calculate user participation in conversations
-    user_participation = df_copy.groupby(['conversation_id', 'user']).size().reset_index(name='message_count')
+    user_participation = df_copy.groupby(['conversation_id', 'user'], observed=True).size().reset_index(name='message_count')
     
     # Calculate conversation starters
-    conversation_starters = df_copy[df_copy['new_conversation']].groupby('user').size().reset_index(name='count')
+    conversation_starters = df_copy[df_copy['new_conversation']].groupby('user', observed=True).size().reset_index(name='count')
     
     # Calculate conversation enders (last message in each conversation)
-    conversation_enders = df_copy.groupby('conversation_id').tail(1).groupby('user').size().reset_index(name='count')
+    conversation_enders = df_copy.groupby('conversation_id').tail(1).groupby('user', observed=True).size().reset_index(name='count')
     
     # Calculate conversation activity by hour
-    df_copy['hour'] = df_copy['date'].dt.hour
     conversation_by_hour = df_copy.groupby(['conversation_id', 'hour']).size().reset_index(name='message_count')
     hour_conversation_counts = conversation_by_hour.groupby('hour').size().reset_index(name='conversation_count')
     
     # Calculate conversation activity by day
-    df_copy['day_name'] = df_copy['date'].dt.day_name()
     conversation_by_day = df_copy.groupby(['conversation_id', 'day_name']).size().reset_index(name='message_count')
     day_conversation_counts = conversation_by_day.groupby('day_name').size().reset_index(name='conversation_count')
     
@@ -1254,35 +1146,24 @@ def analyze_conversation_flow(df: pd.DataFrame) -> Dict[str, Union[pd.DataFrame,
         'total_conversations': len(conversation_stats)
     }
 
-def analyze_user_activity_patterns(df: pd.DataFrame) -> Dict[str, Union[pd.DataFrame, Dict]]:
+def analyze_user_activity_patterns(df: ChatData) -> Dict[str, Union[pd.DataFrame, Dict]]:
     """
     Analyze detailed activity patterns for each user.
     
     Args:
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         
     Returns:
         Dict: Dictionary with user activity pattern analysis data
     """
-    # Create a copy of the dataframe to avoid modifying the original
-    df_copy = df.copy()
-
-    # Reset index if date is in the index, but handle the case where 'date' column already exists
-    if 'date' in df_copy.index.names:
-        if 'date' in df_copy.columns:
-            # If 'date' is both in index and columns, just use the DataFrame as is
-            pass
-        else:
-            # Reset index but don't include the index as a column
-            df_copy = df_copy.reset_index(drop=True)
+    chat = ChatAnalysis.of(df)
+    df_copy = chat.df
 
     # Ensure necessary time columns exist
-    if 'hour' not in df_copy.columns:
-        df_copy['hour'] = df_copy['date'].dt.hour
-    if 'day_name' not in df_copy.columns:
-        df_copy['day_name'] = df_copy['date'].dt.day_name()
-    if 'month' not in df_copy.columns:
-        df_copy['month'] = df_copy['date'].dt.month_name()
+    df_copy = df_copy.assign(**{field: df_copy.wa.field(field) for field in ('hour', 'day_name', 'month')})
+
+    # Messages sorted by date, with the sender of the previous message
+    timeline = chat.timeline
     
     # Activity patterns by user
     user_patterns = {}
@@ -1298,25 +1179,22 @@ def analyze_user_activity_patterns(df: pd.DataFrame) -> Dict[str, Union[pd.DataF
         peak_hour = active_hours.loc[active_hours['count'].idxmax(), 'hour']
         
         # Active days
-        active_days = user_df.groupby('day_name').size().reset_index(name='count')
+        active_days = user_df.groupby('day_name', observed=True).size().reset_index(name='count')
         day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
         active_days['day_order'] = active_days['day_name'].apply(lambda x: day_order.index(x))
         active_days = active_days.sort_values('day_order')
         peak_day = active_days.loc[active_days['count'].idxmax(), 'day_name']
         
         # Active months
-        active_months = user_df.groupby('month').size().reset_index(name='count')
+        active_months = user_df.groupby('month', observed=True).size().reset_index(name='count')
         
         # Message frequency
         total_messages = len(user_df)
         messages_per_day = user_df.groupby(user_df['date'].dt.date).size().mean()
         
-        # Response patterns
-        user_df['prev_user'] = user_df['user'].shift(1)
-        user_df['time_diff'] = user_df['date'].diff().dt.total_seconds() / 60
-        
         # Who they respond to most
-        responds_to = user_df[user_df['prev_user'] != user].groupby('prev_user').size()
+        responses = timeline[(timeline['user'] == user) & timeline['is_response']]
+        responds_to = responses.groupby('prev_user', observed=True).size()
         if not responds_to.empty:
             most_responds_to = responds_to.idxmax()
             response_count = responds_to.max()
@@ -1325,8 +1203,8 @@ def analyze_user_activity_patterns(df: pd.DataFrame) -> Dict[str, Union[pd.DataF
             response_count = 0
         
         # Who responds to them most
-        other_users_df = df_copy[df_copy['prev_user'] == user]
-        responded_by = other_users_df.groupby('user').size()
+        other_users_df = timeline[timeline['is_response'] & (timeline['prev_user'] == user)]
+        responded_by = other_users_df.groupby('user', observed=True).size()
         if not responded_by.empty:
             most_responded_by = responded_by.idxmax()
             responded_by_count = responded_by.max()
@@ -1335,8 +1213,7 @@ def analyze_user_activity_patterns(df: pd.DataFrame) -> Dict[str, Union[pd.DataF
             responded_by_count = 0
         
         # Activity streaks
-        user_df['date_only'] = user_df['date'].dt.date
-        daily_counts = user_df.groupby('date_only').size()
+        daily_counts = user_df.groupby(user_df['date'].dt.date).size()
         active_days_count = len(daily_counts)
         
         # Find longest streak of consecutive days
@@ -1385,53 +1262,26 @@ def analyze_user_activity_patterns(df: pd.DataFrame) -> Dict[str, Union[pd.DataF
         'user_patterns': user_patterns
     }
 
-def analyze_conversation_mood_shifts(df: pd.DataFrame) -> Dict[str, Union[pd.DataFrame, List, Dict]]:
+def analyze_conversation_mood_shifts(df: ChatData) -> Dict[str, Union[pd.DataFrame, List, Dict]]:
     """
     Analyze how conversation mood shifts throughout chats.
     
     Args:
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         
     Returns:
         Dict: Dictionary with mood shift analysis data
     """
-    # Create a copy of the dataframe to avoid modifying the original
-    df_copy = df.copy()
-    
-    # Reset index if date is in the index, but handle the case where 'date' column already exists
-    if 'date' in df_copy.index.names:
-        if 'date' in df_copy.columns:
-            # If 'date' is both in index and columns, just use the DataFrame as is
-            pass
-        else:
-            # Reset index but don't include the index as a column
-            df_copy = df_copy.reset_index(drop=True)
-    
-    # Initialize sentiment analyzer
-    sid = SentimentIntensityAnalyzer()
-    
-    # Calculate sentiment for each message
-    df_copy['sentiment_score'] = df_copy['message'].apply(lambda x: sid.polarity_scores(x)['compound'])
-    
-    # Ensure the dataframe is sorted by date
-    df_copy = df_copy.sort_index()
-    
-    # Identify conversation starts (messages after a long gap)
-    if 'time_diff' not in df_copy.columns:
-        df_copy['time_diff'] = df_copy['date'].diff().dt.total_seconds() / 60  # in minutes
-    
-    conversation_threshold = 60  # 60 minutes gap defines a new conversation
-    df_copy['new_conversation'] = df_copy['time_diff'] > conversation_threshold
-    df_copy['conversation_id'] = df_copy['new_conversation'].cumsum()
+    chat = ChatAnalysis.of(df)
+
+    # Messages sorted by date, split into conversations, with the sentiment of each
+    sentiment_score = chat.sentiment['compound'].values.take(chat.order)
+    df_copy = chat.timeline.assign(sentiment_score=sentiment_score)
     
     # Calculate mood shifts within conversations
     df_copy['prev_sentiment'] = df_copy['sentiment_score'].shift(1)
     df_copy['sentiment_shift'] = df_copy['sentiment_score'] - df_copy['prev_sentiment']
     
-    # Only consider shifts between different users
-    df_copy['prev_user'] = df_copy['user'].shift(1)
-    df_copy['is_response'] = (df_copy['user'] != df_copy['prev_user']) & (~df_copy['prev_user'].isna())
-    
     # Filter to only include responses that cause significant mood shifts
     significant_shift = 0.5  # Threshold for significant mood shift
     mood_lifters = df_copy[(df_copy['is_response']) & (df_copy['sentiment_shift'] > significant_shift)]
@@ -1519,48 +1369,22 @@ def analyze_conversation_mood_shifts(df: pd.DataFrame) -> Dict[str, Union[pd.Dat
         'dramatic_conversations': dramatic_convs
     }
 
-def analyze_conversation_compatibility(df: pd.DataFrame) -> Dict[str, Union[pd.DataFrame, List, Dict]]:
+def analyze_conversation_compatibility(df: ChatData) -> Dict[str, Union[pd.DataFrame, List, Dict]]:
     """
     Analyze compatibility between users based on their conversation patterns.
     
     Args:
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         
     Returns:
         Dict: Dictionary with compatibility analysis data
     """
-    # Create a copy of the dataframe to avoid modifying the original
-    df_copy = df.copy()
-    
-    # Reset index if date is in the index, but handle the case where 'date' column already exists
-    if 'date' in df_copy.index.names:
-        if 'date' in df_copy.columns:
-            # If 'date' is both in index and columns, just use the DataFrame as is
-            pass
-        else:
-            # Reset index but don't include the index as a column
-            df_copy = df_copy.reset_index(drop=True)
-    
-    # Ensure the dataframe is sorted by date
-    df_copy = df_copy.sort_index()
-    
-    # Filter out group notifications
-    df_copy = df_copy[df_copy['user'] != 'group_notification']
-    
-    # Calculate time differences between consecutive messages
-    if 'time_diff' not in df_copy.columns:
-        df_copy['time_diff'] = df_copy['date'].diff().dt.total_seconds() / 60  # in minutes
-    
-    # Identify responses
-    if 'prev_user' not in df_copy.columns:
-        df_copy['prev_user'] = df_copy['user'].shift(1)
-    
-    df_copy['is_response'] = (df_copy['user'] != df_copy['prev_user']) & (~df_copy['prev_user'].isna())
-    
-    # Calculate sentiment if not already done
-    if 'sentiment_score' not in df_copy.columns:
-        sid = SentimentIntensityAnalyzer()
-        df_copy['sentiment_score'] = df_copy['message'].apply(lambda x: sid.polarity_scores(x)['compound'])
+    chat = ChatAnalysis.of(df)
+
+    # Messages sorted by date without group notifications, with the time since
+    # the previous message, whether they answer someone else and their sentiment
+    sentiment_score = chat.sentiment['compound'].values.take(chat.member_order)
+    df_copy = chat.member_timeline.assign(sentiment_score=sentiment_score)
     
     # Analyze user pairs
     users = df_copy['user'].unique()
@@ -1642,37 +1466,40 @@ def analyze_conversation_compatibility(df: pd.DataFrame) -> Dict[str, Union[pd.D
         'most_compatible': most_compatible
     }
 
-def analyze_personality(df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+def analyze_personality(df: ChatData) -> Dict[str, Dict[str, float]]:
     """
     Analyze personality traits of users based on their messaging patterns.
     
     Args:
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         
     Returns:
         Dict: Dictionary with personality analysis data for each user
     """
-    # Filter out group notifications
-    df = df[df['user'] != 'group_notification']
-    
-    # Calculate message length if not already done
-    if 'Message Length' not in df.columns:
-        df['Message Length'] = df['message'].apply(lambda x: len(x.split()))
-    
-    # Calculate sentiment if not already done
-    if 'sentiment_score' not in df.columns:
-        sid = SentimentIntensityAnalyzer()
-        df['sentiment_score'] = df['message'].apply(lambda x: sid.polarity_scores(x)['compound'])
+    chat = ChatAnalysis.of(df)
+    df = chat.df
+    members = (df['user'] != 'group_notification').values
+
+    # Messages sorted by date without group notifications, split into conversations
+    df_copy = chat.member_timeline
     
-    # Ensure time columns exist
-    if 'hour' not in df.columns:
-        df['hour'] = df['date'].dt.hour
+    # Filter out group notifications, adding the message length, sentiment and hour
+    # of each message unless already present
+    df = df.assign(**{
+        column: values for column, values in (
+            ('Message Length', chat.words.str.len()),
+            ('sentiment_score', chat.sentiment['compound']),
+            ('hour', lambda frame: frame.wa.hour),
+        ) if column not in df.columns
+    })[members]
+    words, emojis = chat.words[members], chat.emojis[members]
     
     # Personality traits for each user
     personality_traits = {}
     
     for user in df['user'].unique():
-        user_df = df[df['user'] == user]
+        user_rows = (df['user'] == user).values
+        user_df = df[user_rows]
         
         # Skip users with too few messages
         if len(user_df) < 10:
@@ -1686,10 +1513,8 @@ def analyze_personality(df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
         # - Time of day variety
         
         # Vocabulary diversity
-        user_words = []
-        for message in user_df['message']:
-            words = message.lower().split()
-            user_words.extend([word for word in words if len(word) > 2])
+        user_words = [word for word in itertools.chain.from_iterable(words[user_rows])
+                      if len(word) > 2]
         
         unique_words = len(set(user_words))
         total_words = len(user_words)
@@ -1716,10 +1541,7 @@ def analyze_personality(df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
         # - Message structure
         
         # Response time
-        user_df['prev_user'] = user_df['user'].shift(1)
-        user_df['time_diff'] = user_df['date'].diff().dt.total_seconds() / 60
-        
-        responses = user_df[user_df['prev_user'] != user]
+        responses = df_copy[(df_copy['user'] == user) & df_copy['is_response']]
         avg_response_time = responses['time_diff'].mean() if len(responses) > 0 else 60
         
         response_time_score = max(100 - min(avg_response_time, 60), 0)
@@ -1749,16 +1571,12 @@ def analyze_personality(df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
         frequency_score = min(messages_per_day / 10 * 100, 100)
         
         # Conversation initiation
-        if 'new_conversation' not in df_copy.columns:
-            df_copy['time_diff'] = df_copy['date'].diff().dt.total_seconds() / 60
-            df_copy['new_conversation'] = df_copy['time_diff'] > 60
-        
         initiations = df_copy[(df_copy['user'] == user) & (df_copy['new_conversation'])].shape[0]
         initiation_ratio = initiations / len(user_df) if len(user_df) > 0 else 0
         initiation_score = min(initiation_ratio * 200, 100)  # Scale up for better distribution
         
         # Emoji usage
-        emoji_count = sum(len([c for c in message if emoji.is_emoji(c)]) for message in user_df['message'])
+        emoji_count = emojis[user_rows].str.len().sum()
         emoji_per_message = emoji_count / len(user_df) if len(user_df) > 0 else 0
         emoji_score = min(emoji_per_message * 50, 100)  # Scale up for better distribution
         
@@ -1819,17 +1637,19 @@ def analyze_personality(df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
     
     return personality_traits
 
-def predict_future_activity(df: pd.DataFrame, forecast_days: int = 30) -> Dict[str, Union[pd.DataFrame, Dict]]:
+def predict_future_activity(df: ChatData, forecast_days: int = 30) -> Dict[str, Union[pd.DataFrame, Dict]]:
     """
     Predict future messaging activity based on historical patterns.
     
     Args:
-        df: The preprocessed DataFrame containing chat data
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it
         forecast_days: Number of days to forecast
         
     Returns:
         Dict: Dictionary with prediction data and metrics
     """
+    df = ChatAnalysis.of(df).df
+
     # Check if we have enough data for prediction
     if len(df) < 30:
         return {
@@ -1838,8 +1658,7 @@ def predict_future_activity(df: pd.DataFrame, forecast_days: int = 30) -> Dict[s
         }
     
     # Prepare daily message counts
-    df['date_only'] = df['date'].dt.date
-    daily_counts = df.groupby('date_only').size().reset_index()
+    daily_counts = df.groupby(df['date'].dt.date.rename('date_only')).size().reset_index()
     daily_counts.columns = ['date', 'message_count']
     
     # Fill in missing dates with zero counts
@@ -1947,13 +1766,13 @@ def predict_future_activity(df: pd.DataFrame, forecast_days: int = 30) -> Dict[s
             'error': f"Error during prediction: {str(e)}"
         }
 
-def create_plotly_wordcloud(selected_user: str, df: pd.DataFrame, include_hinglish_stopwords: bool = False) -> go.Figure:
+def create_plotly_wordcloud(selected_user: str, df: ChatData, include_hinglish_stopwords: bool = False) -> go.Figure:
     """
     Enhanced word cloud generation using Plotly.
 
     Args:
         selected_user: The user to analyze or 'Overall' for all users.
-        df: The preprocessed DataFrame containing chat data.
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it.
         include_hinglish_stopwords: 
             If True, attempts to load 'stop_hinglish.txt' from the package directory.
             If the file is found, its contents are used as Hinglish stopwords.
@@ -1963,8 +1782,8 @@ def create_plotly_wordcloud(selected_user: str, df: pd.DataFrame, include_hingli
     Returns:
         plotly Figure object representing the word cloud.
     """
-    if selected_user != 'Overall':
-        df = df[df['user'] == selected_user]
+    chat = ChatAnalysis.of(df)
+    df = chat.select(selected_user)
 
     # --- Define Stopwords --- 
     # Standard chat-specific stopwords
@@ -2018,16 +1837,10 @@ def create_plotly_wordcloud(selected_user: str, df: pd.DataFrame, include_hingli
         print("Hinglish stopwords were not requested (include_hinglish_stopwords=False).")
         
     # --- Process Messages --- 
+    # Skip media messages
+    keep = ~df['message'].str.lower().str.contains('omitted', regex=False, na=False).values
     words = []
-    for message in df['message']:
-        # Skip media messages
-        if 'omitted' in message.lower():
-            continue
-            
-        # Clean and tokenize
-        clean_message = re.sub(r'[^\w\s]', '', message.lower())
-        message_words = clean_message.split()
-        
+    for message_words in chat.select(selected_user, chat.clean_words)[keep]:
         # Filter stopwords, short words, and words containing digits
         filtered_words = []
         for word in message_words:
@@ -2162,34 +1975,24 @@ def create_plotly_wordcloud(selected_user: str, df: pd.DataFrame, include_hingli
     
     return fig
 
-def week_activity_map(selected_user: str, df: pd.DataFrame) -> go.Figure:
+def week_activity_map(selected_user: str, df: ChatData) -> go.Figure:
     """
     Create an enhanced weekly activity heatmap showing hourly patterns.
 
     Args:
         selected_user: The user to analyze or 'Overall' for all users.
-        df: The preprocessed DataFrame containing chat data.
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it.
 
     Returns:
         plotly Figure object representing the heatmap.
     """
-    df_copy = df.copy()
-    if 'date' in df_copy.index.names:
-        if 'date' in df_copy.columns:
-            pass
-        else:
-            df_copy = df_copy.reset_index(drop=True)
-
-    if selected_user != 'Overall':
-        df_copy = df_copy[df_copy['user'] == selected_user]
+    df_copy = ChatAnalysis.of(df).select(selected_user)
     
     # Ensure we have date as datetime
-    if not pd.api.types.is_datetime64_any_dtype(df_copy['date']):
-        df_copy['date'] = pd.to_datetime(df_copy['date'])
+    date = pd.to_datetime(df_copy['date'])
     
     # Extract day of week and hour
-    df_copy['day_of_week'] = df_copy['date'].dt.day_name()
-    df_copy['hour'] = df_copy['date'].dt.hour
+    df_copy = df_copy.assign(day_of_week=date.dt.day_name(), hour=date.dt.hour)
     
     # Create pivot table for heatmap
     heatmap_data = df_copy.pivot_table(
@@ -2255,36 +2058,21 @@ def week_activity_map(selected_user: str, df: pd.DataFrame) -> go.Figure:
     
     return fig
 
-def month_activity_map(selected_user: str, df: pd.DataFrame) -> go.Figure:
+def month_activity_map(selected_user: str, df: ChatData) -> go.Figure:
     """
     Create a bar chart showing message activity by month.
 
     Args:
         selected_user: The user to analyze or 'Overall' for all users.
-        df: The preprocessed DataFrame containing chat data.
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it.
 
     Returns:
         plotly Figure object representing the bar chart.
     """
-    df_copy = df.copy()
-    if 'date' in df_copy.index.names:
-        if 'date' in df_copy.columns:
-            pass
-        else:
-            df_copy = df_copy.reset_index(drop=True)
-
-    if selected_user != 'Overall':
-        df_copy = df_copy[df_copy['user'] == selected_user]
-
-    # Ensure month column exists
-    if 'month' not in df_copy.columns:
-        if not pd.api.types.is_datetime64_any_dtype(df_copy['date']):
-             df_copy['date'] = pd.to_datetime(df_copy['date'])
-        df_copy['month'] = df_copy['date'].dt.month_name()
-        df_copy['month_num'] = df_copy['date'].dt.month
+    df_copy = ChatAnalysis.of(df).select(selected_user)
 
     # Group by month and count messages
-    busy_month = df_copy.groupby(['month', 'month_num']).size().reset_index(name='count')
+    busy_month = df_copy.groupby([df_copy.wa.month, df_copy.wa.month_num], observed=True).size().reset_index(name='count')
     busy_month = busy_month.sort_values('month_num')
 
 
@@ -2298,33 +2086,20 @@ def month_activity_map(selected_user: str, df: pd.DataFrame) -> go.Figure:
     return fig
 
 # Function for busiest hours analysis
-def busiest_hours_analysis(df: pd.DataFrame) -> pd.Series:
+def busiest_hours_analysis(df: ChatData) -> pd.Series:
     """
     Calculates the count of messages per hour.
 
     Args:
-        df: The preprocessed DataFrame containing chat data.
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it.
 
     Returns:
         pandas Series with hours as index and message count as values.
     """
-    df_copy = df.copy()
-    if 'date' in df_copy.index.names:
-        if 'date' in df_copy.columns:
-            pass
-        else:
-            df_copy = df_copy.reset_index(drop=True)
-            
-    # Ensure hour column exists
-    if 'hour' not in df_copy.columns:
-        if not pd.api.types.is_datetime64_any_dtype(df_copy['date']):
-             df_copy['date'] = pd.to_datetime(df_copy['date'])
-        df_copy['hour'] = df_copy['date'].dt.hour
-        
-    busiest_hours = df_copy['hour'].value_counts()
+    busiest_hours = ChatAnalysis.of(df).df.wa.hour.value_counts()
     return busiest_hours
 
-def emoji_helper(selected_user: str, df: pd.DataFrame) -> go.Figure:
+def emoji_helper(selected_user: str, df: ChatData) -> go.Figure:
     """
     Analyzes emoji usage and creates a pie chart distribution for the top emojis.
 
@@ -2333,25 +2108,13 @@ def emoji_helper(selected_user: str, df: pd.DataFrame) -> go.Figure:
 
     Args:
         selected_user: The user to analyze or 'Overall' for all users.
-        df: The preprocessed DataFrame containing chat data.
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it.
 
     Returns:
         plotly Figure object representing the emoji distribution pie chart.
     """
-    df_copy = df.copy()
-    if 'date' in df_copy.index.names:
-        if 'date' in df_copy.columns:
-            pass
-        else:
-            df_copy = df_copy.reset_index(drop=True)
-
-    if selected_user != 'Overall':
-        df_copy = df_copy[df_copy['user'] == selected_user]
-
-    emojis = []
-    for message in df_copy['message']:
-        # Use emoji.EMOJI_DATA to check for emojis
-        emojis.extend([c for c in message if emoji.is_emoji(c)])
+    chat = ChatAnalysis.of(df)
+    emojis = list(itertools.chain.from_iterable(chat.select(selected_user, chat.emojis)))
         
     if not emojis:
         # Return an empty figure with a message if no emojis found
@@ -2379,72 +2142,42 @@ def emoji_helper(selected_user: str, df: pd.DataFrame) -> go.Figure:
     
     return fig
 
-def analyze_and_plot_sentiment(selected_user: str, df: pd.DataFrame) -> Tuple[go.Figure, go.Figure]:
+def analyze_and_plot_sentiment(selected_user: str, df: ChatData,
+                               workers: Optional[int] = None) -> Tuple[go.Figure, go.Figure]:
     """
     Performs enhanced sentiment analysis including distribution and time trends.
 
     Args:
         selected_user: The user to analyze or 'Overall' for all users.
-        df: The preprocessed DataFrame containing chat data.
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it.
+        workers: Number of processes to score the messages with, see ``score_sentiment``.
+            Defaults to 1, or to the setting of the ``ChatAnalysis``.
 
     Returns:
         Tuple[go.Figure, go.Figure]: A tuple containing two plotly figures:
             - dist_fig: Pie chart showing sentiment distribution.
             - trend_fig: Line chart showing sentiment trends over time.
     """
-    df_copy = df.copy()
-    if 'date' in df_copy.index.names:
-        if 'date' in df_copy.columns:
-            pass
-        else:
-            df_copy = df_copy.reset_index(drop=True)
-
-    if selected_user != 'Overall':
-        df_copy = df_copy[df_copy['user'] == selected_user]
+    chat = ChatAnalysis.of(df, workers)
+    df_copy = chat.select(selected_user)
+    sentiment = chat.select(selected_user, chat.sentiment)
     
     # Ensure we have date as datetime
-    if not pd.api.types.is_datetime64_any_dtype(df_copy['date']):
-        df_copy['date'] = pd.to_datetime(df_copy['date'])
-    
-    # Add month-year for grouping
-    df_copy['month_year'] = df_copy['date'].dt.strftime('%Y-%m')
-    
-    # Initialize sentiment analyzer
-    sentiment_analyzer = SentimentIntensityAnalyzer()
-    
-    # Calculate sentiment for each message
-    sentiment_data = []
-    for _, row in df_copy.iterrows():
-        # Check if message is a string before analyzing
-        if isinstance(row['message'], str):
-            sentiment = sentiment_analyzer.polarity_scores(row['message'])
-            sentiment_data.append({
-                'user': row['user'],
-                'date': row['date'],
-                'month_year': row['month_year'],
-                'message': row['message'],
-                'positive': sentiment['pos'],
-                'negative': sentiment['neg'],
-                'neutral': sentiment['neu'],
-                'compound': sentiment['compound'],
-                'sentiment_category': 'Positive' if sentiment['compound'] > 0.05 else 
-                                     'Negative' if sentiment['compound'] < -0.05 else 'Neutral'
-            })
-        else:
-             # Handle non-string messages (e.g., NaN, if any) - assign neutral
-             sentiment_data.append({
-                'user': row['user'],
-                'date': row['date'],
-                'month_year': row['month_year'],
-                'message': str(row['message']), # Ensure message is string
-                'positive': 0.0,
-                'negative': 0.0,
-                'neutral': 1.0,
-                'compound': 0.0,
-                'sentiment_category': 'Neutral'
-            })
-    
-    sentiment_df = pd.DataFrame(sentiment_data)
+    date = pd.to_datetime(df_copy['date'])
+    
+    # Sentiment of each message, with the month-year for grouping
+    # (non-string messages, e.g. NaN, are scored as neutral)
+    sentiment_df = pd.DataFrame({
+        'user': df_copy['user'].values,
+        'date': date.values,
+        'month_year': date.dt.strftime('%Y-%m').values,
+        'message': df_copy['message'].map(str).values,
+        'positive': sentiment['pos'].values,
+        'negative': sentiment['neg'].values,
+        'neutral': sentiment['neu'].values,
+        'compound': sentiment['compound'].values,
+        'sentiment_category': label_sentiment(sentiment['compound']),
+    })
     
     # --- Create Distribution Figure --- 
     if sentiment_df.empty:
@@ -2557,56 +2290,29 @@ def analyze_and_plot_sentiment(selected_user: str, df: pd.DataFrame) -> Tuple[go
     
     return dist_fig, trend_fig
 
-def calculate_monthly_sentiment_trend(df: pd.DataFrame) -> go.Figure:
+def calculate_monthly_sentiment_trend(df: ChatData) -> go.Figure:
     """
     Calculates and plots the monthly trend of positive and negative sentiment.
 
     Args:
-        df: The preprocessed DataFrame containing chat data.
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it.
 
     Returns:
         plotly Figure object showing the monthly sentiment trend.
     """
-    # Make a copy of the DataFrame to avoid modifying the original DataFrame
-    df_copy = df.copy()
-    if 'date' in df_copy.index.names:
-        if 'date' in df_copy.columns:
-            pass
-        else:
-            df_copy = df_copy.reset_index(drop=True)
-
-    # Initialize the sentiment analyzer (ensure NLTK data is downloaded at module level)
-    sid = SentimentIntensityAnalyzer()
-
-    # Calculate sentiment for each message
-    sentiment_scores = []
-    valid_indices = []
-    for index, message in df_copy['message'].items():
-        if isinstance(message, str):
-            sentiment_score = sid.polarity_scores(message)['compound']
-            sentiment_scores.append(sentiment_score)
-            valid_indices.append(index)
-        else:
-            sentiment_scores.append(0.0) # Assign neutral score for non-strings
-            valid_indices.append(index)
+    chat = ChatAnalysis.of(df)
 
-    # Add sentiment scores to the copied DataFrame, handling potential length mismatch
-    # Ensure sentiment_scores aligns with the original df_copy index
-    sentiment_series = pd.Series(sentiment_scores, index=valid_indices)
-    df_copy['sentiment_score'] = sentiment_series
-    # Fill any potentially remaining NaNs if filtering occurred (shouldn't with current logic but safe)
-    df_copy['sentiment_score'] = df_copy['sentiment_score'].fillna(0.0)
-
-    # Convert 'date' column to datetime if it's not already
-    if not pd.api.types.is_datetime64_any_dtype(df_copy['date']):
-        df_copy['date'] = pd.to_datetime(df_copy['date'])
+    # Sentiment of each message (non-strings are scored as neutral), with the
+    # month of the message, using .dt.to_period('M') for month grouping
+    df_copy = pd.DataFrame({
+        'sentiment': label_sentiment(chat.sentiment['compound']),
+        'month': pd.to_datetime(chat.df['date']).dt.to_period('M'),
+    }, index=chat.df.index)
 
     # Group data by month and calculate positivity and negativity percentages
-    # Use .dt.to_period('M') for month grouping
-    df_copy['month'] = df_copy['date'].dt.to_period('M')
     monthly_sentiment = df_copy.groupby('month').agg(
-        positivity_percentage=('sentiment_score', lambda x: (x > 0.05).mean() * 100),
-        negativity_percentage=('sentiment_score', lambda x: (x < -0.05).mean() * 100)
+        positivity_percentage=('sentiment', lambda x: (x == 'Positive').mean() * 100),
+        negativity_percentage=('sentiment', lambda x: (x == 'Negative').mean() * 100)
     ).reset_index() # Reset index to make 'month' a column
 
     # Convert Period index to string for plotting
@@ -2624,24 +2330,19 @@ def calculate_monthly_sentiment_trend(df: pd.DataFrame) -> go.Figure:
 
     return fig
 
-def message_count_aggregated_graph(df: pd.DataFrame) -> Tuple[go.Figure, str]:
+def message_count_aggregated_graph(df: ChatData) -> Tuple[go.Figure, str]:
     """
     Creates a pie chart of message counts per user and identifies the user with the most messages.
 
     Args:
-        df: The preprocessed DataFrame containing chat data.
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it.
 
     Returns:
         Tuple[go.Figure, str]: A tuple containing:
             - fig: Plotly pie chart figure.
             - most_messages_winner: The username of the person who sent the most messages.
     """
-    df_copy = df.copy()
-    if 'date' in df_copy.index.names:
-        if 'date' in df_copy.columns:
-            pass
-        else:
-            df_copy = df_copy.reset_index(drop=True)
+    df_copy = ChatAnalysis.of(df).df
             
     # Filter out group notifications before counting
     user_df = df_copy[df_copy['user'] != 'group_notification']
@@ -2651,7 +2352,7 @@ def message_count_aggregated_graph(df: pd.DataFrame) -> Tuple[go.Figure, str]:
         fig = go.Figure().update_layout(title="No User Messages Found")
         return fig, "No users found"
 
-    subject_df = user_df.groupby('user')['message'].count().sort_values(ascending=False)
+    subject_df = user_df.groupby('user', observed=True)['message'].count().sort_values(ascending=False)
     
     if subject_df.empty:
         # Handle case where grouping resulted in empty series
@@ -2671,13 +2372,13 @@ def message_count_aggregated_graph(df: pd.DataFrame) -> Tuple[go.Figure, str]:
 
     return fig, most_messages_winner
 
-def conversation_starter_graph(df: pd.DataFrame) -> Tuple[go.Figure, str]:
+def conversation_starter_graph(df: ChatData) -> Tuple[go.Figure, str]:
     """
     Creates a pie chart showing the distribution of conversation starters 
     and identifies the most frequent starter.
 
     Args:
-        df: The preprocessed DataFrame containing chat data. 
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it.
             Requires a boolean column indicating conversation starts 
             (e.g., 'new_conversation') and a 'user' column.
 
@@ -2686,31 +2387,15 @@ def conversation_starter_graph(df: pd.DataFrame) -> Tuple[go.Figure, str]:
             - fig: Plotly pie chart figure.
             - most_frequent_starter: The username who started the most conversations.
     """
-    df_copy = df.copy()
-    
-    # Handle potential date/index ambiguity before any operations
-    if 'date' in df_copy.index.names:
-        if 'date' in df_copy.columns:
-            # If 'date' is both in index and columns, reset index and drop old date index
-            df_copy = df_copy.reset_index(drop=True)
-        else:
-             # If 'date' is only index, reset to make it a column
-             df_copy = df_copy.reset_index() # Keep date column
+    chat = ChatAnalysis.of(df)
+    df_copy = chat.df
 
-    # Ensure 'new_conversation' column exists, calculate if missing
-    # This calculation part is prone to the date error if not handled above
+    # Use the 'new_conversation' column if present, otherwise the conversations
+    # split at gaps of over an hour, the first message starting one
     if 'new_conversation' not in df_copy.columns:
-        print("Warning: 'new_conversation' column not found. Calculating based on 60-min threshold.")
-        # Ensure date is datetime for diff calculation
-        if not pd.api.types.is_datetime64_any_dtype(df_copy['date']):
-             df_copy['date'] = pd.to_datetime(df_copy['date'])
-             
-        df_copy = df_copy.sort_values('date') # Sort *after* resetting index if needed
-        df_copy['time_diff'] = df_copy['date'].diff().dt.total_seconds() / 60
-        conversation_threshold = 60
-        df_copy['new_conversation'] = df_copy['time_diff'] > conversation_threshold
-        # Handle the first message correctly
+        df_copy = chat.timeline
         if not df_copy.empty:
+            df_copy = df_copy.assign(new_conversation=df_copy['new_conversation'].copy())
             df_copy.iloc[0, df_copy.columns.get_loc('new_conversation')] = True 
         
     # Filter out group notifications
@@ -2721,7 +2406,7 @@ def conversation_starter_graph(df: pd.DataFrame) -> Tuple[go.Figure, str]:
 
     # Group by user and count the number of times they started a conversation
     # Use .size() which is robust and doesn't rely on other columns existing
-    subject_df = starters_df.groupby('user').size().sort_values(ascending=False)
+    subject_df = starters_df.groupby('user', observed=True).size().sort_values(ascending=False)
 
     if subject_df.empty:
         # Handle case with no conversation starters found
@@ -2741,43 +2426,29 @@ def conversation_starter_graph(df: pd.DataFrame) -> Tuple[go.Figure, str]:
     
     return fig, most_frequent_starter
 
-def conversation_size_aggregated_graph(df: pd.DataFrame) -> go.Figure:
+def conversation_size_aggregated_graph(df: ChatData) -> go.Figure:
     """
     Creates a line plot showing the average conversation size aggregated weekly over time.
 
     Args:
-        df: The preprocessed DataFrame containing chat data. 
+        df: The preprocessed DataFrame containing chat data, or a ``ChatAnalysis`` of it.
             Requires 'date' and 'message' columns. It will calculate 
             'conversation_id' if not present.
 
     Returns:
         go.Figure: Plotly line chart figure showing weekly average conversation size.
     """
-    df_copy = df.copy()
-    
-    # Handle potential date/index ambiguity before any operations
-    if 'date' in df_copy.index.names:
-        if 'date' in df_copy.columns:
-            df_copy = df_copy.reset_index(drop=True)
-        else:
-             df_copy = df_copy.reset_index()
+    chat = ChatAnalysis.of(df)
+    df_copy = chat.df
 
-    # Ensure 'conversation_id' exists, calculate if missing
+    # Use the 'conversation_id' column if present, otherwise the conversations
+    # split at gaps of over an hour
     if 'conversation_id' not in df_copy.columns:
-        print("Warning: 'conversation_id' column not found. Calculating based on 60-min threshold.")
-        if not pd.api.types.is_datetime64_any_dtype(df_copy['date']):
-             df_copy['date'] = pd.to_datetime(df_copy['date'])
-             
-        df_copy = df_copy.sort_values('date')
-        df_copy['time_diff'] = df_copy['date'].diff().dt.total_seconds() / 60
-        conversation_threshold = 60
-        # Use .fillna(True) for the first row's comparison to handle NaT diff
-        df_copy['new_conversation'] = (df_copy['time_diff'] > conversation_threshold).fillna(True)
-        df_copy['conversation_id'] = df_copy['new_conversation'].cumsum()
+        df_copy = chat.timeline
         
     # Ensure date is datetime for aggregation
     elif not pd.api.types.is_datetime64_any_dtype(df_copy['date']):
-        df_copy['date'] = pd.to_datetime(df_copy['date'])
+        df_copy = df_copy.assign(date=pd.to_datetime(df_copy['date']))
         
     # Group by conversation_id and aggregate size and mean date
     # Ensure we don't include group notifications in size calculation
@@ -2814,7 +2485,7 @@ def conversation_size_aggregated_graph(df: pd.DataFrame) -> go.Figure:
                       template='plotly_white')
     return fig
 
-def calculate_average_late_reply_time(df: pd.DataFrame, threshold_hours: int = 48) -> Tuple[go.Figure, pd.DataFrame, float]:
+def calculate_average_late_reply_time(df: ChatData, threshold_hours: int = 48) -> Tuple[go.Figure, pd.DataFrame, float]:
     """
     Calculate the average late reply time for users and display it with a graph.
 
@@ -2822,7 +2493,7 @@ def calculate_average_late_reply_time(df: pd.DataFrame, threshold_hours: int = 4
     from different users exceeds the specified threshold.
 
     Args:
-        df: DataFrame containing the chat data. Requires 'user' and 'date' columns.
+        df: DataFrame containing the chat data, or a ``ChatAnalysis`` of it. Requires 'user' and 'date' columns.
         threshold_hours: Number of hours to consider a reply as "late" (default: 48 hours).
 
     Returns:
@@ -2831,36 +2502,21 @@ def calculate_average_late_reply_time(df: pd.DataFrame, threshold_hours: int = 4
             - avg_late_reply_times_df: DataFrame with users and their average late reply times in hours.
             - overall_avg: The overall average late reply time in hours across all users.
     """
-    # Make a copy of the DataFrame to avoid modifying the original
-    df_copy = df.copy()
-    
-    # Handle potential date/index ambiguity *before* sorting
-    if 'date' in df_copy.index.names:
-        if 'date' in df_copy.columns:
-            # Ambiguous: Reset only the 'date' level from the index, discarding it
-            df_copy = df_copy.reset_index(level='date', drop=True)
-            # Reset any remaining index levels to columns if they exist
-            if not isinstance(df_copy.index, pd.RangeIndex): 
-                 df_copy = df_copy.reset_index()
-        else:
-             # Only in index: Reset all levels, making 'date' a column
-             df_copy = df_copy.reset_index()
+    # Messages sorted by date
+    df_copy = ChatAnalysis.of(df).timeline[['date', 'user', 'message']]
 
     # Filter out group notifications and media messages
     omitted_strings = ["image omitted", "media omitted", "video omitted", "sticker omitted", "audio omitted", "gif omitted"]
     df_copy = df_copy[(df_copy['user'] != 'group_notification') & 
                       (~df_copy['message'].str.lower().str.contains('|'.join(omitted_strings), na=False))]
 
-    # Ensure date is sorted
-    # Convert to datetime *just in case* before sorting
-    if not pd.api.types.is_datetime64_any_dtype(df_copy['date']):
-        df_copy['date'] = pd.to_datetime(df_copy['date'])
-    df_copy = df_copy.sort_values('date')
-
     # Calculate time difference and identify responses (similar to analyze_response_times)
-    df_copy['time_diff_minutes'] = df_copy['date'].diff().dt.total_seconds() / 60
-    df_copy['prev_user'] = df_copy['user'].shift(1)
-    df_copy['is_response'] = (df_copy['user'] != df_copy['prev_user']) & (~df_copy['prev_user'].isna())
+    prev_user = df_copy['user'].shift(1)
+    df_copy = df_copy.assign(
+        time_diff_minutes=df_copy['date'].diff().dt.total_seconds() / 60,
+        prev_user=prev_user,
+        is_response=(df_copy['user'] != prev_user) & (~prev_user.isna()),
+    )
     
     # Filter for actual responses
     responses = df_copy[df_copy['is_response']].copy()
@@ -2877,7 +2533,7 @@ def calculate_average_late_reply_time(df: pd.DataFrame, threshold_hours: int = 4
 
     # Calculate average late reply time (in minutes) for each user who made a late reply
     # Group by the user who *made* the late reply (df_copy['user'])
-    avg_late_reply_times = late_replies.groupby('user')['time_diff_minutes'].mean().reset_index()
+    avg_late_reply_times = late_replies.groupby('user', observed=True)['time_diff_minutes'].mean().reset_index()
     avg_late_reply_times.rename(columns={'time_diff_minutes': 'Reply Time'}, inplace=True)
 
     # Convert minutes to hours for better readability
@@ -2957,6 +2613,7 @@ __all__ = [
     'daily_timeline',
     'activity_heatmap',
     'analyze_sentiment',
+    'analyze_sentiment_batch',
     'calculate_sentiment_percentage',
     'analyze_reply_patterns',
     'analyze_message_types',
@@ -0,0 +1,283 @@
+"""
+On-disk caches of preprocessed WhatsApp chat DataFrames and of sentiment scores.
+
+Preprocessed chats are keyed on a hash of the raw export plus the library
+version, the schema version of the frame and the parser options, and stored as uncompressed Arrow (Feather)
+files so that they can be memory-mapped back. Requires the optional
+``pyarrow`` package.
+
+Sentiment scores are keyed on a hash of the message text plus the name and
+versions of the scorer and its lexicon, and stored in a SQLite database by
+``SentimentCache``.
+"""
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+# Total size the cache directory is trimmed to after every write
+MAX_CACHE_BYTES = 2 * 1024 ** 3
+
+# Number of scores a sentiment cache is kept under
+MAX_SENTIMENT_ENTRIES = 5_000_000
+
+# Version of the layout of preprocessed frames, part of their cache key.
+# Bump it whenever preprocessing changes the columns or dtypes of a frame.
+SCHEMA_VERSION = 2
+
+_SUFFIX = '.arrow'
+
+# Keys per SQLite statement, below its limit on bound parameters
+_BATCH = 500
+
+# Seconds within which a sentiment cache hit does not refresh its last use
+_TOUCH_INTERVAL = 3600
+
+def cache_key(data: Union[str, bytes, memoryview], **options: Any) -> str:
+    """
+    Compute the cache key of an export.
+
+    Args:
+        data: Raw export text or bytes
+        **options: Parser options that change the resulting DataFrame
+
+    Returns:
+        str: Hex digest of the export, the library and schema versions and the options
+    """
+    from . import __version__
+
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update(data.encode('utf-8', 'surrogatepass') if isinstance(data, str) else data)
+    hasher.update(repr((__version__, SCHEMA_VERSION, sorted(options.items()))).encode('utf-8'))
+    return hasher.hexdigest()
+
+def load(cache_dir: Union[str, os.PathLike], key: str) -> Optional[pd.DataFrame]:
+    """
+    Load a cached DataFrame, or return None on a cache miss.
+
+    Args:
+        cache_dir: Directory holding the cache
+        key: Cache key, as returned by ``cache_key``
+
+    Returns:
+        The cached DataFrame, indexed by date like ``preprocess`` output
+    """
+    feather = _feather()
+    path = os.path.join(cache_dir, key + _SUFFIX)
+    try:
+        table = feather.read_table(path, memory_map=True)
+    except FileNotFoundError:
+        return None
+
+    # Mark the entry as recently used for eviction
+    os.utime(path)
+    df = table.to_pandas()
+    df.index = df['date']
+    return df
+
+def store(cache_dir: Union[str, os.PathLike], key: str, df: pd.DataFrame,
+          max_bytes: Optional[int] = None) -> None:
+    """
+    Store a preprocessed DataFrame and evict least recently used entries.
+
+    Args:
+        cache_dir: Directory holding the cache
+        key: Cache key, as returned by ``cache_key``
+        df: The preprocessed DataFrame
+        max_bytes: Size cap of the cache directory, ``MAX_CACHE_BYTES`` by default
+    """
+    feather = _feather()
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Write to a temporary file first so readers never see a partial entry
+    handle, temp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    os.close(handle)
+    try:
+        feather.write_feather(df.reset_index(drop=True), temp_path, compression='uncompressed')
+        os.replace(temp_path, os.path.join(cache_dir, key + _SUFFIX))
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+    evict(cache_dir, MAX_CACHE_BYTES if max_bytes is None else max_bytes)
+
+def evict(cache_dir: Union[str, os.PathLike], max_bytes: int) -> None:
+    """
+    Remove least recently used entries until the cache fits in ``max_bytes``.
+
+    Args:
+        cache_dir: Directory holding the cache
+        max_bytes: Size cap of the cache directory
+    """
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and entry.name.endswith(_SUFFIX):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+class SentimentCache:
+    """
+    Persistent cache of per-message sentiment scores, in a SQLite database.
+
+    Scores are stored under a hash of the message text and of the scorer, a
+    tuple of its name and versions, so that upgrading the scorer or its
+    lexicon never returns stale scores. When the cache grows beyond
+    ``max_entries``, the least recently used scores are evicted, down to a
+    tenth below it.
+
+    Args:
+        path: Path of the database file, created if missing
+        max_entries: Number of scores to keep, ``MAX_SENTIMENT_ENTRIES`` by default
+
+    Example:
+        >>> with SentimentCache('sentiment.sqlite') as cache:
+        ...     scores = score_sentiment(df['message'], cache=cache)
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], max_entries: Optional[int] = None):
+        self.path = os.fspath(path)
+        self.max_entries = MAX_SENTIMENT_ENTRIES if max_entries is None else max_entries
+        # Upper bound on the number of scores, from the last count plus the puts since
+        self._count = None
+        self._connection = sqlite3.connect(self.path, timeout=30)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        with self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS scores '
+                                     '(key BLOB PRIMARY KEY, scores BLOB NOT NULL, last_used INTEGER NOT NULL) '
+                                     'WITHOUT ROWID')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)')
+
+    def __enter__(self) -> 'SentimentCache':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._connection.execute('SELECT COUNT(*) FROM scores').fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database."""
+        self._connection.close()
+
+    def get_many(self, texts: Sequence[Optional[str]], scorer: Tuple[str, ...],
+                 width: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Look up the scores of texts.
+
+        Args:
+            texts: Message texts; None entries are never found
+            scorer: Name and versions of the scorer
+            width: Number of scores per text
+
+        Returns:
+            tuple: (float32 array with one row of scores per text, NaN where
+                    missing, boolean array of which texts were found)
+        """
+        keys = _text_keys(texts, scorer)
+        found = {}
+        for batch in _batches([key for key in keys if key is not None]):
+            placeholders = ','.join('?' * len(batch))
+            found.update(self._connection.execute(
+                f'SELECT key, scores FROM scores WHERE key IN ({placeholders})', batch))
+
+        scores = np.full((len(texts), width), np.nan, dtype=np.float32)
+        hits = np.zeros(len(texts), dtype=bool)
+        for i, key in enumerate(keys):
+            value = found.get(key)
+            if value is not None:
+                scores[i] = np.frombuffer(value, dtype=np.float32)
+                hits[i] = True
+
+        # Mark the hits as recently used for eviction
+        now = int(time.time())
+        with self._connection:
+            for batch in _batches(list(found)):
+                placeholders = ','.join('?' * len(batch))
+                self._connection.execute(f'UPDATE scores SET last_used = ? WHERE key IN ({placeholders}) '
+                                         f'AND last_used < ?', [now, *batch, now - _TOUCH_INTERVAL])
+        return scores, hits
+
+    def put_many(self, texts: Sequence[Optional[str]], scores: np.ndarray, scorer: Tuple[str, ...]) -> None:
+        """
+        Store the scores of texts and evict least recently used scores.
+
+        Args:
+            texts: Message texts; None entries are skipped
+            scores: Array with one row of scores per text
+            scorer: Name and versions of the scorer
+        """
+        now = int(time.time())
+        scores = np.asarray(scores, dtype=np.float32)
+        rows = [(key, scores[i].tobytes(), now)
+                for i, key in enumerate(_text_keys(texts, scorer)) if key is not None]
+        if not rows:
+            return
+        with self._connection:
+            self._connection.executemany('INSERT OR REPLACE INTO scores VALUES (?, ?, ?)', rows)
+
+        # Only count the scores once the puts may have taken the cache over its limit
+        if self._count is not None:
+            self._count += len(rows)
+        if self._count is None or self._count > self.max_entries:
+            self.evict()
+
+    def evict(self) -> None:
+        """
+        Remove least recently used scores once there are more than ``max_entries``.
+
+        Scores are removed down to a tenth below ``max_entries``, so that the
+        next puts don't need to count the scores again.
+        """
+        count = len(self)
+        if count > self.max_entries:
+            excess = count - (self.max_entries - self.max_entries // 10)
+            with self._connection:
+                self._connection.execute('DELETE FROM scores WHERE key IN '
+                                         '(SELECT key FROM scores ORDER BY last_used LIMIT ?)', (excess,))
+            count -= excess
+        self._count = count
+
+def _text_keys(texts: Sequence[Optional[str]], scorer: Tuple[str, ...]) -> List[Optional[bytes]]:
+    """Helper function to hash message texts together with the scorer name and versions, None staying None."""
+    prefix = hashlib.blake2b(repr(tuple(scorer)).encode('utf-8'), digest_size=16)
+    keys = []
+    for text in texts:
+        if text is None:
+            keys.append(None)
+            continue
+        hasher = prefix.copy()
+        hasher.update(text.encode('utf-8', 'surrogatepass'))
+        keys.append(hasher.digest())
+    return keys
+
+def _batches(items: List[Any]) -> List[List[Any]]:
+    """Helper function to split items into batches that fit in one SQLite statement."""
+    return [items[start:start + _BATCH] for start in range(0, len(items), _BATCH)]
+
+def _feather():
+    """Helper function to import pyarrow's Feather module, which the cache depends on."""
+    try:
+        from pyarrow import feather
+    except ImportError as e:
+        raise ImportError("Caching preprocessed chats requires pyarrow. Install it with 'pip install pyarrow'.") from e
+    return feather
+
+__all__ = ['cache_key', 'load', 'store', 'evict', 'SentimentCache', 'MAX_CACHE_BYTES', 'MAX_SENTIMENT_ENTRIES',
+           'SCHEMA_VERSION']
@@ -2,19 +2,228 @@
 Preprocessor module for WhatsApp chat data.
 """
 
+import codecs
+import copy
+import io
+import itertools
+import os
 import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from mmap import mmap as memory_map, ACCESS_READ
 import pandas as pd
 import numpy as np
 from dateutil.parser import parse
-from sklearn.preprocessing import OrdinalEncoder
-from typing import Tuple, List
+from . import cache, profiling
+from .profiling import PreprocessProfile
+from typing import Dict, Iterable, Iterator, Mapping, Optional, Tuple, List, Union
 
-def preprocess(data: str) -> pd.DataFrame:
+# Bytes-like buffers that can be parsed without decoding them first
+BytesLike = Union[bytes, bytearray, memoryview, memory_map]
+
+# Whitespace matched by ``\s`` in the text regexes, as UTF-8 bytes
+# (ASCII whitespace, no-break space and narrow no-break space)
+_UTF8_WHITESPACE = r'(?:\s|\xc2\xa0|\xe2\x80\xaf)'
+
+class ChatFormat:
+    """
+    A WhatsApp export format, holding the compiled regex that matches a message header.
+
+    The regex captures the bare timestamp in a ``timestamp`` group, so a single
+    ``finditer`` pass yields both the timestamps and the message bodies.
+    ``datetime_format`` is the strptime format of those timestamps once passed
+    through ``clean``; it stays None until the day/month order has been
+    decided with ``resolve``. ``byte_regex`` is the same regex for UTF-8
+    encoded buffers.
+
+    Formats are tried by ``detect_format`` in registration order. Register
+    additional ones with ``register_format``, and subclass to override
+    ``clean`` for timestamps that need more than whitespace normalization.
+
+    Args:
+        name: Unique name of the format
+        pattern: Regex matching a message header, with a ``timestamp`` group
+        time_format: strptime format of the time part of the timestamps
+        date_separator: Separator between the day, month and year of the dates
+    """
+
+    def __init__(self, name: str, pattern: str, time_format: str, date_separator: str = '/'):
+        self.name = name
+        self.regex = re.compile(pattern)
+        self.byte_regex = re.compile(pattern.replace(r'\s', _UTF8_WHITESPACE).encode())
+        self.time_format = time_format
+        self.date_separator = date_separator
+        self.day_first = None
+        self.datetime_format = None
+
+    def __repr__(self) -> str:
+        return f"ChatFormat({self.name!r}, datetime_format={self.datetime_format!r})"
+
+    def resolve(self, timestamps: Iterable[str]) -> 'ChatFormat':
+        """
+        Return a copy of this format with its strptime format decided from sample timestamps.
+
+        Dates are day-first if any sampled date starts with a number above 12
+        and month-first if any has a second number above 12. When the sample
+        doesn't settle it, ``day_first`` stays None and month-first is assumed.
+        """
+        day_first = self.day_first
+        long_year = True
+        for timestamp in timestamps:
+            match = _DATE_PARTS.match(timestamp)
+            if match is None:
+                continue
+            first, second, year = match.groups()
+            if day_first is None and int(first) > 12:
+                day_first = True
+            elif day_first is None and int(second) > 12:
+                day_first = False
+            long_year = long_year and len(year) == 4
+        separator = self.date_separator
+        date_format = f"%d{separator}%m" if day_first else f"%m{separator}%d"
+        year_format = '%Y' if long_year else '%y'
+
+        resolved = copy.copy(self)
+        resolved.day_first = day_first
+        resolved.datetime_format = f"{date_format}{separator}{year_format}, {self.time_format}"
+        return resolved
+
+    def sniff(self, sample: str) -> bool:
+        """Return True if the sample contains a message header in this format."""
+        return self.regex.search(sample) is not None
+
+    def clean(self, timestamp: str) -> str:
+        """
+        Normalize a captured timestamp before it is parsed with ``datetime_format``.
+
+        Runs of whitespace, including the no-break and narrow no-break
+        spaces newer exports put before AM/PM, become a single space.
+        """
+        return _WHITESPACE.sub(' ', timestamp)
+
+    def split(self, data: str) -> pd.DataFrame:
+        """Split raw export text into message bodies and timestamps in one pass."""
+        dates = []
+        bounds = []
+        for match in self.regex.finditer(data):
+            dates.append(match.group('timestamp'))
+            bounds.append((match.start(), match.end()))
+        ends = [start for start, _ in bounds[1:]] + [len(data)]
+        messages = [data[body_start:body_end] for (_, body_start), body_end in zip(bounds, ends)]
+        return pd.DataFrame({'user_message': messages, 'message_date': dates})
+
+    def split_bytes(self, data: BytesLike) -> pd.DataFrame:
+        """
+        Split a UTF-8 encoded export in one pass, decoding only timestamps and message bodies.
+
+        Line endings in the bodies are normalized to ``\\n``, as when the export
+        is read as text. Malformed bytes are replaced with U+FFFD, so a
+        corrupted message doesn't abort the whole export.
+        """
+        dates = []
+        bounds = []
+        for match in self.byte_regex.finditer(data):
+            dates.append(str(match.group('timestamp'), 'utf-8'))
+            bounds.append((match.start(), match.end()))
+        ends = [start for start, _ in bounds[1:]] + [len(data)]
+        messages = [str(data[body_start:body_end], 'utf-8', 'replace')
+                    for (_, body_start), body_end in zip(bounds, ends)]
+        if data.find(b'\r') != -1:
+            messages = [message.replace('\r\n', '\n').replace('\r', '\n') for message in messages]
+        return pd.DataFrame({'user_message': messages, 'message_date': dates})
+
+_DATE_PARTS = re.compile(r'(\d{1,2})[/.\-](\d{1,2})[/.\-](\d{2,4})')
+_WHITESPACE = re.compile(r'\s+')
+
+ANDROID_24HR = ChatFormat('android_24hr', r'(?P<timestamp>\d{1,2}/\d{1,2}/\d{2,4},\s\d{1,2}:\d{2})\s*-\s*',
+                          '%H:%M')
+ANDROID_12HR = ChatFormat('android_12hr', r'(?P<timestamp>\d{1,2}/\d{1,2}/\d{2,4},\s\d{1,2}:\d{2}\s(?:am|pm|AM|PM))\s*-\s*',
+                          '%I:%M %p')
+IOS_12HR = ChatFormat('ios_12hr', r'\[(?P<timestamp>\d{1,2}/\d{1,2}/\d{2,4},\s\d{1,2}:\d{2}:\d{2}\s(?:AM|PM))\]',
+                      '%I:%M:%S %p')
+IOS_24HR = ChatFormat('ios_24hr', r'\[(?P<timestamp>\d{1,2}/\d{1,2}/\d{2,4},\s\d{1,2}:\d{2}:\d{2})\]',
+                      '%H:%M:%S')
+# Dotted dates, as written by German, Russian and other European locales
+ANDROID_24HR_DOTTED = ChatFormat('android_24hr_dotted',
+                                 r'(?P<timestamp>\d{1,2}\.\d{1,2}\.\d{2,4},\s\d{1,2}:\d{2})\s*-\s*',
+                                 '%H:%M', date_separator='.')
+IOS_24HR_DOTTED = ChatFormat('ios_24hr_dotted',
+                             r'\[(?P<timestamp>\d{1,2}\.\d{1,2}\.\d{2,4},\s\d{1,2}:\d{2}:\d{2})\]',
+                             '%H:%M:%S', date_separator='.')
+
+# Separator between the sender and the text of a message
+_USER_SEPARATOR = r'([\w\W]+?):\s'
+
+# Registered formats, in detection order
+_FORMATS = [ANDROID_24HR, ANDROID_12HR, IOS_12HR, IOS_24HR, ANDROID_24HR_DOTTED, IOS_24HR_DOTTED]
+
+# Number of leading lines inspected to detect the format of an export
+SNIFF_LINES = 200
+
+# Byte order marks of the encodings recognized in raw exports. UTF-32 comes
+# first since its little-endian mark starts with the UTF-16 one.
+_BOMS = [(codecs.BOM_UTF32_LE, 'utf-32'), (codecs.BOM_UTF32_BE, 'utf-32'),
+         (codecs.BOM_UTF8, 'utf-8'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16')]
+
+# Number of leading bytes inspected to detect the encoding of a raw export
+_ENCODING_SNIFF_BYTES = 4096
+
+# Categories of the compact calendar columns, in calendar order
+_MONTHS = pd.CategoricalDtype(['January', 'February', 'March', 'April', 'May', 'June', 'July',
+                               'August', 'September', 'October', 'November', 'December'], ordered=True)
+_DAY_NAMES = pd.CategoricalDtype(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday',
+                                  'Saturday', 'Sunday'], ordered=True)
+# Hour-long periods, the n-th starting at hour n
+_PERIODS = pd.CategoricalDtype(['00-1'] + [f"{hour}-{hour + 1}" for hour in range(1, 23)] + ['23-00'],
+                               ordered=True)
+
+# Time-based columns derived from the message dates, in column order
+CALENDAR_FIELDS = ('only_date', 'year', 'month_num', 'month', 'day', 'day_name', 'hour', 'minute', 'period')
+
+# How long before the last known message ``append`` starts parsing a
+# re-export, to allow for messages slightly out of timestamp order
+_APPEND_SLACK = pd.Timedelta(days=1)
+
+def preprocess(data: Union[str, BytesLike], chat_format: Optional[ChatFormat] = None,
+               user_columns: bool = False, workers: int = 1,
+               cache_dir: Optional[Union[str, os.PathLike]] = None,
+               compact: bool = True, calendar_columns: bool = True,
+               profile: Optional[PreprocessProfile] = None) -> pd.DataFrame:
     """
     Preprocess WhatsApp chat data from a text export.
     
     Args:
-        data: Raw text data from WhatsApp chat export
+        data: Raw text data from WhatsApp chat export, or the raw bytes of
+            the export file (``bytes``, ``bytearray`` or ``memoryview``, such
+            as an upload buffer). The encoding of raw bytes is detected from
+            their byte order mark, or the zero bytes of BOM-less UTF-16, and
+            defaults to UTF-8. UTF-8 exports are parsed without decoding them
+            as a whole, and malformed bytes are replaced instead of raising.
+        chat_format: Format of the export, as returned by ``detect_format``.
+            Detected from the first lines of ``data`` when omitted.
+        user_columns: Also add the legacy wide layout, with a 0/1 indicator
+            column and a ``<user>_mlength`` column for every user. Only
+            suitable for small chats; see ``user_indicators`` otherwise.
+        workers: Number of processes to parse the export with. The export is
+            cut into one piece per worker at message boundaries, and columns
+            that depend on neighbouring messages are computed afterwards over
+            the whole chat.
+        cache_dir: Directory of an on-disk cache of preprocessed chats. When
+            set, the result is looked up by a hash of ``data`` and the parser
+            options, and stored there on a miss. Requires pyarrow.
+        compact: Use compact dtypes: int8/int16 calendar fields, int32
+            ``Message Length``, ordered categoricals for ``month``,
+            ``day_name`` and ``period``, and a datetime64 ``only_date``.
+            Set to False for the legacy int64, string and ``datetime.date``
+            columns.
+        calendar_columns: Add the time-based columns (``only_date``,
+            ``year``, ``month_num``, ``month``, ``day``, ``day_name``,
+            ``hour``, ``minute`` and ``period``). When False they are left
+            out, and computed on first use through the ``df.wa`` accessor.
+        profile: Records the wall time, row counts and peak memory of each
+            preprocessing stage into this ``PreprocessProfile``.
         
     Returns:
         pd.DataFrame: Processed DataFrame with chat data
@@ -23,155 +232,808 @@ def preprocess(data: str) -> pd.DataFrame:
         >>> with open('chat.txt', 'r', encoding='utf-8') as file:
         ...     chat_data = file.read()
         >>> df = preprocess(chat_data)
+        >>> df = preprocess(uploaded_file.getvalue())
     """
-    # Define patterns for different formats
-    android_12hr_pattern = r'\d{1,2}/\d{1,2}/\d{2,4},\s\d{1,2}:\d{2}\s(?:am|pm|AM|PM)\s*-\s*'
-    android_24hr_pattern = r'\d{1,2}/\d{1,2}/\d{2,4},\s\d{1,2}:\d{2}\s*-\s*'
-    ios_12hr_pattern = r'\[\d{1,2}/\d{1,2}/\d{2,4},\s\d{1,2}:\d{2}:\d{2}\s(?:AM|PM)\]'
-    ios_24hr_pattern = r'\[\d{1,2}/\d{1,2}/\d{2,4},\s\d{1,2}:\d{2}:\d{2}\]'
-    
-    # Try to detect the format
-    if re.search(android_24hr_pattern, data):
-        pattern = android_24hr_pattern
-        messages = re.split(pattern, data)[1:]
-        dates = re.findall(pattern, data)
-        df = pd.DataFrame({'user_message': messages, 'message_date': dates})
-        df['message_date'] = df['message_date'].apply(lambda x: x.strip('- '))
-    
-    elif re.search(android_12hr_pattern, data):
-        pattern = android_12hr_pattern
-        messages = re.split(pattern, data)[1:]
-        dates = re.findall(pattern, data)
-        df = pd.DataFrame({'user_message': messages, 'message_date': dates})
-        df['message_date'] = df['message_date'].apply(lambda x: x.strip('- '))
-    
-    elif re.search(ios_12hr_pattern, data):
-        pattern = ios_12hr_pattern
-        messages = re.split(pattern, data)[1:]
-        dates = re.findall(pattern, data)
-        df = pd.DataFrame({'user_message': messages, 'message_date': dates})
-        df['message_date'] = df['message_date'].apply(lambda x: re.sub(r'[\[\]]', '', x))
-    
-    elif re.search(ios_24hr_pattern, data):
-        pattern = ios_24hr_pattern
-        messages = re.split(pattern, data)[1:]
-        dates = re.findall(pattern, data)
-        df = pd.DataFrame({'user_message': messages, 'message_date': dates})
-        df['message_date'] = df['message_date'].apply(lambda x: re.sub(r'[\[\]]', '', x))
-    
+    return _preprocess(data, chat_format, user_columns, workers, cache_dir, compact, calendar_columns, profile)
+
+def preprocess_stream(source: Union[str, Iterable[str]], chunk_size: int = 50000,
+                      chat_format: Optional[ChatFormat] = None,
+                      user_columns: bool = False, compact: bool = True,
+                      calendar_columns: bool = True,
+                      profile: Optional[PreprocessProfile] = None) -> Iterator[pd.DataFrame]:
+    """
+    Preprocess a WhatsApp chat export incrementally, yielding DataFrame chunks.
+
+    Lines are read one at a time and multi-line messages are stitched back
+    together, so peak memory is bounded by ``chunk_size`` rather than by the
+    size of the export. Conversation and reply columns are carried across
+    chunk boundaries, so concatenating the chunks gives the same rows as
+    ``preprocess``. The categories of the ``user`` column, and the legacy
+    per-user columns, only cover the users present in each chunk, so
+    re-encode ``user`` with ``astype('category')`` after ``pd.concat``.
+
+    The day/month order of dates is decided from the first lines, or from the
+    first chunk whose dates settle it. Chunks read before that are held back
+    and yielded once it is decided, so memory is only bounded by
+    ``chunk_size`` once a date with a day above 12 has been read. If no date
+    settles it, dates are month-first, as in ``preprocess``. Pass a
+    ``chat_format`` cached from an earlier run to fix it up front.
+
+    Args:
+        source: An open text file, an iterable of lines (with their line
+            endings, as produced by iterating a file) or a string
+        chunk_size: Number of messages per yielded DataFrame
+        chat_format: Format of the export, as returned by ``detect_format``.
+            Detected from the first lines of ``source`` when omitted.
+        user_columns: Also add the legacy per-user columns, as in ``preprocess``
+        compact: Use compact dtypes, as in ``preprocess``
+        calendar_columns: Add the time-based columns, as in ``preprocess``
+        profile: Records the stages of every chunk, as in ``preprocess``
+
+    Yields:
+        pd.DataFrame: Processed chunks with the same schema as ``preprocess``
+
+    Example:
+        >>> with open('chat.txt', 'r', encoding='utf-8') as file:
+        ...     for chunk in preprocess_stream(file):
+        ...         print(len(chunk))
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer.")
+    if isinstance(source, str):
+        source = io.StringIO(source)
+
+    lines = iter(source)
+    head = list(itertools.islice(lines, SNIFF_LINES))
+    if chat_format is None:
+        with profiling.stage(profile, 'detect_format'):
+            chat_format = detect_format(head)
+    regex = chat_format.regex
+
+    buffer = []
+    count = 0
+    previous = None
+    pending = []
+    for line in itertools.chain(head, lines):
+        starts = regex.findall(line)
+        if starts and count >= chunk_size:
+            # Cut right before the first message starting on this line
+            cut = regex.search(line).start()
+            buffer.append(line[:cut])
+            pending.append(''.join(buffer))
+            chat_format = _settle_date_order(pending[-1], chat_format)
+            buffer = [line[cut:]]
+            count = 0
+        else:
+            buffer.append(line)
+        count += len(starts)
+
+        # Chunks are held back while the date order is undecided, so that
+        # none of them is yielded with dates parsed in the wrong order
+        if pending and chat_format.day_first is not None:
+            for data in pending:
+                df, previous, chat_format = _process_chunk(data, chat_format, previous, user_columns,
+                                                           compact, calendar_columns, profile)
+                yield df
+            pending = []
+
+    if count:
+        pending.append(''.join(buffer))
+    if pending:
+        chat_format = _settle_date_order(pending[-1], chat_format)
+    for data in pending:
+        df, previous, chat_format = _process_chunk(data, chat_format, previous, user_columns,
+                                                   compact, calendar_columns, profile)
+        yield df
+
+def preprocess_file(path: Union[str, os.PathLike], encoding: str = 'utf-8', mmap: bool = True,
+                    chat_format: Optional[ChatFormat] = None,
+                    user_columns: bool = False, workers: int = 1,
+                    cache_dir: Optional[Union[str, os.PathLike]] = None,
+                    compact: bool = True, calendar_columns: bool = True,
+                    profile: Optional[PreprocessProfile] = None) -> pd.DataFrame:
+    """
+    Preprocess a WhatsApp chat export straight from a file.
+
+    UTF-8 exports are memory-mapped and the format regex runs over the raw
+    bytes, so only the message bodies are decoded and the export is never
+    held as one string. Repeated ingests of the same file are then served by
+    the OS page cache. Exports in other encodings are read as text.
+
+    Args:
+        path: Path to the exported chat file
+        encoding: Text encoding of the export
+        mmap: Memory-map the file instead of reading it into memory
+        chat_format: Format of the export, as returned by ``detect_format``.
+            Detected from the first lines of the file when omitted.
+        user_columns: Also add the legacy per-user columns, as in ``preprocess``
+        workers: Number of processes to parse the export with, as in ``preprocess``
+        cache_dir: Directory of an on-disk cache of preprocessed chats, as in
+            ``preprocess``
+        compact: Use compact dtypes, as in ``preprocess``
+        calendar_columns: Add the time-based columns, as in ``preprocess``
+        profile: Records the preprocessing stages, as in ``preprocess``
+
+    Returns:
+        pd.DataFrame: Processed DataFrame with chat data
+
+    Example:
+        >>> df = preprocess_file('chat.txt', cache_dir='.chat_cache')
+    """
+    if codecs.lookup(encoding).name != 'utf-8':
+        with open(path, 'r', encoding=encoding) as file:
+            return preprocess(file.read(), chat_format, user_columns, workers, cache_dir, compact,
+                              calendar_columns, profile)
+
+    with open(path, 'rb') as file:
+        if mmap and os.fstat(file.fileno()).st_size:
+            with memory_map(file.fileno(), 0, access=ACCESS_READ) as buffer:
+                return _preprocess(buffer, chat_format, user_columns, workers, cache_dir, compact,
+                                   calendar_columns, profile)
+        return _preprocess(file.read(), chat_format, user_columns, workers, cache_dir, compact,
+                           calendar_columns, profile)
+
+def preprocess_zip(path: Union[str, os.PathLike], encoding: str = 'utf-8',
+                   chat_format: Optional[ChatFormat] = None,
+                   user_columns: bool = False, compact: bool = True,
+                   calendar_columns: bool = True,
+                   profile: Optional[PreprocessProfile] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Preprocess a WhatsApp ``.zip`` export without extracting it to disk.
+
+    The chat text member (``_chat.txt`` on iOS, ``WhatsApp Chat with ....txt``
+    on Android) is decompressed in memory and parsed directly. The other
+    members are indexed from the archive's directory, without being read.
+
+    Args:
+        path: Path to the zipped export
+        encoding: Text encoding of the chat text
+        chat_format: Format of the export, as returned by ``detect_format``.
+            Detected from the first lines of the chat when omitted.
+        user_columns: Also add the legacy per-user columns, as in ``preprocess``
+        compact: Use compact dtypes, as in ``preprocess``
+        calendar_columns: Add the time-based columns, as in ``preprocess``
+        profile: Records the preprocessing stages, as in ``preprocess``
+
+    Returns:
+        tuple: (processed DataFrame with chat data,
+                DataFrame of media attachments with name, extension, size,
+                compressed_size and modified columns)
+
+    Example:
+        >>> df, media = preprocess_zip('WhatsApp Chat - Friends.zip')
+    """
+    with zipfile.ZipFile(path) as archive:
+        members = [info for info in archive.infolist()
+                   if not info.is_dir() and not info.filename.startswith('__MACOSX/')]
+        chat_member = _find_chat_member(members)
+        if chat_member is None:
+            raise ValueError("No chat text file found in the zip export.")
+        data = archive.read(chat_member)
+
+    if codecs.lookup(encoding).name == 'utf-8':
+        df = _preprocess(data, chat_format, user_columns, compact=compact, calendar_columns=calendar_columns,
+                         profile=profile)
+    else:
+        df = preprocess(_decode(data, encoding), chat_format, user_columns, compact=compact, calendar_columns=calendar_columns,
+                        profile=profile)
+
+    attachments = [info for info in members if info is not chat_member]
+    media = pd.DataFrame({
+        'name': [info.filename for info in attachments],
+        'extension': [os.path.splitext(info.filename)[1].lstrip('.').lower() for info in attachments],
+        'size': [info.file_size for info in attachments],
+        'compressed_size': [info.compress_size for info in attachments],
+        'modified': pd.to_datetime([datetime(*info.date_time) for info in attachments]),
+    })
+    return df, media
+
+def preprocess_many(sources: Union[Iterable[Union[str, os.PathLike]], Mapping[str, Union[str, os.PathLike]]],
+                    workers: Optional[int] = None,
+                    encoding: str = 'utf-8') -> Tuple[pd.DataFrame, Dict[str, str], Dict[str, float]]:
+    """
+    Preprocess many WhatsApp chat exports in parallel into one DataFrame.
+
+    Each export is parsed with ``preprocess_file``, or ``preprocess_zip`` for
+    ``.zip`` exports, in a process pool. A chat that fails to parse is
+    recorded in the returned errors instead of aborting the batch.
+
+    Args:
+        sources: Paths of the exports, or a mapping of chat ids to paths.
+            When only paths are given, each path is used as its chat id.
+        workers: Number of processes to use (defaults to the number of CPUs);
+            1 parses the exports in the current process
+        encoding: Text encoding of the exports
+
+    Returns:
+        tuple: (DataFrame of all chats with a categorical ``chat_id`` column,
+                dict of chat id to error message for the chats that failed,
+                dict of throughput statistics)
+
+    Example:
+        >>> df, errors, stats = preprocess_many(['chat1.txt', 'chat2.txt'])
+        >>> print(f"{stats['messages_per_second']:.0f} messages/s")
+    """
+    if isinstance(sources, Mapping):
+        chat_ids, paths = list(sources.keys()), list(sources.values())
+    else:
+        paths = list(sources)
+        chat_ids = [os.fspath(path) for path in paths]
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = list(map(_preprocess_source, paths, itertools.repeat(encoding)))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunksize = max(1, len(paths) // (4 * (workers or os.cpu_count() or 1)))
+            results = list(executor.map(_preprocess_source, paths, itertools.repeat(encoding),
+                                        chunksize=chunksize))
+    seconds = time.perf_counter() - start
+
+    frames = []
+    errors = {}
+    total_bytes = 0
+    for chat_id, (df, error, size) in zip(chat_ids, results):
+        if error is not None:
+            errors[chat_id] = error
+            continue
+        df.insert(0, 'chat_id', chat_id)
+        frames.append(df)
+        total_bytes += size
+
+    if frames:
+        df = pd.concat(frames)
+        df['user'] = df['user'].astype('category')
+    else:
+        df = pd.DataFrame(columns=['chat_id'])
+    df['chat_id'] = pd.Categorical(df['chat_id'], categories=pd.unique(pd.Series(chat_ids)))
+
+    megabytes = total_bytes / 1e6
+    stats = {
+        'chats': len(frames),
+        'failed': len(errors),
+        'messages': len(df),
+        'megabytes': megabytes,
+        'seconds': seconds,
+        'messages_per_second': len(df) / seconds if seconds else 0.0,
+        'mb_per_second': megabytes / seconds if seconds else 0.0,
+    }
+    return df, errors, stats
+
+def append(existing: pd.DataFrame, new_export: Union[str, BytesLike],
+           chat_format: Optional[ChatFormat] = None) -> pd.DataFrame:
+    """
+    Add the new messages of a re-exported chat to its preprocessed DataFrame.
+
+    The last message of ``existing`` is used as a watermark: the message
+    starts of the new export are binary searched by timestamp for it, and
+    only the messages after it are parsed. Conversation, reply and sender
+    columns of the new messages are continued from the last existing message,
+    so the existing rows are left as they are.
+
+    Args:
+        existing: DataFrame returned by ``preprocess`` for an earlier export
+            of the chat
+        new_export: Full raw text of the newer export, or a UTF-8 encoded
+            bytes-like buffer
+        chat_format: Format of the export, as returned by ``detect_format``.
+            Pass the format the chat was first parsed with so that dates are
+            read in the same day/month order; detected when omitted.
+
+    Returns:
+        pd.DataFrame: ``existing`` followed by the new messages, or
+        ``existing`` itself if the export has no new messages
+
+    Raises:
+        ValueError: If the last message of ``existing`` is not in the new export
+
+    Example:
+        >>> df = preprocess(old_text)
+        >>> df = append(df, new_text)
+    """
+    # Keep the layout and dtypes of the existing frame
+    user_columns = any(isinstance(column, str) and column.endswith('_mlength') for column in existing.columns)
+    compact = existing['Message Length'].dtype != np.int64
+    calendar_columns = 'hour' in existing.columns
+    if not isinstance(new_export, str):
+        new_export = _prepare_buffer(new_export)
+    if existing.empty:
+        return _preprocess(new_export, chat_format, user_columns, compact=compact, calendar_columns=calendar_columns)
+
+    if chat_format is None:
+        chat_format = detect_format(new_export)
+    chat_format = _settle_date_order(new_export, chat_format)
+
+    # Identical messages can repeat within a minute, so the watermark is the
+    # n-th occurrence of the last message at its timestamp
+    last = existing.iloc[-1]
+    occurrence = int(((existing['date'] == last['date']) & (existing['user'] == last['user'])
+                      & (existing['message'] == last['message'])).sum())
+
+    start = _find_resume_offset(new_export, chat_format, last['date'] - _APPEND_SLACK)
+    tail = _parse_chunk(new_export[start:], chat_format)
+    position = _find_watermark(tail, last, occurrence)
+    if position is None and start:
+        # The export is too far out of timestamp order, search all of it
+        tail = _parse_chunk(new_export, chat_format)
+        position = _find_watermark(tail, last, occurrence)
+    if position is None:
+        raise ValueError("The new export does not contain the last message of the existing chat.")
+
+    new = tail.iloc[position + 1:].copy()
+    if new.empty:
+        return existing
+    previous = existing.iloc[-1:][['date', 'user', 'message', 'Message Length', 'Conv code']]
+    new = _add_feature_columns(_continue_sequence(new, previous), user_columns, compact, calendar_columns)
+
+    df = pd.concat([existing, new])
+    for column in existing.select_dtypes('category').columns:
+        df[column] = df[column].astype('category')
+    if user_columns:
+        # Users who only appear in one of the two frames have no column in the other
+        indicators = [column for user in df['user'].cat.categories
+                      for column in (user, f"{user}_mlength") if column in df.columns]
+        df[indicators] = df[indicators].fillna(0).astype(np.int64)
+    return df
+
+def detect_format(data: Union[str, Iterable[str]], max_lines: int = SNIFF_LINES) -> ChatFormat:
+    """
+    Detect the format of a WhatsApp chat export from its first lines.
+
+    Only a bounded prefix is inspected, so detection cost does not grow with
+    the size of the export. The day/month order of the dates is decided from
+    the same lines when they settle it, and otherwise from the timestamps of
+    the whole export once it is split. The returned object can be cached per chat source and
+    passed back to ``preprocess`` or ``preprocess_stream``.
+
+    Args:
+        data: Raw export text, the raw bytes of the export, or an iterable
+            of lines
+        max_lines: Number of leading lines to inspect
+
+    Returns:
+        ChatFormat: The detected format
+
+    Raises:
+        ValueError: If no supported format matches the inspected lines
+    """
+    if isinstance(data, str):
+        sample = _head(data, '\n', max_lines)
+    elif isinstance(data, (bytes, bytearray, memoryview, memory_map)):
+        data = _as_buffer(data)
+        encoding = _detect_encoding(data)
+        if encoding == 'utf-8':
+            sample = str(_head(data, b'\n', max_lines), 'utf-8', 'replace')
+        else:
+            sample = _head(_decode(data[:max_lines * 1024], encoding), '\n', max_lines)
+    else:
+        sample = ''.join(itertools.islice(data, max_lines))
+
+    for chat_format in _FORMATS:
+        if chat_format.sniff(sample):
+            return chat_format.resolve(match.group('timestamp') for match in chat_format.regex.finditer(sample))
+    raise ValueError("Unsupported WhatsApp chat format. Please ensure your chat export is from WhatsApp and follows either Android or iOS format.")
+
+def register_format(chat_format: ChatFormat, first: bool = False) -> ChatFormat:
+    """
+    Register an export format for ``detect_format``.
+
+    Args:
+        chat_format: The format to register
+        first: Try the format before the registered ones instead of after
+            them, for headers that an existing format would also match
+
+    Returns:
+        ChatFormat: ``chat_format``, so that this can be used when defining it
+
+    Raises:
+        ValueError: If a format with the same name is already registered
+
+    Example:
+        >>> ANDROID_24HR_DASHED = register_format(ChatFormat(
+        ...     'android_24hr_dashed', r'(?P<timestamp>\\d{1,2}-\\d{1,2}-\\d{2,4},\\s\\d{1,2}:\\d{2})\\s*-\\s*',
+        ...     '%H:%M', date_separator='-'))
+    """
+    if any(registered.name == chat_format.name for registered in _FORMATS):
+        raise ValueError(f"A chat format named {chat_format.name!r} is already registered.")
+    _FORMATS.insert(0 if first else len(_FORMATS), chat_format)
+    return chat_format
+
+def registered_formats() -> List[ChatFormat]:
+    """
+    Get the registered export formats, in detection order.
+
+    Returns:
+        list: The registered formats
+    """
+    return list(_FORMATS)
+
+def _preprocess_source(path: Union[str, os.PathLike],
+                       encoding: str) -> Tuple[Optional[pd.DataFrame], Optional[str], int]:
+    """Helper function to preprocess one export of a batch, returning the error instead of raising it."""
+    try:
+        if zipfile.is_zipfile(path):
+            df, _ = preprocess_zip(path, encoding=encoding)
+        else:
+            df = preprocess_file(path, encoding=encoding)
+        return df, None, os.path.getsize(path)
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}", 0
+
+def _find_chat_member(members: List[zipfile.ZipInfo]) -> Optional[zipfile.ZipInfo]:
+    """Helper function to pick the chat text file among the members of a zip export."""
+    texts = [info for info in members if info.filename.lower().endswith('.txt')]
+    for info in texts:
+        if os.path.basename(info.filename) == '_chat.txt':
+            return info
+    for info in texts:
+        if os.path.basename(info.filename).startswith('WhatsApp Chat'):
+            return info
+    return max(texts, key=lambda info: info.file_size, default=None)
+
+def _head(data: Union[str, BytesLike], newline: Union[str, bytes], max_lines: int) -> Union[str, bytes]:
+    """Helper function to cut the first lines off an export without scanning the rest of it."""
+    end = -1
+    for _ in range(max_lines):
+        end = data.find(newline, end + 1)
+        if end == -1:
+            break
+    return data[:] if end == -1 else data[:end + 1]
+
+def _as_buffer(data: BytesLike) -> BytesLike:
+    """Helper function to unwrap a memoryview over a whole buffer, copying views of part of one."""
+    if not isinstance(data, memoryview):
+        return data
+    base = data.obj
+    if isinstance(base, (bytes, bytearray, memory_map)) and data.c_contiguous and data.nbytes == len(base):
+        return base
+    return data.tobytes()
+
+def _detect_encoding(data: BytesLike) -> str:
+    """Helper function to detect the encoding of a raw export from its byte order mark or first bytes."""
+    prefix = bytes(data[:_ENCODING_SNIFF_BYTES])
+    for bom, encoding in _BOMS:
+        if prefix.startswith(bom):
+            return encoding
+    # Text with no byte order mark is UTF-16 if every other byte of its
+    # ASCII characters is zero; zero bytes never occur in UTF-8 text
+    zeros = prefix.count(0)
+    if zeros and zeros >= len(prefix) // 4:
+        return 'utf-16-le' if prefix[1::2].count(0) >= prefix[::2].count(0) else 'utf-16-be'
+    return 'utf-8'
+
+def _decode(data: BytesLike, encoding: str) -> str:
+    """Helper function to decode a whole export, replacing malformed bytes and normalizing line endings."""
+    return str(data, encoding, 'replace').replace('\r\n', '\n').replace('\r', '\n')
+
+def _prepare_buffer(data: BytesLike) -> Union[str, BytesLike]:
+    """Helper function to pass UTF-8 buffers on to the byte regexes and decode those in other encodings."""
+    data = _as_buffer(data)
+    encoding = _detect_encoding(data)
+    return data if encoding == 'utf-8' else _decode(data, encoding)
+
+def _preprocess(data: Union[str, BytesLike], chat_format: Optional[ChatFormat],
+                user_columns: bool, workers: int = 1,
+                cache_dir: Optional[Union[str, os.PathLike]] = None,
+                compact: bool = True, calendar_columns: bool = True,
+                profile: Optional[PreprocessProfile] = None) -> pd.DataFrame:
+    """Helper function to preprocess a whole export, given as text or as raw bytes."""
+    if cache_dir is not None:
+        key = cache.cache_key(
+            data,
+            chat_format=None if chat_format is None else (chat_format.name, chat_format.datetime_format),
+            user_columns=user_columns,
+            compact=compact,
+            calendar_columns=calendar_columns,
+        )
+        with profiling.stage(profile, 'cache_load') as record:
+            df = cache.load(cache_dir, key)
+            record['rows_out'] = None if df is None else len(df)
+        if df is None:
+            df = _preprocess(data, chat_format, user_columns, workers, compact=compact,
+                             calendar_columns=calendar_columns, profile=profile)
+            with profiling.stage(profile, 'cache_store', len(df)):
+                cache.store(cache_dir, key, df)
+        return df
+
+    if not isinstance(data, str):
+        data = _prepare_buffer(data)
+    if chat_format is None:
+        with profiling.stage(profile, 'detect_format'):
+            chat_format = detect_format(data)
+    if workers > 1:
+        with profiling.stage(profile, 'parse') as record:
+            df = _parse_in_parallel(data, chat_format, workers)
+            record['rows_out'] = len(df)
     else:
-        raise ValueError("Unsupported WhatsApp chat format. Please ensure your chat export is from WhatsApp and follows either Android or iOS format.")
+        df = _parse_chunk(data, chat_format, profile)
+    df = _add_sequence_columns(df, profile)
+    return _add_feature_columns(df, user_columns, compact, calendar_columns, profile)
+
+def _parse_chunk(data: Union[str, BytesLike], chat_format: ChatFormat,
+                 profile: Optional[PreprocessProfile] = None) -> pd.DataFrame:
+    """Helper function to run the stages that only look at one message at a time."""
+    with profiling.stage(profile, 'split') as record:
+        df, chat_format = _split_messages(data, chat_format)
+        record['rows_out'] = len(df)
+    return _parse_messages(df, chat_format, profile)
+
+def _parse_in_parallel(data: Union[str, BytesLike], chat_format: ChatFormat, workers: int) -> pd.DataFrame:
+    """Helper function to parse an export in pieces cut at message starts, across a process pool."""
+    text = isinstance(data, str)
+    regex = chat_format.regex if text else chat_format.byte_regex
+    newline = '\n' if text else b'\n'
 
+    # Settle the date order up front so that every piece parses dates alike
+    chat_format = _settle_date_order(data, chat_format)
+
+    cuts = [0]
+    for i in range(1, workers):
+        # Search from the start of a line, so that a cut never lands inside a header
+        position = max(cuts[-1], data.rfind(newline, 0, len(data) * i // workers) + 1)
+        match = regex.search(data, position)
+        if match is None:
+            break
+        if match.start() > cuts[-1]:
+            cuts.append(match.start())
+    cuts.append(len(data))
+    pieces = [data[start:end] for start, end in zip(cuts, cuts[1:])]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        frames = list(executor.map(_parse_chunk, pieces, itertools.repeat(chat_format)))
+    return pd.concat(frames)
+
+def _settle_date_order(data: Union[str, BytesLike], chat_format: ChatFormat) -> ChatFormat:
+    """Helper function to decide the date order from every timestamp of an export, if still undecided."""
+    if chat_format.day_first is not None:
+        return chat_format
+    if isinstance(data, str):
+        return chat_format.resolve(match.group('timestamp') for match in chat_format.regex.finditer(data))
+    return chat_format.resolve(str(match.group('timestamp'), 'utf-8')
+                               for match in chat_format.byte_regex.finditer(data))
+
+def _find_resume_offset(data: Union[str, BytesLike], chat_format: ChatFormat, before: datetime) -> int:
+    """Helper function to binary search an export for the last message start found before a given time."""
+    text = isinstance(data, str)
+    regex = chat_format.regex if text else chat_format.byte_regex
+    newline = '\n' if text else b'\n'
+
+    offset = 0
+    low, high = 0, len(data)
+    while low < high:
+        middle = (low + high) // 2
+        # Search from the start of a line, so that a match is never inside a header
+        match = regex.search(data, data.rfind(newline, 0, middle) + 1)
+        if match is None or _parse_timestamp(match.group('timestamp'), chat_format) >= before:
+            high = middle
+        else:
+            offset = match.start()
+            low = middle + 1
+    return offset
+
+def _parse_timestamp(timestamp: Union[str, bytes], chat_format: ChatFormat) -> datetime:
+    """Helper function to parse a single timestamp the way ``_parse_dates`` does."""
+    if isinstance(timestamp, bytes):
+        timestamp = str(timestamp, 'utf-8')
+    timestamp = chat_format.clean(timestamp)
+    try:
+        return datetime.strptime(timestamp, chat_format.datetime_format)
+    except ValueError:
+        return parse(timestamp, fuzzy=True, dayfirst=bool(chat_format.day_first))
+
+def _find_watermark(df: pd.DataFrame, last: pd.Series, occurrence: int) -> Optional[int]:
+    """Helper function to find the position of the n-th occurrence of a message in parsed rows."""
+    matches = np.flatnonzero((df['date'] == last['date']).values & (df['user'] == last['user']).values
+                             & (df['message'] == last['message']).values)
+    return int(matches[occurrence - 1]) if len(matches) >= occurrence else None
+
+def _split_messages(data: Union[str, BytesLike], chat_format: ChatFormat) -> Tuple[pd.DataFrame, ChatFormat]:
+    """Helper function to split an export, settling the date order from its timestamps if still undecided."""
+    df = chat_format.split(data) if isinstance(data, str) else chat_format.split_bytes(data)
+    if chat_format.day_first is None:
+        chat_format = chat_format.resolve(df['message_date'].unique())
+    return df, chat_format
+
+def _parse_dates(timestamps: pd.Series, chat_format: ChatFormat) -> pd.Series:
+    """Helper function to parse timestamps with the format's strptime format, once per unique value."""
+    codes, uniques = pd.factorize(timestamps)
+    uniques = pd.Series([chat_format.clean(timestamp) for timestamp in uniques], dtype=object)
+    parsed = pd.to_datetime(uniques, format=chat_format.datetime_format, errors='coerce')
+    failed = parsed.isna()
+    if failed.any():
+        # Fall back to dateutil for timestamps that don't follow the format,
+        # keeping the day/month order decided for the export
+        dayfirst = bool(chat_format.day_first)
+        parsed = parsed.astype(object)
+        parsed[failed] = uniques[failed].apply(lambda x: parse(x, fuzzy=True, dayfirst=dayfirst))
+        parsed = pd.to_datetime(parsed)
+    return pd.Series(parsed.values.take(codes), index=timestamps.index, name='date')
+
+def _parse_messages(df: pd.DataFrame, chat_format: ChatFormat,
+                    profile: Optional[PreprocessProfile] = None) -> pd.DataFrame:
+    """Helper function to parse dates and separate users from message text."""
     # Parse dates
-    df['date'] = df['message_date'].apply(lambda x: parse(x, fuzzy=True))
-    df.index = df['date']
+    with profiling.stage(profile, 'parse_dates', len(df)):
+        df['date'] = _parse_dates(df['message_date'], chat_format)
+        df.index = df['date']
 
     # Extract users and messages
-    users = []
-    messages = []
-    for message in df['user_message']:
-        entry = re.split('([\w\W]+?):\s', message)
-        if entry[1:]:  # user name exists
-            users.append(entry[1])
-            messages.append(" ".join(entry[2:]))
-        else:
-            users.append('group_notification')
-            messages.append(entry[0])
+    with profiling.stage(profile, 'split_users', len(df)):
+        users, messages = _split_users(df['user_message'])
+        df['user'] = users
+        df['message'] = messages
+        # Count on the object array, so that words are split on the same
+        # Unicode whitespace as str.split()
+        df['Message Length'] = pd.Series(messages, index=df.index, dtype=object).str.count(r'\S+')
 
-    df['user'] = users
-    df['message'] = messages
-    df['Message Length'] = df['message'].apply(lambda x: len(x.split()))
+    # Drop intermediate columns
+    df.drop(columns=['user_message', 'message_date'], inplace=True)
+    return df
+
+def _split_users(user_message: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """Helper function to split message bodies into users and text, vectorized over all rows."""
+    # Work on objects rather than Arrow strings, so that the patterns run on
+    # Python's re, whose \s also matches no-break and other Unicode spaces
+    user_message = user_message.reset_index(drop=True).astype(object)
 
+    # Bodies without "name: " are group notifications and are kept whole
+    has_separator = user_message.str.contains(r':\s')
+    parts = user_message[has_separator].str.extract(_USER_SEPARATOR + r'([\w\W]*)')
+    users = parts[0].reindex(user_message.index).fillna('group_notification')
+
+    # Further "text: " separators inside a message are joined back with spaces,
+    # exactly as splitting the whole body on the separator did
+    messages = parts[1]
+    nested = messages.str.contains(r':\s', na=False)
+    messages[nested] = messages[nested].str.replace(_USER_SEPARATOR, r' \1 ', regex=True)
+    messages = messages.reindex(user_message.index).fillna(user_message)
+    return users.values, messages.values
+
+def _add_sequence_columns(df: pd.DataFrame, profile: Optional[PreprocessProfile] = None) -> pd.DataFrame:
+    """Helper function to add the columns that depend on neighbouring messages."""
     # Add conversation analysis
-    conv_codes, conv_changes = _cluster_into_conversations(df)
-    df['Conv code'] = conv_codes
-    df['Conv change'] = conv_changes
+    with profiling.stage(profile, 'conversations', len(df)):
+        conv_codes, conv_changes = _cluster_into_conversations(df)
+        df['Conv code'] = conv_codes
+        df['Conv change'] = conv_changes
 
     # Add reply analysis
-    is_reply, sender_changes = _find_replies(df)
-    df['Is reply'] = is_reply
-    df['Sender change'] = sender_changes
+    with profiling.stage(profile, 'replies', len(df)):
+        is_reply, sender_changes = _find_replies(df)
+        df['Is reply'] = is_reply
+        df['Sender change'] = sender_changes
+
+    # Calculate reply times
+    with profiling.stage(profile, 'reply_times', len(df)):
+        return _add_reply_times(df)
 
+def _add_feature_columns(df: pd.DataFrame, user_columns: bool = False, compact: bool = True,
+                         calendar_columns: bool = True,
+                         profile: Optional[PreprocessProfile] = None) -> pd.DataFrame:
+    """Helper function to encode users and add time-based columns."""
     # Add user-specific columns
-    for subject in df['user'].unique():
-        df[subject] = df['user'].apply(lambda x: 1 if x == subject else 0)
-        df[f"{subject}_mlength"] = df[subject].values * df['Message Length']
+    with profiling.stage(profile, 'user_columns', len(df)):
+        if user_columns:
+            for subject in df['user'].unique():
+                df[subject] = (df['user'] == subject).astype(np.int64)
+                df[f"{subject}_mlength"] = df[subject].values * df['Message Length']
+        df['user'] = df['user'].astype('category')
+
+        if compact:
+            df['Message Length'] = df['Message Length'].astype(np.int32)
 
     # Add time-based columns
-    df['only_date'] = df['date'].dt.date
-    df['year'] = df['date'].dt.year
-    df['month_num'] = df['date'].dt.month
-    df['month'] = df['date'].dt.month_name()
-    df['day'] = df['date'].dt.day
-    df['day_name'] = df['date'].dt.day_name()
-    df['hour'] = df['date'].dt.hour
-    df['minute'] = df['date'].dt.minute
-
-    # Add time periods
-    period = []
-    for hour in df[['day_name', 'hour']]['hour']:
-        if hour == 23:
-            period.append(str(hour) + "-" + str('00'))
-        elif hour == 0:
-            period.append(str('00') + "-" + str(hour + 1))
-        else:
-            period.append(str(hour) + "-" + str(hour + 1))
-    df['period'] = period
+    with profiling.stage(profile, 'calendar_columns', len(df)):
+        if calendar_columns and compact:
+            for field in CALENDAR_FIELDS:
+                df[field] = _calendar_field(df['date'], field)
+        elif calendar_columns:
+            df['only_date'] = df['date'].dt.date
+            df['year'] = df['date'].dt.year
+            df['month_num'] = df['date'].dt.month
+            df['month'] = df['date'].dt.month_name()
+            df['day'] = df['date'].dt.day
+            df['day_name'] = df['date'].dt.day_name()
+            df['hour'] = df['date'].dt.hour
+            df['minute'] = df['date'].dt.minute
 
-    # Calculate reply times
-    df = _add_reply_times(df)
+            # Add time periods
+            df['period'] = _PERIODS.categories.values.take(df['hour'].values)
 
-    # Drop intermediate columns
-    df.drop(columns=['user_message', 'message_date'], inplace=True)
+    # Keep reply times as the last column
+    df['Reply Time'] = df.pop('Reply Time')
+    return df
+
+def _calendar_field(dates: pd.Series, field: str) -> Union[pd.Series, pd.Categorical]:
+    """Helper function to compute one time-based column from message dates, with compact dtypes."""
+    dates = dates.dt
+    if field == 'only_date':
+        return dates.normalize()
+    if field == 'year':
+        return dates.year.astype(np.int16)
+    if field == 'month':
+        return pd.Categorical.from_codes(dates.month.values - 1, dtype=_MONTHS)
+    if field == 'day_name':
+        return pd.Categorical.from_codes(dates.dayofweek.values, dtype=_DAY_NAMES)
+    if field == 'period':
+        # The categories are ordered by starting hour, so the hour is the code
+        return pd.Categorical.from_codes(dates.hour.values, dtype=_PERIODS)
+    # month_num, day, hour and minute
+    return getattr(dates, 'month' if field == 'month_num' else field).astype(np.int8)
+
+def _process_chunk(data: str, chat_format: ChatFormat, previous: Optional[pd.DataFrame],
+                   user_columns: bool, compact: bool = True,
+                   calendar_columns: bool = True,
+                   profile: Optional[PreprocessProfile] = None) -> Tuple[pd.DataFrame, pd.DataFrame, ChatFormat]:
+    """Helper function to preprocess one streamed chunk, continuing from the previous one."""
+    with profiling.stage(profile, 'split') as record:
+        df, chat_format = _split_messages(data, chat_format)
+        record['rows_out'] = len(df)
+    df = _parse_messages(df, chat_format, profile)
+    df = _add_sequence_columns(df, profile) if previous is None else _continue_sequence(df, previous, profile)
+    last = df.iloc[-1:][['date', 'user', 'message', 'Message Length', 'Conv code']]
+    return _add_feature_columns(df, user_columns, compact, calendar_columns, profile), last, chat_format
 
+def _continue_sequence(df: pd.DataFrame, previous: pd.DataFrame,
+                       profile: Optional[PreprocessProfile] = None) -> pd.DataFrame:
+    """Helper function to add the sequence columns to messages that follow an already processed one."""
+    # Prepend the message right before the seam so that conversation and
+    # reply columns see it, then drop it again
+    offset = previous['Conv code'].iloc[0]
+    df = pd.concat([previous[df.columns], df])
+    df = _add_sequence_columns(df, profile).iloc[1:].copy()
+    df['Conv code'] += offset
     return df
 
+def user_indicators(df: pd.DataFrame, message_length: bool = False) -> pd.DataFrame:
+    """
+    Build a sparse one-hot matrix of message senders, with one column per user.
+
+    This replaces the dense per-user columns ``preprocess`` used to add. Use
+    ``.sparse.to_coo()`` on the result to get a scipy.sparse matrix.
+
+    Args:
+        df: The preprocessed DataFrame containing chat data
+        message_length: Put each message's word count in the sender's column
+            instead of 1, like the legacy ``<user>_mlength`` columns
+
+    Returns:
+        pd.DataFrame: Sparse indicator columns aligned with ``df``
+
+    Example:
+        >>> df = preprocess(chat_data)
+        >>> indicators = user_indicators(df)
+    """
+    indicators = pd.get_dummies(df['user'], sparse=True, dtype=np.int64)
+    if message_length:
+        indicators = indicators.mul(df['Message Length'].values, axis=0)
+    return indicators
+
 def _cluster_into_conversations(df: pd.DataFrame, threshold_mins: int = 60) -> Tuple[np.ndarray, np.ndarray]:
     """Helper function to cluster messages into conversations."""
     threshold_time = np.timedelta64(threshold_mins, 'm')
-    conv_delta = df.index.values - np.roll(df.index.values, 1)
-    conv_delta[0] = np.timedelta64(0)
-    
-    conv_changes = conv_delta > threshold_time
-    conv_changes_indices = np.where(conv_changes)[0]
-    
-    if len(conv_changes_indices) == 0:
-        return np.zeros(len(df)), np.zeros(len(df), dtype=bool)
-        
-    conv_codes = np.zeros(len(df))
-    current_code = 0
-    last_change = 0
-    
-    for change_idx in conv_changes_indices:
-        conv_codes[last_change:change_idx] = current_code
-        current_code += 1
-        last_change = change_idx
-    
-    conv_codes[last_change:] = current_code
+    dates = df.index.values
+    conv_changes = np.diff(dates, prepend=dates[:1]) > threshold_time
+    conv_codes = np.cumsum(conv_changes, dtype=np.int32)
     return conv_codes, conv_changes
 
 def _find_replies(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
     """Helper function to identify replies in conversations."""
-    user_encoder = OrdinalEncoder()
-    message_senders = user_encoder.fit_transform(df['user'].values.reshape(-1, 1))
-    
-    sender_changed = (np.roll(message_senders, 1) - message_senders).reshape(-1) != 0
-    sender_changed[0] = False
-    
-    is_reply = sender_changed & ~df['Conv change']
+    message_senders, _ = pd.factorize(df['user'])
+    sender_changed = np.diff(message_senders, prepend=message_senders[:1]) != 0
+    is_reply = sender_changed & ~df['Conv change'].values
     return is_reply, sender_changed
 
 def _add_reply_times(df: pd.DataFrame) -> pd.DataFrame:
-    """Helper function to calculate reply times."""
-    reply_times = []
-    for i in range(len(df)):
-        if df['Is reply'].iloc[i]:
-            reply_time = (df.index[i] - df.index[i-1]).total_seconds() / 60  # Convert to minutes
-            reply_times.append(reply_time)
-        else:
-            reply_times.append(0)
-    
-    df['Reply Time'] = reply_times
+    """Helper function to calculate reply times, in minutes."""
+    seconds = _reply_seconds(df.index.values, df['Is reply'].values)
+    df['Reply Time'] = seconds / np.float32(60)
     return df
 
-__all__ = ['preprocess'] 
\ No newline at end of file
+def _reply_seconds(dates: np.ndarray, is_reply: np.ndarray) -> np.ndarray:
+    """Helper function to get the seconds since the previous message for every reply, as float32."""
+    seconds = (np.diff(dates, prepend=dates[:1]) / np.timedelta64(1, 's')).astype(np.float32)
+    seconds[~is_reply] = 0
+    return seconds
+
+__all__ = ['preprocess', 'preprocess_stream', 'preprocess_file', 'preprocess_zip', 'preprocess_many', 'append', 'detect_format', 'register_format', 'registered_formats', 'ChatFormat', 'user_indicators']
@@ -0,0 +1,118 @@
+"""
+Per-stage instrumentation of WhatsApp chat preprocessing.
+
+Pass a ``PreprocessProfile`` to ``preprocess`` (or ``preprocess_file``,
+``preprocess_zip`` and ``preprocess_stream``) to record the wall time, row
+counts and peak traced memory of every internal stage.
+"""
+
+import contextlib
+import time
+import tracemalloc
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+
+class PreprocessProfile:
+    """
+    Stage-by-stage measurements of preprocessing runs.
+
+    Each stage produces one record, a dict with the keys ``stage``,
+    ``seconds``, ``rows_in``, ``rows_out`` and ``peak_bytes``. Rows are
+    messages; ``rows_in`` is None for stages that read the raw export.
+    ``peak_bytes`` is the peak memory allocated during the stage on top of
+    what was allocated when it started, as traced by ``tracemalloc``, or
+    None when memory tracing is off. If the caller is already tracing
+    memory, tracing is left on and its peak is not reset, so ``peak_bytes``
+    is only known for stages that raise the traced peak, and None for the
+    others.
+
+    Records are appended to ``stages``. Subclass and override ``on_stage``
+    to forward them elsewhere, such as to a metrics system.
+
+    Stages, in order: ``detect_format``, ``split``, ``parse_dates``,
+    ``split_users``, ``conversations``, ``replies``, ``reply_times``,
+    ``user_columns`` and ``calendar_columns``. Runs with ``workers > 1``
+    record one ``parse`` stage instead of ``split`` to ``split_users``, and
+    runs with a ``cache_dir`` record ``cache_load`` and, on a miss,
+    ``cache_store``.
+
+    Args:
+        trace_memory: Measure peak memory with ``tracemalloc``. Tracing
+            slows the stages down, so their timings are then inflated.
+
+    Example:
+        >>> profile = PreprocessProfile()
+        >>> df = preprocess(chat_data, profile=profile)
+        >>> pd.DataFrame(profile.stages)
+    """
+
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory
+        self.stages: List[Dict[str, Any]] = []
+
+    @property
+    def total_seconds(self) -> float:
+        """Wall time of all recorded stages."""
+        return sum(record['seconds'] for record in self.stages)
+
+    def on_stage(self, record: Dict[str, Any]) -> None:
+        """
+        Handle the record of a finished stage.
+
+        Args:
+            record: Measurements of the stage
+        """
+        self.stages.append(record)
+
+    @contextlib.contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Measure the stage run in the ``with`` block.
+
+        The block sets ``rows_out`` on the yielded record when the stage
+        changes the number of rows.
+
+        Args:
+            name: Name of the stage
+            rows_in: Number of rows the stage starts with
+
+        Yields:
+            dict: The record of the stage
+        """
+        record = {'stage': name, 'seconds': None, 'rows_in': rows_in, 'rows_out': rows_in, 'peak_bytes': None}
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        # The caller's own tracing is left running, with its peak untouched
+        baseline, peak = tracemalloc.get_traced_memory() if self.trace_memory else (0, 0)
+
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            if self.trace_memory:
+                new_peak = tracemalloc.get_traced_memory()[1]
+                if started_tracing or new_peak > peak:
+                    record['peak_bytes'] = max(0, new_peak - baseline)
+            if started_tracing:
+                tracemalloc.stop()
+        self.on_stage(record)
+
+def stage(profile: Optional[PreprocessProfile], name: str,
+          rows_in: Optional[int] = None) -> ContextManager[Dict[str, Any]]:
+    """
+    Measure a stage with ``profile``, or do nothing if it is None.
+
+    Args:
+        profile: Profile recording the run, if any
+        name: Name of the stage
+        rows_in: Number of rows the stage starts with
+
+    Returns:
+        A context manager yielding the record of the stage
+    """
+    if profile is None:
+        return contextlib.nullcontext({})
+    return profile.stage(name, rows_in)
+
+__all__ = ['PreprocessProfile', 'stage']
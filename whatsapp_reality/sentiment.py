@@ -0,0 +1,173 @@
+"""
+VADER sentiment scoring of chat messages.
+
+Chats repeat short messages such as "ok", "haha" or a single emoji a lot, so
+``score_sentiment`` scores each distinct text once and spreads the scores
+back over the messages. Scores are returned as float32 arrays, one per
+VADER score. VADER is pure Python, so large chats can be scored across a
+process pool with ``workers``, and scores can be kept across runs in a
+``SentimentCache`` so that re-analysing a chat only scores its new messages.
+``score_polarity`` does the same for TextBlob polarity.
+"""
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import nltk
+import numpy as np
+import pandas as pd
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from textblob import TextBlob
+
+from .cache import SentimentCache
+
+# VADER scores, in the order they are returned
+SENTIMENT_COLUMNS = ('pos', 'neg', 'neu', 'compound')
+
+# Scores of values that are not text
+_NEUTRAL = (0.0, 0.0, 1.0, 0.0)
+
+_analyzer: Optional[SentimentIntensityAnalyzer] = None
+_scorer: Optional[Tuple[str, ...]] = None
+
+def _vader() -> SentimentIntensityAnalyzer:
+    """Helper function to get the analyzer, loading the VADER lexicon on first use."""
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+def _vader_scorer() -> Tuple[str, ...]:
+    """Helper function to identify the scorer in cache keys, by nltk version and a hash of the loaded lexicon."""
+    global _scorer
+    if _scorer is None:
+        lexicon = _vader().lexicon_file.encode('utf-8')
+        _scorer = ('vader', nltk.__version__, hashlib.blake2b(lexicon, digest_size=16).hexdigest())
+    return _scorer
+
+def score_sentiment(messages: Iterable, workers: Optional[int] = 1, chunk_size: int = 20000,
+                    cache: Optional[Union[SentimentCache, str, os.PathLike]] = None) -> Dict[str, np.ndarray]:
+    """
+    Score the sentiment of messages with VADER, scoring each distinct text once.
+
+    Values that are not strings, such as NaN, are scored as neutral.
+
+    Args:
+        messages: Message texts, e.g. the 'message' column of a preprocessed DataFrame
+        workers: Number of processes to score with (None for the number of
+            CPUs). Each process loads the VADER lexicon once and scores
+            chunks of the distinct texts. Chats with no more than
+            ``chunk_size`` distinct texts are scored in the current process.
+        chunk_size: Number of distinct texts sent to a process at a time
+        cache: A ``SentimentCache``, or the path of its database. Texts found
+            in it are not scored again, and the scores of the others are
+            added to it.
+
+    Returns:
+        Dict[str, np.ndarray]: float32 arrays of the 'pos', 'neg', 'neu' and
+            'compound' scores, in the order of ``messages``
+
+    Example:
+        >>> scores = score_sentiment(df['message'], workers=4, cache='sentiment.sqlite')
+        >>> df['compound'] = scores['compound']
+    """
+    codes, texts = _distinct_texts(messages, chunk_size)
+
+    if cache is None:
+        scored = _score_in_chunks(texts, workers, chunk_size)
+    else:
+        opened = not isinstance(cache, SentimentCache)
+        if opened:
+            cache = SentimentCache(cache)
+        try:
+            # Only score the texts missing from the cache, and add them to it
+            scorer = _vader_scorer()
+            scored, found = cache.get_many(texts, scorer, len(SENTIMENT_COLUMNS))
+            missing = np.flatnonzero(~found)
+            missing_texts = [texts[i] for i in missing]
+            scored[missing] = _score_in_chunks(missing_texts, workers, chunk_size)
+            cache.put_many(missing_texts, scored[missing], scorer)
+        finally:
+            if opened:
+                cache.close()
+
+    # One row per distinct text, plus a neutral row that missing values (code -1) map to
+    scores = np.concatenate([scored, np.array([_NEUTRAL], dtype=np.float32)])
+    rows = scores.take(codes, axis=0)
+    return {column: np.ascontiguousarray(rows[:, i]) for i, column in enumerate(SENTIMENT_COLUMNS)}
+
+def score_polarity(messages: Iterable, workers: Optional[int] = 1, chunk_size: int = 20000) -> np.ndarray:
+    """
+    Score the polarity of messages with TextBlob, scoring each distinct text once.
+
+    Values that are not strings, such as NaN, get a polarity of 0.
+
+    Args:
+        messages: Message texts
+        workers: Number of processes to score with, as in ``score_sentiment``
+        chunk_size: Number of distinct texts sent to a process at a time
+
+    Returns:
+        np.ndarray: float32 polarities from -1 to 1, in the order of ``messages``
+    """
+    codes, texts = _distinct_texts(messages, chunk_size)
+    scored = _score_in_chunks(texts, workers, chunk_size, _polarity_texts, None)
+    return np.append(scored, np.float32(0.0)).take(codes)
+
+def _distinct_texts(messages: Iterable, chunk_size: int) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """Helper function to factorize messages into codes and distinct texts, non-strings becoming None."""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer.")
+    if not isinstance(messages, (pd.Series, pd.Index, np.ndarray)):
+        messages = np.array(list(messages), dtype=object)
+    codes, uniques = pd.factorize(messages)
+    return codes, [message if isinstance(message, str) else None for message in uniques]
+
+def _score_in_chunks(texts: List[Optional[str]], workers: Optional[int], chunk_size: int,
+                     score: Optional[Callable[[List[Optional[str]]], np.ndarray]] = None,
+                     initializer: Optional[Callable[[], object]] = _vader) -> np.ndarray:
+    """Helper function to score texts in the current process, or in chunks across a process pool."""
+    score = score or _score_texts
+    if workers == 1 or len(texts) <= chunk_size:
+        return score(texts)
+    chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer) as executor:
+        return np.concatenate(list(executor.map(score, chunks)))
+
+def _score_texts(texts: List[Optional[str]]) -> np.ndarray:
+    """Helper function to score texts into a float32 array with one row per text, None scoring neutral."""
+    scores = np.empty((len(texts), len(SENTIMENT_COLUMNS)), dtype=np.float32)
+    sid = _vader()
+    for i, text in enumerate(texts):
+        if text is None:
+            scores[i] = _NEUTRAL
+        else:
+            polarity = sid.polarity_scores(text)
+            scores[i] = [polarity[column] for column in SENTIMENT_COLUMNS]
+    return scores
+
+def _polarity_texts(texts: List[Optional[str]]) -> np.ndarray:
+    """Helper function to score the TextBlob polarity of texts into a float32 array, None scoring 0."""
+    return np.array([0.0 if text is None else TextBlob(text).sentiment.polarity for text in texts],
+                    dtype=np.float32)
+
+def label_sentiment(compound: Iterable[float], threshold: float = 0.05) -> np.ndarray:
+    """
+    Label compound scores as 'Positive', 'Negative' or 'Neutral'.
+
+    Args:
+        compound: Compound scores, as returned by ``score_sentiment``
+        threshold: Scores above it are positive and scores below its negation negative
+
+    Returns:
+        np.ndarray: The labels
+    """
+    compound = np.asarray(compound)
+    # Compare at the precision of the scores, so that a float32 score of
+    # exactly 0.05 is not taken to exceed the float64 threshold
+    threshold = compound.dtype.type(threshold) if compound.dtype.kind == 'f' else threshold
+    return np.where(compound > threshold, 'Positive', np.where(compound < -threshold, 'Negative', 'Neutral'))
+
+__all__ = ['SENTIMENT_COLUMNS', 'score_sentiment', 'score_polarity', 'label_sentiment']
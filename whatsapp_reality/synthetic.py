@@ -0,0 +1,181 @@
+"""
+Deterministic synthetic WhatsApp chat exports, for tests and benchmarks.
+
+The generated exports follow the built-in formats ``preprocess`` recognizes and
+include multi-line messages, emoji, media placeholders, links, deleted
+messages and group notifications. The same arguments always produce the
+same export.
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Iterator, List
+
+# Formats that can be generated, by ``ChatFormat`` name
+FORMATS = ('android_24hr', 'android_12hr', 'ios_12hr', 'ios_24hr', 'android_24hr_dotted', 'ios_24hr_dotted')
+
+_FIRST_NAMES = ['Aarav', 'Alice', 'Ana María', 'Bob', 'Chen', 'Chloé', 'David', 'Emma', 'Fatima', 'Grace',
+                'Hiro', 'Isabel', 'Jonas', 'Kwame', 'Lena', 'Mateo', 'Nadia', 'Olu', 'Priya', 'Quinn',
+                'Rahul', 'Sofia', 'Tom', 'Uma', 'Victor', 'Wei', 'Ximena', 'Yusuf', 'Zara', 'Zoë']
+_LAST_NAMES = ['Smith', 'García', 'Kumar', 'Okafor', 'Müller', 'Tanaka', 'Silva', 'Novak', 'Haddad',
+               'Kowalski', 'Nguyen', 'Rossi', 'Dubois', 'Jensen', 'Ivanova', 'Costa', 'Cohen', 'Ali']
+_WORDS = ('ok yes no maybe lol haha sure thanks please sorry today tomorrow tonight now later soon '
+          'meeting lunch dinner coffee call home work office class exam project deadline movie game '
+          'match party weekend trip flight train bus traffic weather rain sunny cold hot happy sad '
+          'great good bad awesome terrible love miss see you there here what when where why how who '
+          'the a to and is are was it this that i we they me my your our done ready late early again').split()
+_EMOJI = ['😂', '❤️', '👍', '🙏', '😊', '😭', '🔥', '🎉', '😅', '🤔', '👀', '💯', '😍', '🙌', '😎']
+_DOMAINS = ['example.com', 'news.example.org', 'youtu.be', 'maps.example.net', 'docs.example.com']
+
+def generate_chat(messages: int = 10000, users: int = 5, chat_format: str = 'android_24hr',
+                  seed: int = 0, start: datetime = datetime(2021, 1, 1, 8, 0),
+                  day_first: bool = False) -> str:
+    """
+    Generate a synthetic WhatsApp chat export.
+
+    Args:
+        messages: Number of messages, including group notifications
+        users: Number of participants
+        chat_format: One of ``FORMATS``
+        seed: Seed of the random generator
+        start: Timestamp of the first message
+        day_first: Write dates as day/month/year instead of month/day/year
+
+    Returns:
+        str: The export text
+
+    Example:
+        >>> df = preprocess(generate_chat(messages=1000, users=3, chat_format='ios_12hr'))
+        >>> len(df)
+        1000
+    """
+    return ''.join(generate_chat_lines(messages, users, chat_format, seed, start, day_first))
+
+def generate_chat_lines(messages: int = 10000, users: int = 5, chat_format: str = 'android_24hr',
+                        seed: int = 0, start: datetime = datetime(2021, 1, 1, 8, 0),
+                        day_first: bool = False) -> Iterator[str]:
+    """
+    Generate a synthetic WhatsApp chat export one message at a time.
+
+    Use this to write large exports to a file without holding them in memory.
+
+    Args:
+        messages: Number of messages, including group notifications
+        users: Number of participants
+        chat_format: One of ``FORMATS``
+        seed: Seed of the random generator
+        start: Timestamp of the first message
+        day_first: Write dates as day/month/year instead of month/day/year
+
+    Yields:
+        str: One message with its header and trailing newline. Multi-line
+        messages are yielded as one string.
+
+    Example:
+        >>> with open('chat.txt', 'w', encoding='utf-8') as file:
+        ...     file.writelines(generate_chat_lines(messages=1_000_000, users=50))
+    """
+    if chat_format not in FORMATS:
+        raise ValueError(f"Unknown chat format {chat_format!r}, expected one of {', '.join(FORMATS)}")
+    if users < 1:
+        raise ValueError("A chat needs at least one user.")
+
+    rng = random.Random(seed)
+    names = _user_names(users, rng)
+    # A few members write most of the messages
+    cum_weights = list(_cumulative(1 / (rank + 1) for rank in range(users)))
+    android = chat_format.startswith('android')
+    media = '<Media omitted>' if android else '\u200eimage omitted'
+
+    timestamp = start
+    for i in range(messages):
+        if i == 0:
+            body = "Messages and calls are end-to-end encrypted. No one outside of this chat, not even WhatsApp, can read or listen to them."
+        elif rng.random() < 0.01:
+            body = _notification(rng, names)
+        else:
+            sender = rng.choices(names, cum_weights=cum_weights)[0]
+            body = f"{sender}: {_text(rng, media)}"
+        yield _header(timestamp, chat_format, day_first) + body + '\n'
+
+        # Replies within a conversation come quickly, new conversations after hours
+        if rng.random() < 0.9:
+            gap = rng.expovariate(1 / 90)
+        else:
+            gap = rng.expovariate(1 / 21600)
+        timestamp += timedelta(seconds=int(gap) + 1)
+
+def _header(timestamp: datetime, chat_format: str, day_first: bool) -> str:
+    """Helper function to format the timestamp header of a message."""
+    year = timestamp.year % 100
+    first, second = (timestamp.day, timestamp.month) if day_first else (timestamp.month, timestamp.day)
+    if chat_format.endswith('_dotted'):
+        date = f"{first:02d}.{second:02d}.{year:02d}"
+        if chat_format.startswith('android'):
+            return f"{date}, {timestamp.hour:02d}:{timestamp.minute:02d} - "
+        return f"[{date}, {timestamp.hour:02d}:{timestamp.minute:02d}:{timestamp.second:02d}] "
+
+    if chat_format.startswith('android'):
+        date = f"{first}/{second}/{year:02d}"
+        if chat_format == 'android_24hr':
+            return f"{date}, {timestamp.hour:02d}:{timestamp.minute:02d} - "
+        suffix = 'am' if timestamp.hour < 12 else 'pm'
+        return f"{date}, {timestamp.hour % 12 or 12}:{timestamp.minute:02d} {suffix} - "
+
+    date = f"{first:02d}/{second:02d}/{year:02d}"
+    if chat_format == 'ios_24hr':
+        return f"[{date}, {timestamp.hour:02d}:{timestamp.minute:02d}:{timestamp.second:02d}] "
+    suffix = 'AM' if timestamp.hour < 12 else 'PM'
+    return f"[{date}, {timestamp.hour % 12 or 12}:{timestamp.minute:02d}:{timestamp.second:02d} {suffix}] "
+
+def _user_names(users: int, rng: random.Random) -> List[str]:
+    """Helper function to pick distinct participant names, some of them phone numbers."""
+    names = [f"{first} {last}" for last in _LAST_NAMES for first in _FIRST_NAMES]
+    rng.shuffle(names)
+    picked = []
+    for i in range(users):
+        if i % 10 == 9 or i >= len(names):
+            # Contacts that aren't saved show up as phone numbers
+            picked.append(f"+44 7700 {900000 + i:06d}")
+        else:
+            picked.append(names[i])
+    return picked
+
+def _text(rng: random.Random, media: str) -> str:
+    """Helper function to write the text of one message."""
+    roll = rng.random()
+    if roll < 0.04:
+        return media
+    if roll < 0.05:
+        return 'This message was deleted'
+    if roll < 0.10:
+        words = ' '.join(rng.choices(_WORDS, k=rng.randint(0, 6)))
+        return f"{words} https://{rng.choice(_DOMAINS)}/{rng.choice(_WORDS)}/{rng.randint(1, 99999)}".lstrip()
+    if roll < 0.15:
+        return '\n'.join(' '.join(rng.choices(_WORDS, k=rng.randint(1, 10)))
+                         for _ in range(rng.randint(2, 4)))
+    text = ' '.join(rng.choices(_WORDS, k=rng.randint(1, 15)))
+    if roll < 0.20:
+        text = f"{rng.choice(_WORDS)}: {text}"
+    if roll > 0.80:
+        text += ' ' + ''.join(rng.choices(_EMOJI, k=rng.randint(1, 3)))
+    return text
+
+def _notification(rng: random.Random, names: List[str]) -> str:
+    """Helper function to write a group notification."""
+    actor, subject = rng.choice(names), rng.choice(names)
+    return rng.choice([
+        f"{actor} added {subject}",
+        f"{actor} left",
+        f"{actor} changed the subject to \"{rng.choice(_WORDS).title()} {rng.choice(_WORDS)}\"",
+        f"{actor} changed this group's icon",
+    ])
+
+def _cumulative(values: Iterator[float]) -> Iterator[float]:
+    """Helper function to accumulate weights for ``random.choices``."""
+    total = 0.0
+    for value in values:
+        total += value
+        yield total
+
+__all__ = ['generate_chat', 'generate_chat_lines', 'FORMATS']